@@ -1,13 +1,36 @@
+import asyncio
+import json
 import os
-import tempfile
+import time
 from contextlib import asynccontextmanager
 from typing import Annotated
 
 from dotenv import load_dotenv
-from fastapi import FastAPI, File, HTTPException, UploadFile
+from fastapi import (
+    FastAPI,
+    File,
+    HTTPException,
+    UploadFile,
+    WebSocket,
+    WebSocketDisconnect,
+)
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from pydantic import BaseModel
 
+from ingest import DecodedAudio, UnsupportedUploadError, UploadLimit, decode_upload
+from jobs import JobAdmission, JobQueue, QueueFullError
+from live import LiveSession
+from metrics import (
+    LATENCY_BUCKETS,
+    Histogram,
+    HttpMetrics,
+    PrometheusText,
+    RequestMetrics,
+    resident_memory,
+)
+from profiling import ProfileStore, RequestProfiling
+from tracing import FileSpanExporter, RequestTracing, Tracer, span
 from transcription import TranscriptionService
 
 load_dotenv()
@@ -19,22 +42,168 @@ class CleanRequest(BaseModel):
 
 
 service = None
+job_queue = None
+# Startup runs in the background: loading_whisper -> warming -> ready, or
+# llm_unreachable while the LLM cannot be reached (transcription still works),
+# or llm_misconfigured if it answered with an error retrying will not fix
+startup = {"state": "loading_whisper", "error": None, "timings": {}}
+startup_task = None
+# Seconds between LLM warm-up attempts while it is unreachable
+LLM_WARMUP_RETRY = 10
+# Largest request body accepted; the frontend advertises 200 MB uploads
+MAX_UPLOAD_MB = float(os.getenv("MAX_UPLOAD_MB", "200"))
+# Most memory any one upload held while being decoded, in MB
+upload_peak_mb = Histogram((1, 4, 16, 64, 256, 1024))
+# Prometheus metrics (GET /metrics): per-route latency, status codes and
+# upload times from the middleware, decode time from _ingest; Whisper and LLM
+# stages are observed by the service
+http_metrics = HttpMetrics()
+decode_seconds = Histogram(LATENCY_BUCKETS)
+live_sessions = 0
+# Live transcription: new audio needed before each re-decode, and buffer
+# length past which it is cut at the last committed sentence (seconds)
+LIVE_MIN_CHUNK_SECONDS = float(os.getenv("LIVE_MIN_CHUNK_SECONDS", "1.0"))
+LIVE_TRIM_SECONDS = float(os.getenv("LIVE_TRIM_SECONDS", "15"))
+# Tracing: every response carries an X-Request-ID; with TRACE_FILE set, the
+# spans of a TRACE_SAMPLE_RATE share of requests are appended to it (OTLP/JSON)
+TRACE_FILE = os.getenv("TRACE_FILE", "")
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))
+tracer = Tracer(FileSpanExporter(TRACE_FILE) if TRACE_FILE else None, TRACE_SAMPLE_RATE)
+# Profiling: requests sent with X-Debug-Profile: 1 get a flame graph and
+# allocation stats. Off by default: while a profile runs, tracemalloc slows
+# the whole process down
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+profile_store = ProfileStore(
+    os.getenv("PROFILE_DIR", "profiles"), keep=int(os.getenv("PROFILE_KEEP", "50"))
+)
 
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    """Uses OpenAI-compatible API (Ollama, OpenAI, LM Studio, etc.). Configure via .env file."""
-    global service
-    print("🚀 Starting AI Transcript App...")
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
-    service = TranscriptionService(
+
+async def _ingest(audio: UploadFile) -> DecodedAudio:
+    """Decode an upload in memory; 415 if its declared type is not audio,
+    400 if it does not decode."""
+    start = time.perf_counter()
+    try:
+        with span("decode_upload", filename=audio.filename) as decode:
+            decoded = await asyncio.to_thread(
+                decode_upload, audio.file, audio.filename, audio.content_type
+            )
+            if decode:
+                decode.set(audio_duration=decoded.duration)
+    except UnsupportedUploadError as e:
+        raise HTTPException(status_code=415, detail=str(e)) from e
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    decode_seconds.observe(time.perf_counter() - start)
+    upload_peak_mb.observe(decoded.peak_bytes / 1024 / 1024)
+    return decoded
+
+
+def _load_service() -> TranscriptionService:
+    return TranscriptionService(
         whisper_model=os.getenv("WHISPER_MODEL"),
+        whisper_compute_type=os.getenv("WHISPER_COMPUTE_TYPE", "int8"),
         llm_base_url=os.getenv("LLM_BASE_URL"),
         llm_api_key=os.getenv("LLM_API_KEY"),
         llm_model=os.getenv("LLM_MODEL"),
+        whisper_concurrency=int(os.getenv("WHISPER_CONCURRENCY", "1")),
+        llm_concurrency=int(os.getenv("LLM_CONCURRENCY", "4")),
+        transcript_cache_size=int(os.getenv("TRANSCRIPT_CACHE_SIZE", "128")),
+        transcript_cache_path=os.getenv("TRANSCRIPT_CACHE_PATH") or None,
+        llm_cache_size=int(os.getenv("LLM_CACHE_SIZE", "256")),
+        llm_cache_ttl=float(os.getenv("LLM_CACHE_TTL", "3600")),
+        whisper_batch_size=int(os.getenv("WHISPER_BATCH_SIZE", "8")),
+        microbatch_window_ms=float(os.getenv("WHISPER_MICROBATCH_WINDOW_MS", "0")),
+        llm_timeout=float(os.getenv("LLM_TIMEOUT", "30")),
+        llm_max_retries=int(os.getenv("LLM_MAX_RETRIES", "2")),
+        llm_circuit_threshold=int(os.getenv("LLM_CIRCUIT_THRESHOLD", "5")),
+        llm_circuit_reset=float(os.getenv("LLM_CIRCUIT_RESET", "30")),
+        llm_context_tokens=int(os.getenv("LLM_CONTEXT_TOKENS", "2048")),
+        llm_chunk_concurrency=int(os.getenv("LLM_CHUNK_CONCURRENCY", "4")),
+        whisper_cpu_threads=int(os.getenv("WHISPER_CPU_THREADS", "0")),
+        long_audio_chunk_seconds=float(os.getenv("LONG_AUDIO_CHUNK_SECONDS", "60")),
+        whisper_processes=int(os.getenv("WHISPER_PROCESSES", "0")),
+        whisper_process_threads=int(os.getenv("WHISPER_PROCESS_THREADS", "1")),
+        whisper_pin_cpus=os.getenv("WHISPER_PIN_CPUS", "false").lower() == "true",
+        whisper_models=[
+            name.strip()
+            for name in os.getenv("WHISPER_MODELS", "").split(",")
+            if name.strip()
+        ],
+        whisper_memory_budget_mb=float(os.getenv("WHISPER_MEMORY_BUDGET_MB", "0")),
+        whisper_profile=os.getenv("WHISPER_PROFILE", "accurate"),
+        adaptive_profile=os.getenv("WHISPER_ADAPTIVE_PROFILE", "false").lower()
+        == "true",
+        adaptive_long_audio_seconds=float(
+            os.getenv("WHISPER_ADAPTIVE_LONG_AUDIO_SECONDS", "600")
+        ),
+    )
+
+
+async def _start_services():
+    """Load and warm up models without blocking the server from accepting
+    connections; /api/status reports progress."""
+    global service, job_queue
+    timings = startup["timings"]
+
+    t0 = time.perf_counter()
+    try:
+        loaded = await asyncio.to_thread(_load_service)
+        timings["whisper_load_time"] = time.perf_counter() - t0
+
+        startup["state"] = "warming"
+        t1 = time.perf_counter()
+        await loaded.warm_up_whisper()
+        timings["whisper_warmup_time"] = time.perf_counter() - t1
+    except Exception as e:
+        print(f"❌ Startup failed: {e}")
+        startup.update(state="failed", error=str(e))
+        return
+
+    # Transcription is usable from here; cleaning falls back to raw text
+    # until the LLM answers
+    service = loaded
+    job_queue = JobQueue(
+        service,
+        max_queued=int(os.getenv("JOB_QUEUE_SIZE", "16")),
+        workers=int(os.getenv("JOB_WORKERS", "1")),
     )
+    job_queue.start()
+
+    t2 = time.perf_counter()
+    try:
+        while not await service.warm_up_llm():
+            startup["state"] = "llm_unreachable"
+            await asyncio.sleep(LLM_WARMUP_RETRY)
+    except Exception as e:
+        # A wrong key, URL or model name: waiting will not fix it
+        print(f"❌ LLM rejected the warm-up, check the LLM_* settings: {e}")
+        startup.update(state="llm_misconfigured", error=str(e))
+        return
+    timings["llm_warmup_time"] = time.perf_counter() - t2
+
+    startup["state"] = "ready"
+    timings["total_time"] = time.perf_counter() - t0
     print("✅ Ready!")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Uses OpenAI-compatible API (Ollama, OpenAI, LM Studio, etc.). Configure via .env file."""
+    global startup_task
+    print("🚀 Starting AI Transcript App...")
+    startup_task = asyncio.create_task(_start_services())
     yield
+    startup_task.cancel()
+    await asyncio.gather(startup_task, return_exceptions=True)
+    if job_queue:
+        await job_queue.stop()
+    if service:
+        await service.shutdown()
 
 
 app = FastAPI(title="AI Transcript App", lifespan=lifespan)
@@ -49,19 +218,216 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID", "X-Trace-Id", "X-Profile", "X-Profile-Id"],
 )
+app.add_middleware(UploadLimit, max_bytes=int(MAX_UPLOAD_MB * 1024 * 1024))
+# Turns job submissions away while the queue is full, before the upload is read
+app.add_middleware(JobAdmission, path="/api/jobs", get_queue=lambda: job_queue)
+# Outside the upload limit, so profiles cover receiving the upload
+app.add_middleware(
+    RequestProfiling,
+    store=profile_store,
+    enabled=PROFILING_ENABLED,
+    interval=PROFILE_INTERVAL_MS / 1000,
+)
+# Requests the upload limit rejects are counted and traced too
+app.add_middleware(RequestMetrics, metrics=http_metrics)
+# Outermost, so every response gets a request id
+app.add_middleware(RequestTracing, tracer=tracer)
 
 
 @app.get("/api/status")
 async def get_status():
     return {
-        "status": "ready" if service else "initializing",
+        "status": startup["state"],
+        "startup": startup,
         "whisper_model": os.getenv("WHISPER_MODEL"),
         "llm_model": os.getenv("LLM_MODEL"),
         "llm_base_url": os.getenv("LLM_BASE_URL"),
+        "whisper_concurrency": service.whisper_concurrency if service else None,
+        "llm_concurrency": service.llm_concurrency if service else None,
+        "jobs": job_queue.stats() if job_queue else None,
+        "transcript_cache": service.transcript_cache.stats() if service else None,
+        "llm": service.llm_stats() if service else None,
+        "llm_cache": service.llm_cache.stats() if service else None,
+        "whisper_models": service.models.stats() if service else None,
+        "decode_profile": (
+            {
+                "default": service.default_profile,
+                "backlog": service.whisper_backlog,
+                "adaptive": (
+                    service.profile_policy.stats() if service.profile_policy else None
+                ),
+            }
+            if service
+            else None
+        ),
+        "whisper_workers": (
+            service.worker_pool.stats() if service and service.worker_pool else None
+        ),
+        "microbatch": (
+            service.microbatcher.stats() if service and service.microbatcher else None
+        ),
+        "uploads": {
+            "max_upload_mb": MAX_UPLOAD_MB or None,
+            "peak_mb": upload_peak_mb.snapshot(),
+        },
+        "tracing": {
+            "trace_file": TRACE_FILE or None,
+            "sample_rate": TRACE_SAMPLE_RATE,
+            "traces_exported": tracer.exported,
+        },
     }
 
 
+@app.get("/api/ready")
+async def get_ready():
+    """200 once models are loaded and warm, 503 before; for load balancer
+    readiness checks during rolling restarts."""
+    if startup["state"] != "ready":
+        detail = startup["state"]
+        if startup["error"]:
+            detail += f": {startup['error']}"
+        raise HTTPException(status_code=503, detail=detail)
+    return {"status": "ready"}
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus text exposition of the latency histograms, counters and
+    gauges (cumulative since startup)."""
+    out = PrometheusText(prefix="transcript_")
+    http = http_metrics
+    out.histogram(
+        "upload_seconds",
+        "Time for a multipart upload body to arrive",
+        http.upload_seconds,
+    )
+    out.histogram("decode_seconds", "Upload decode to 16 kHz samples", decode_seconds)
+    out.histogram(
+        "request_seconds",
+        "Request latency until the last response byte, by route",
+        http.request_seconds,
+        ("route",),
+    )
+    out.counter(
+        "http_responses_total",
+        "Responses by route and status code",
+        http.responses.snapshot(),
+        ("route", "status"),
+    )
+    out.counter(
+        "request_errors_total",
+        "Failed requests (5xx, or an error in the body or stream), by route",
+        http.errors.snapshot(),
+        ("route",),
+    )
+    out.gauge("http_requests_in_flight", "HTTP requests being served", http.in_flight)
+    out.gauge("live_sessions", "Open live transcription WebSockets", live_sessions)
+    out.gauge("ready", "1 once models are loaded and warm", startup["state"] == "ready")
+    out.gauge("process_resident_bytes", "Resident memory", resident_memory())
+    out.histogram(
+        "upload_peak_megabytes",
+        "Most memory an upload held while decoding",
+        upload_peak_mb,
+    )
+    if service:
+        out.histogram(
+            "whisper_seconds",
+            "Whisper decode latency (cache misses), queueing included",
+            service.whisper_seconds,
+        )
+        out.histogram(
+            "real_time_factor",
+            "Whisper decode time / audio duration",
+            service.real_time_factor,
+        )
+        out.histogram(
+            "llm_seconds",
+            "LLM completion latency, waiting for a slot and retries included",
+            service.llm_seconds,
+        )
+        out.counter(
+            "llm_fallbacks_total",
+            "Cleanings that returned the raw text, by reason",
+            {(reason,): n for reason, n in service.llm_fallbacks.items()},
+            ("reason",),
+        )
+        out.counter(
+            "llm_errors_total",
+            "Failed LLM completion attempts, by kind",
+            {(kind,): n for kind, n in service.llm_errors.items()},
+            ("kind",),
+        )
+        out.counter("llm_retries_total", "LLM completion retries", service.llm_retries)
+        out.gauge(
+            "llm_circuit_open",
+            "1 while the LLM circuit breaker is open",
+            service.llm_breaker.state == "open",
+        )
+        out.gauge(
+            "llm_requests_in_flight", "LLM completions running", service.llm_in_flight
+        )
+        out.gauge(
+            "llm_requests_queued",
+            "LLM completions waiting for a slot",
+            service.llm_waiting,
+        )
+        out.gauge(
+            "whisper_backlog",
+            "Whisper decodes queued or running",
+            service.whisper_backlog,
+        )
+        caches = {
+            "transcript": service.transcript_cache.stats(),
+            "llm": service.llm_cache.stats(),
+        }
+        out.counter(
+            "cache_hits_total",
+            "Cache hits, by cache",
+            {(name,): stats["hits"] for name, stats in caches.items()},
+            ("cache",),
+        )
+        out.counter(
+            "cache_misses_total",
+            "Cache misses, by cache",
+            {(name,): stats["misses"] for name, stats in caches.items()},
+            ("cache",),
+        )
+        out.gauge(
+            "whisper_model_loaded",
+            "Whisper models in memory, by model and compute type",
+            {
+                (model["model"], model["compute_type"]): 1
+                for model in service.models.stats()["models"]
+            },
+            ("model", "compute_type"),
+        )
+        if service.microbatcher:
+            out.gauge(
+                "microbatch_pending",
+                "Decodes waiting for the next micro-batch",
+                service.microbatcher.stats()["pending"],
+            )
+    if job_queue:
+        jobs = job_queue.stats()
+        out.gauge("jobs_queued", "Jobs waiting for a worker", jobs["queued"])
+        out.gauge("jobs_running", "Jobs being processed", jobs["running"])
+    return Response(out.render(), media_type=PrometheusText.CONTENT_TYPE)
+
+
+@app.get("/api/profiles/{profile_id}")
+async def get_profile(profile_id: str, format: str = "json"):
+    """A stored request profile: its summary (json), flame graph (svg) or
+    folded stacks (folded)."""
+    if not PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    path = profile_store.path(profile_id, format)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type=ProfileStore.FORMATS[format])
+
+
 @app.get("/api/system-prompt")
 async def get_system_prompt():
     if not service:
@@ -71,21 +437,50 @@ async def get_system_prompt():
 
 
 @app.post("/api/transcribe")
-async def transcribe_audio(audio: Annotated[UploadFile, File()]):
+async def transcribe_audio(
+    audio: Annotated[UploadFile, File()],
+    long_audio: bool = False,
+    model: str | None = None,
+    compute_type: str | None = None,
+    profile: str | None = None,
+):
     if not service:
         raise HTTPException(
             status_code=503, detail="Service not ready, still initializing models"
         )
+    try:
+        spec = service.resolve_model(model, compute_type)
+        service.validate_profile(profile)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
 
-    suffix = os.path.splitext(audio.filename)[1] or ".webm"
-    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-        content = await audio.read()
-        tmp.write(content)
-        tmp_path = tmp.name
+    decoded = await _ingest(audio)
 
     try:
-        raw_text = service.transcribe(tmp_path)
-        return {"success": True, "text": raw_text}
+        if long_audio:
+            transcript = await service.transcribe_long_async(
+                decoded, model, compute_type, profile
+            )
+            return {
+                "success": True,
+                **transcript,
+                "model": spec.name,
+                "compute_type": spec.compute_type,
+                "upload": decoded.upload_stats(),
+            }
+
+        transcript = await service.transcribe_detailed_async(
+            decoded, model, compute_type, profile
+        )
+        return {
+            "success": True,
+            "text": transcript["text"],
+            "transcript_cache": transcript["transcript_cache"],
+            "model": spec.name,
+            "compute_type": spec.compute_type,
+            "profile": transcript["profile"],
+            "upload": decoded.upload_stats(),
+        }
 
     except Exception as e:
         print(f"❌ Transcription error: {e}")
@@ -93,10 +488,55 @@ async def transcribe_audio(audio: Annotated[UploadFile, File()]):
             status_code=500, detail=f"Transcription failed: {str(e)}"
         ) from e
 
-    finally:
-        # Always clean up temp file
-        if os.path.exists(tmp_path):
-            os.unlink(tmp_path)
+
+@app.post("/api/transcribe/batch")
+async def transcribe_batch(
+    files: Annotated[list[UploadFile], File()],
+    batch_size: int | None = None,
+    use_llm: bool = False,
+):
+    """Transcribe many files in one batched Whisper pass."""
+    if not service:
+        raise HTTPException(
+            status_code=503, detail="Service not ready, still initializing models"
+        )
+
+    decoded = [await _ingest(audio) for audio in files]
+
+    try:
+        t0 = time.perf_counter()
+        results = await service.transcribe_batch_async(decoded, batch_size)
+        transcription_time = time.perf_counter() - t0
+
+        t1 = time.perf_counter()
+        if use_llm:
+            cleaned = await asyncio.gather(
+                *(service.clean_with_llm_async(r["text"]) for r in results)
+            )
+            for result, cleaned_text in zip(results, cleaned, strict=True):
+                result["cleaned_text"] = cleaned_text
+        llm_time = time.perf_counter() - t1 if use_llm else 0
+
+        # Throughput only counts audio that was actually decoded (not cache hits)
+        audio_seconds = sum(r["audio_duration"] or 0 for r in results)
+        return {
+            "success": True,
+            "results": [
+                {"filename": audio.filename, **result, "upload": d.upload_stats()}
+                for audio, d, result in zip(files, decoded, results, strict=True)
+            ],
+            "batch_size": batch_size or service.whisper_batch_size,
+            "audio_seconds": audio_seconds,
+            "transcription_time": transcription_time,
+            "llm_time": llm_time,
+            "throughput": audio_seconds / transcription_time if audio_seconds else 0,
+        }
+
+    except Exception as e:
+        print(f"❌ Batch transcription error: {e}")
+        raise HTTPException(
+            status_code=500, detail=f"Batch transcription failed: {str(e)}"
+        ) from e
 
 
 @app.post("/api/clean")
@@ -105,7 +545,7 @@ async def clean_text(request: CleanRequest):
         raise HTTPException(status_code=503, detail="Service not ready")
 
     try:
-        cleaned_text = service.clean_with_llm(
+        cleaned_text = await service.clean_with_llm_async(
             request.text, system_prompt=request.system_prompt
         )
         return {"success": True, "text": cleaned_text}
@@ -114,19 +554,272 @@ async def clean_text(request: CleanRequest):
         print(f"❌ LLM cleaning error: {e}")
         raise HTTPException(status_code=500, detail=f"Cleaning failed: {str(e)}") from e
 
+
+@app.post("/api/clean/stream")
+async def clean_text_stream(request: CleanRequest):
+    """Server-Sent Events: `token` events as the LLM generates, then a `done`
+    event with the final cleaned text, llm_time, time_to_first_token and
+    tokens_per_second."""
+    if not service:
+        raise HTTPException(status_code=503, detail="Service not ready")
+
+    async def events():
+        stats = {}
+        try:
+            async for delta in service.stream_clean_with_llm(
+                request.text, system_prompt=request.system_prompt, stats=stats
+            ):
+                yield _sse("token", {"text": delta})
+            yield _sse("done", {"success": True, **stats})
+
+        except Exception as e:
+            print(f"❌ LLM streaming error: {e}")
+            http_metrics.errors.inc("/api/clean/stream")
+            yield _sse("error", {"success": False, "error": str(e)})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.post("/api/full")
-async def full_pipeline(audio: UploadFile):
+async def full_pipeline(
+    audio: UploadFile,
+    pipeline: bool = False,
+    long_audio: bool = False,
+    model: str | None = None,
+    compute_type: str | None = None,
+    profile: str | None = None,
+):
+    if not service:
+        raise HTTPException(
+            status_code=503, detail="Service not ready, still initializing models"
+        )
+    # Bad requests get the same 400 / 415 as /api/transcribe, not a 200
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp:
-            tmp.write(await audio.read())
-            tmp_path = tmp.name
+        service.resolve_model(model, compute_type)
+        service.validate_profile(profile)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
 
-        result = service.transcribe_file(tmp_path)
+    decoded = await _ingest(audio)
+
+    try:
+        result = await service.transcribe_file_async(
+            decoded,
+            pipeline=pipeline,
+            long_audio=long_audio,
+            model=model,
+            compute_type=compute_type,
+            profile=profile,
+        )
 
         return {
             "success": True,
-            **result
+            **result,
+            "upload": decoded.upload_stats(),
         }
 
     except Exception as e:
-        return {"success": False, "error": str(e)}
\ No newline at end of file
+        http_metrics.errors.inc("/api/full")
+        return {"success": False, "error": str(e)}
+
+
+@app.post("/api/jobs", status_code=202)
+async def submit_job(
+    audio: Annotated[UploadFile, File()],
+    use_llm: bool = True,
+    pipeline: bool = False,
+    long_audio: bool = False,
+    profile: str | None = None,
+):
+    if not job_queue:
+        raise HTTPException(status_code=503, detail="Service not ready")
+    try:
+        service.validate_profile(profile)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+    decoded = await _ingest(audio)
+
+    # A full queue got its 429 from JobAdmission before the upload was read;
+    # this catches the queue filling up while it was decoded
+    try:
+        job = job_queue.submit(
+            decoded,
+            use_llm=use_llm,
+            pipeline=pipeline,
+            long_audio=long_audio,
+            profile=profile,
+        )
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        ) from e
+
+    return {"success": True, **job.to_dict()}
+
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    if not job_queue:
+        raise HTTPException(status_code=503, detail="Service not ready")
+
+    job = job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return {"success": True, **job.to_dict()}
+
+
+@app.post("/api/full/stream")
+async def full_pipeline_stream(
+    audio: Annotated[UploadFile, File()],
+    use_llm: bool = True,
+    profile: str | None = None,
+):
+    """Server-Sent Events: one `segment` event per decoded Whisper segment,
+    `token` events as the LLM cleans, then a `done` event with the cleaned
+    text and timings."""
+    if not service:
+        raise HTTPException(status_code=503, detail="Service not ready")
+    try:
+        service.validate_profile(profile)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+    decoded = await _ingest(audio)
+
+    async def events():
+        total_start = time.perf_counter()
+        first_segment_time = None
+        texts = []
+        stream_stats = {}
+
+        try:
+            # Step 1: Whisper, forwarded segment by segment
+            async for segment in service.stream_segments(
+                decoded, stream_stats, profile=profile
+            ):
+                if first_segment_time is None:
+                    first_segment_time = time.perf_counter() - total_start
+                texts.append(segment.text)
+                yield _sse(
+                    "segment",
+                    {"text": segment.text, "start": segment.start, "end": segment.end},
+                )
+            transcription_time = time.perf_counter() - total_start
+
+            raw_text = " ".join(texts).strip()
+            print(f"📝 Raw: {raw_text}")
+
+            # Step 2: LLM, forwarded token by token
+            llm_stats = {"cleaned_text": raw_text, "llm_time": 0}
+            if use_llm and raw_text:
+                async for delta in service.stream_clean_with_llm(
+                    raw_text, stats=llm_stats
+                ):
+                    yield _sse("token", {"text": delta})
+
+            yield _sse(
+                "done",
+                {
+                    "success": True,
+                    "raw_text": raw_text,
+                    "time_to_first_segment": first_segment_time,
+                    "transcription_time": transcription_time,
+                    **llm_stats,
+                    "total_time": time.perf_counter() - total_start,
+                    "transcript_cache": stream_stats["transcript_cache"],
+                    "profile": stream_stats["profile"],
+                    "upload": decoded.upload_stats(),
+                },
+            )
+
+        except Exception as e:
+            print(f"❌ Streaming error: {e}")
+            http_metrics.errors.inc("/api/full/stream")
+            yield _sse("error", {"success": False, "error": str(e)})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.websocket("/ws/transcribe")
+async def live_transcribe(
+    websocket: WebSocket, use_llm: bool = False, profile: str | None = None
+):
+    """Live microphone transcription. The client sends binary frames of
+    s16le 16 kHz mono PCM as they are captured, then `{"type": "end"}`; the
+    server sends `partial` (unstable tail), `final` (committed words),
+    `cleaned` (per sentence, with use_llm) and finally `done`."""
+    global live_sessions
+    await websocket.accept()
+    if not service:
+        await websocket.close(code=1013, reason="Service not ready")
+        return
+    try:
+        service.validate_profile(profile)
+    except ValueError as e:
+        await websocket.close(code=1008, reason=str(e))
+        return
+
+    session = LiveSession(
+        service,
+        websocket.send_json,
+        profile=service.resolve_profile(profile),
+        use_llm=use_llm,
+        min_chunk_seconds=LIVE_MIN_CHUNK_SECONDS,
+        trim_seconds=LIVE_TRIM_SECONDS,
+    )
+    print("🎙️  Live transcription started")
+    live_sessions += 1
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            if message.get("bytes"):
+                session.feed(message["bytes"])
+            elif message.get("text"):
+                try:
+                    control = json.loads(message["text"])
+                except json.JSONDecodeError:
+                    control = None
+                if not isinstance(control, dict):
+                    print("⚠️  Ignoring a live frame that is not a JSON object")
+                elif control.get("type") == "end":
+                    break
+            if session.error is not None:
+                break
+
+        if session.error is not None:
+            # The session has already sent the client an error event
+            http_metrics.errors.inc("/ws/transcribe")
+            await websocket.close(code=1011)
+            return
+
+        done = await session.finish()
+        print(f"📝 Live: {done['text']}")
+        await websocket.close()
+
+    except WebSocketDisconnect:
+        print("⚠️  Live client disconnected")
+        session.close()
+
+    except Exception as e:
+        print(f"❌ Live transcription error: {e}")
+        http_metrics.errors.inc("/ws/transcribe")
+        session.close()
+        await websocket.send_json({"type": "error", "error": str(e)})
+        await websocket.close(code=1011)
+
+    finally:
+        live_sessions -= 1
@@ -0,0 +1,196 @@
+"""
+Cross-file batched decoding with faster-whisper's BatchedInferencePipeline.
+Several audios are laid end to end (with a silence gap) and each file's
+speech regions are passed as clip_timestamps, so every window in a batch
+belongs to exactly one file and segments can be routed back by time.
+
+MicroBatcher builds such batches out of concurrent single-file requests.
+speech_chunks cuts one long recording at its silences for parallel decoding.
+"""
+
+import asyncio
+import bisect
+import contextvars
+import time
+
+import numpy as np
+from faster_whisper import BatchedInferencePipeline
+from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+from metrics import Histogram
+
+SAMPLE_RATE = 16000
+# Whisper sees at most 30 s of audio per window
+MAX_CLIP_SECONDS = 30
+# Silence between files so no segment can straddle two of them
+FILE_GAP_SECONDS = 1.0
+
+VAD_OPTIONS = VadOptions(
+    max_speech_duration_s=MAX_CLIP_SECONDS, min_silence_duration_ms=160
+)
+# Long-audio mode: pauses up to this long stay inside a chunk, longer ones
+# are cut out and never decoded
+MAX_CHUNK_GAP_SECONDS = 2.0
+
+
+def speech_clips(audio: np.ndarray, offset: float = 0.0) -> list[dict]:
+    """VAD speech regions merged into clips of at most 30 s, in seconds,
+    shifted by offset."""
+    clips = []
+    for ts in get_speech_timestamps(audio, VAD_OPTIONS):
+        start = ts["start"] / SAMPLE_RATE
+        end = ts["end"] / SAMPLE_RATE
+        if clips and end - clips[-1]["start"] <= MAX_CLIP_SECONDS:
+            clips[-1]["end"] = end
+        else:
+            clips.append({"start": start, "end": end})
+    return [{"start": c["start"] + offset, "end": c["end"] + offset} for c in clips]
+
+
+def speech_chunks(audio: np.ndarray, max_chunk_seconds: float) -> list[tuple]:
+    """(start, end) sample ranges covering the speech in audio. Neighbouring
+    speech regions are merged while the pause between them is short and the
+    chunk stays under max_chunk_seconds; everything between chunks is silence."""
+    max_gap = int(MAX_CHUNK_GAP_SECONDS * SAMPLE_RATE)
+    max_length = int(max_chunk_seconds * SAMPLE_RATE)
+    chunks = []
+    for ts in get_speech_timestamps(audio, VAD_OPTIONS):
+        if (
+            chunks
+            and ts["start"] - chunks[-1][1] <= max_gap
+            and ts["end"] - chunks[-1][0] <= max_length
+        ):
+            chunks[-1] = (chunks[-1][0], ts["end"])
+        else:
+            chunks.append((ts["start"], ts["end"]))
+    return chunks
+
+
+def transcribe_batched(
+    pipeline: BatchedInferencePipeline,
+    audios: list[np.ndarray],
+    batch_size: int,
+    **options,
+) -> list[list[dict]]:
+    """Decode several 16 kHz audios in shared batches. Returns one list of
+    {"text", "start", "end"} segments per audio, with file-local timestamps."""
+    gap = np.zeros(int(FILE_GAP_SECONDS * SAMPLE_RATE), dtype=np.float32)
+    parts = []
+    offsets = []
+    clips = []
+    position = 0.0
+
+    for audio in audios:
+        offsets.append(position)
+        clips.extend(speech_clips(audio, offset=position))
+        parts.extend([audio, gap])
+        position += (len(audio) + len(gap)) / SAMPLE_RATE
+
+    results = [[] for _ in audios]
+    if not clips:
+        return results
+
+    segments, _ = pipeline.transcribe(
+        np.concatenate(parts), clip_timestamps=clips, batch_size=batch_size, **options
+    )
+
+    for segment in segments:
+        # The segment midpoint always falls inside the clip it was decoded from
+        midpoint = (segment.start + segment.end) / 2
+        index = bisect.bisect_right(offsets, midpoint) - 1
+        results[index].append(
+            {
+                "text": segment.text,
+                "start": round(segment.start - offsets[index], 3),
+                "end": round(segment.end - offsets[index], 3),
+            }
+        )
+    return results
+
+
+class MicroBatcher:
+    """Coalesces requests that arrive within window_ms (or until max_batch
+    are waiting) into one call of decode_batch on the given executor, then
+    fans the results back out to each waiting caller."""
+
+    def __init__(
+        self, decode_batch, executor, window_ms: float = 30, max_batch: int = 8
+    ):
+        self.decode_batch = decode_batch
+        self.executor = executor
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.batches = 0
+        # Queue wait covers the coalescing window plus time waiting for a
+        # free Whisper worker; tune window_ms against its p95
+        self.queue_wait = Histogram(
+            (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+        )
+        self.batch_size = Histogram(tuple(range(1, max_batch + 1)))
+        self._pending: list[tuple[object, asyncio.Future, float]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def submit(self, item):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future, time.perf_counter()))
+
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch = self._pending[: self.max_batch]
+        self._pending = self._pending[self.max_batch :]
+        if self._pending:
+            # Leftovers start their own window right away
+            self._timer = asyncio.get_running_loop().call_soon(self._flush)
+        if batch:
+            # A batch serves several requests, so it runs outside their traces
+            task = asyncio.create_task(self._run(batch), context=contextvars.Context())
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch):
+        items = [item for item, _, _ in batch]
+
+        def decode():
+            # Measured once a worker picks the batch up, not when it is formed
+            started = time.perf_counter()
+            for _, _, enqueued in batch:
+                self.queue_wait.observe(started - enqueued)
+            return self.decode_batch(items)
+
+        self.batch_size.observe(len(batch))
+        self.batches += 1
+
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(self.executor, decode)
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future, _), result in zip(batch, results, strict=True):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            "window_ms": self.window * 1000,
+            "max_batch": self.max_batch,
+            "pending": len(self._pending),
+            "batches": self.batches,
+            "queue_wait": self.queue_wait.snapshot(),
+            "batch_size": self.batch_size.snapshot(),
+        }
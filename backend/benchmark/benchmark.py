@@ -4,11 +4,18 @@ import statistics
 import csv
 from pathlib import Path
 import wave
+import argparse
+import contextlib
+import os
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # CONFIG
 # ═══════════════════════════════════════════════════════════════════════════════
 BACKEND_URL = "http://localhost:8000/api/full"
+STATUS_URL = "http://localhost:8000/api/status"
 AUDIO_DIR = Path("benchmark/audio")
 # SETUP INFO
 # LLM_MODEL="gemma:2b"
@@ -27,23 +34,47 @@ AUDIO_FILES = [
     "sample_c.wav",
 ]
 
-N_RUNS = 4
+N_RUNS = 6
 WARMUP_RUNS = 1
 
 OUTPUT_CSV = f"benchmark/results_{LLM_MODEL}_{WHISPER_MODEL}.csv"
+# Every measured run (warmup excluded), for benchmark/compare.py
+RUNS_CSV = f"benchmark/runs_{LLM_MODEL}_{WHISPER_MODEL}.csv"
+
+# LOAD TEST (--load): closed loop keeps N requests in flight, open loop sends
+# requests at a fixed average rate (Poisson arrivals) however slow replies are
+LOAD_CONCURRENCY = [1, 2, 4, 8, 16]
+LOAD_RATES = [0.25, 0.5, 1, 2, 4]  # requests per second
+LOAD_STEP_SECONDS = 60
+LOAD_TIMEOUT = 120
+LOAD_MAX_IN_FLIGHT = 64  # open loop: requests beyond this count as errors
+LOAD_OUTPUT_CSV = f"benchmark/load_{LLM_MODEL}_{WHISPER_MODEL}.csv"
+
+# --mock-llm PROFILE: serve the LLM from benchmark/mock_llm.py on this port
+MOCK_LLM_PORT = 8001
 # ═══════════════════════════════════════════════════════════════════════════════
 # SINGLE RUN
 # ═══════════════════════════════════════════════════════════════════════════════
 
+def llm_fallbacks():
+    # Cleanings that fell back to the raw text so far (None if unknown)
+    try:
+        llm = requests.get(STATUS_URL, timeout=5).json().get("llm") or {}
+    except (requests.RequestException, ValueError):
+        return None
+    return sum(llm.get("fallbacks", {}).values())
+
+
 def run_single(audio_path):
+    fallbacks_before = llm_fallbacks()
     with open(audio_path, "rb") as f:
         files = {
             "audio": (audio_path.name, f, "audio/wav")
         }
 
-        start = time.time()
+        start = time.perf_counter()
         res = requests.post(BACKEND_URL, files=files)
-        end = time.time()
+        end = time.perf_counter()
 
     if res.status_code != 200:
         raise RuntimeError(f"Request failed: {res.text}")
@@ -53,11 +84,21 @@ def run_single(audio_path):
     if not data.get("success", False):
         raise RuntimeError(f"Backend error: {data.get('error')}")
 
+    fallbacks_after = llm_fallbacks()
     return {
+        # Decode profile the server picked (runs are only comparable within one)
+        "profile": data.get("profile") or "",
         "transcription_time": data["transcription_time"],
         "llm_time": data["llm_time"],
         "total_time": data["total_time"],
         "wall_time": end - start,
+        # A near-zero llm_time with a fallback means the LLM failed, not that
+        # it was fast
+        "llm_fallback": (
+            fallbacks_after - fallbacks_before
+            if None not in (fallbacks_before, fallbacks_after)
+            else None
+        ),
     }
 
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -75,6 +116,7 @@ def get_audio_duration(path):
 
 def benchmark():
     results = []
+    raw_runs = []
 
     print(f"\n⚙️ Setup: {SETUP['setup_name']}")
     print(f"🎧 Audio duration: {get_audio_duration(AUDIO_DIR / AUDIO_FILES[0])} seconds")
@@ -98,6 +140,10 @@ def benchmark():
                     f"LLM: {metrics['llm_time']:.2f}s | "
                     f"Total: {metrics['total_time']:.2f}s"
                 )
+                if metrics["llm_fallback"]:
+                    print(
+                        "    ⚠️ LLM failed, raw text returned (llm_time is not LLM latency)"
+                    )
 
             except Exception as e:
                 print(f"    ❌ Error: {e}")
@@ -109,6 +155,11 @@ def benchmark():
             print("    ⚠️ No valid runs")
             continue
 
+        raw_runs.extend(
+            {**SETUP, "audio_file": audio_file, "run": i, **metrics}
+            for i, metrics in enumerate(valid_runs, start=1)
+        )
+
         # Aggregation helper
         def agg(key):
             values = [r[key] for r in valid_runs]
@@ -125,7 +176,10 @@ def benchmark():
         summary = {
             **SETUP,
             "audio_file": audio_file,
+            # More than one if an adaptive server switched profiles mid-run
+            "profile": "+".join(sorted({r["profile"] for r in valid_runs})),
             "n_runs": len(valid_runs),
+            "llm_fallbacks": sum(r["llm_fallback"] or 0 for r in valid_runs),
 
             "transcription_time_mean": t_mean,
             "transcription_time_std": t_std,
@@ -147,14 +201,14 @@ def benchmark():
         print(f"    LLM:   {l_mean:.2f}s ± {l_std:.2f}")
         print(f"    Total: {tot_mean:.2f}s ± {tot_std:.2f}")
 
-    return results
+    return results, raw_runs
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # SAVE RESULTS
 # ═══════════════════════════════════════════════════════════════════════════════
 
-def save_csv(results):
-    OUTPUT_CSV_PATH = Path(OUTPUT_CSV)
+def save_csv(results, output_csv=OUTPUT_CSV):
+    OUTPUT_CSV_PATH = Path(output_csv)
     OUTPUT_CSV_PATH.parent.mkdir(parents=True, exist_ok=True)
 
     keys = results[0].keys()
@@ -167,14 +221,239 @@ def save_csv(results):
     print(f"\n📁 Results saved to: {OUTPUT_CSV_PATH}")
 
 
+# ═══════════════════════════════════════════════════════════════════════════════
+# LOAD TEST
+# ═══════════════════════════════════════════════════════════════════════════════
+
+_sessions = threading.local()
+
+
+def load_request(name, audio, audio_seconds):
+    """One timed request. Returns (outcome, latency, audio_seconds) where
+    outcome is ok, error or timeout."""
+    if not hasattr(_sessions, "session"):
+        _sessions.session = requests.Session()
+
+    start = time.perf_counter()
+    try:
+        res = _sessions.session.post(
+            BACKEND_URL,
+            files={"audio": (name, audio, "audio/wav")},
+            timeout=LOAD_TIMEOUT,
+        )
+        ok = res.status_code == 200 and res.json().get("success", False)
+        outcome = "ok" if ok else "error"
+    except requests.Timeout:
+        outcome = "timeout"
+    except Exception:
+        outcome = "error"
+    return outcome, time.perf_counter() - start, audio_seconds
+
+
+def closed_loop(corpus, concurrency, seconds):
+    """`concurrency` clients, each sending its next request as soon as the
+    previous one returns."""
+    deadline = time.perf_counter() + seconds
+
+    def client(index):
+        samples = []
+        i = index
+        while time.perf_counter() < deadline:
+            samples.append(load_request(*corpus[i % len(corpus)]))
+            i += 1
+        return samples
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        clients = list(pool.map(client, range(concurrency)))
+    return [sample for samples in clients for sample in samples]
+
+
+def open_loop(corpus, rate, seconds, seed=0):
+    """Poisson arrivals at `rate` requests/s. Latency is measured from the
+    scheduled arrival, so a backed-up server can't hide its queueing delay."""
+    rng = random.Random(seed)
+    in_flight = threading.BoundedSemaphore(LOAD_MAX_IN_FLIGHT)
+    samples = []
+
+    def send(arrival, item):
+        outcome, _, audio_seconds = load_request(*item)
+        in_flight.release()
+        samples.append((outcome, time.perf_counter() - arrival, audio_seconds))
+
+    start = time.perf_counter()
+    arrival = start
+    i = 0
+    with ThreadPoolExecutor(LOAD_MAX_IN_FLIGHT) as pool:
+        while (arrival := arrival + rng.expovariate(rate)) < start + seconds:
+            time.sleep(max(0.0, arrival - time.perf_counter()))
+            if not in_flight.acquire(blocking=False):
+                samples.append(("error", 0.0, 0.0))
+                continue
+            pool.submit(send, arrival, corpus[i % len(corpus)])
+            i += 1
+    return samples
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1]
+
+
+def summarize_load(samples, elapsed):
+    latencies = [latency for outcome, latency, _ in samples if outcome == "ok"]
+    audio_seconds = sum(seconds for outcome, _, seconds in samples if outcome == "ok")
+    n = len(samples)
+    return {
+        "requests": n,
+        "ok": len(latencies),
+        "error_rate": sum(s[0] == "error" for s in samples) / n if n else 0,
+        "timeout_rate": sum(s[0] == "timeout" for s in samples) / n if n else 0,
+        "latency_p50": percentile(latencies, 50),
+        "latency_p90": percentile(latencies, 90),
+        "latency_p99": percentile(latencies, 99),
+        "latency_mean": statistics.mean(latencies) if latencies else None,
+        "requests_per_second": len(latencies) / elapsed,
+        "audio_seconds_per_second": audio_seconds / elapsed,
+    }
+
+
+def find_knee(results, gain=0.1):
+    """First step whose throughput is less than `gain` above the previous
+    one's: past it, more load only adds latency."""
+    for previous, step in zip(results, results[1:], strict=False):
+        if step["requests_per_second"] < previous["requests_per_second"] * (1 + gain):
+            return previous
+    return None
+
+
+def load_test(loop):
+    corpus = []
+    for audio_file in AUDIO_FILES:
+        path = AUDIO_DIR / audio_file
+        corpus.append((audio_file, path.read_bytes(), get_audio_duration(path)))
+
+    print(f"\n⚙️ Setup: {SETUP['setup_name']} ({loop} loop)")
+    # One request first so model loading and warm-up aren't measured
+    load_request(*corpus[0])
+
+    steps = LOAD_CONCURRENCY if loop == "closed" else LOAD_RATES
+    results = []
+    for step in steps:
+        label = f"{step} clients" if loop == "closed" else f"{step} req/s"
+        print(f"\n🚦 {label} for {LOAD_STEP_SECONDS}s...")
+        start = time.perf_counter()
+        if loop == "closed":
+            samples = closed_loop(corpus, step, LOAD_STEP_SECONDS)
+        else:
+            samples = open_loop(corpus, step, LOAD_STEP_SECONDS)
+        summary = summarize_load(samples, time.perf_counter() - start)
+        results.append(
+            {
+                **SETUP,
+                "loop": loop,
+                "concurrency": step if loop == "closed" else None,
+                "arrival_rate": step if loop == "open" else None,
+                **summary,
+            }
+        )
+
+        p50, p99 = summary["latency_p50"], summary["latency_p99"]
+        print(
+            f"    {summary['requests_per_second']:.2f} req/s | "
+            f"{summary['audio_seconds_per_second']:.1f} audio s/s | "
+            f"p50 {p50 or 0:.2f}s p99 {p99 or 0:.2f}s | "
+            f"errors {summary['error_rate']:.0%} timeouts {summary['timeout_rate']:.0%}"
+        )
+
+    knee = find_knee(results)
+    if knee:
+        step = knee["concurrency"] or knee["arrival_rate"]
+        print(
+            f"\n📈 Throughput levels off after {step}: "
+            f"{knee['requests_per_second']:.2f} req/s, p99 {knee['latency_p99'] or 0:.2f}s"
+        )
+    return results
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# MOCK LLM
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+def check_mock_llm(mock_url):
+    # The backend is a separate process: it has to be started against the mock
+    try:
+        status = requests.get(STATUS_URL, timeout=5).json()
+    except (requests.RequestException, ValueError):
+        return
+    if status.get("llm_base_url") != mock_url:
+        print(
+            f"⚠️ Backend uses LLM_BASE_URL={status.get('llm_base_url')}; restart it "
+            f"with LLM_BASE_URL={mock_url} to benchmark against the mock"
+        )
+
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # MAIN
 # ═══════════════════════════════════════════════════════════════════════════════
 
-if __name__ == "__main__":
-    results = benchmark()
 
-    if results:
-        save_csv(results)
-    else:
-        print("❌ No results to save")
\ No newline at end of file
+def run_mode(args):
+    if args.matrix:
+        from matrix import MATRIX_OUTPUT, run_matrix, save_matrix
+
+        return run_matrix(), save_matrix, MATRIX_OUTPUT
+    if args.load:
+        return load_test(args.loop), save_csv, LOAD_OUTPUT_CSV
+
+    results, raw_runs = benchmark()
+    if raw_runs:
+        save_csv(raw_runs, RUNS_CSV)
+    return results, save_csv, OUTPUT_CSV
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the transcription backend")
+    parser.add_argument(
+        "--load",
+        action="store_true",
+        help="concurrent load test instead of sequential latency runs",
+    )
+    parser.add_argument(
+        "--loop",
+        choices=["closed", "open"],
+        default="closed",
+        help="load test: fixed concurrency (closed) or arrival rate (open)",
+    )
+    parser.add_argument(
+        "--matrix",
+        action="store_true",
+        help="in-process sweep over the MATRIX grid in matrix.py (no HTTP)",
+    )
+    parser.add_argument(
+        "--mock-llm",
+        metavar="PROFILE",
+        help="serve the LLM from mock_llm.py with this latency profile",
+    )
+    args = parser.parse_args()
+
+    with contextlib.ExitStack() as stack:
+        if args.mock_llm:
+            from mock_llm import running
+
+            mock_url = stack.enter_context(running(args.mock_llm, MOCK_LLM_PORT))
+            # Matrix setups build their service from the environment
+            os.environ["LLM_BASE_URL"] = mock_url
+            if not args.matrix:
+                check_mock_llm(mock_url)
+        results, save, output = run_mode(args)
+
+        # Saved before the mock LLM is stopped, so a stuck shutdown cannot
+        # lose them
+        if results:
+            save(results, output)
+        else:
+            print("❌ No results to save")
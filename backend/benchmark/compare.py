@@ -0,0 +1,241 @@
+"""
+Regression gate: compares a baseline and a candidate raw runs file (the
+runs_*.csv benchmark.py writes next to its summary) per audio file and stage.
+Each delta is the candidate's mean over the baseline's, with a bootstrap
+confidence interval and a one-sided Mann-Whitney p-value. Exits with 1 if a
+stage got significantly slower by more than the threshold. Runs decoded with
+different profiles are not compared.
+
+Run from the backend directory:
+    uv run python benchmark/compare.py BASELINE_RUNS.csv CANDIDATE_RUNS.csv
+"""
+
+import argparse
+import csv
+import functools
+import math
+import random
+import statistics
+import sys
+from collections import defaultdict
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# CONFIG
+# ═══════════════════════════════════════════════════════════════════════════════
+STAGES = ["transcription_time", "llm_time", "total_time", "wall_time"]
+THRESHOLD = 0.10  # fail on slowdowns above 10% ...
+ALPHA = 0.05  # ... that are significant at this level
+BOOTSTRAP_RESAMPLES = 10_000
+SEED = 0
+# Above this many sample pairs the Mann-Whitney p-value uses the normal
+# approximation instead of the exact distribution
+EXACT_MAX_PAIRS = 400
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# LOAD
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+def load_runs(path, stages):
+    """{(audio_file, stage): [seconds, ...]} from a raw runs file, and the
+    decode profiles of each audio file's runs ("" in files from before
+    benchmark.py recorded them)."""
+    with open(path, newline="") as f:
+        rows = list(csv.DictReader(f))
+    if not rows or "run" not in rows[0]:
+        raise SystemExit(
+            f"❌ {path} has no raw runs (summary files only keep mean/std); "
+            "use the runs_*.csv benchmark.py writes"
+        )
+    samples = defaultdict(list)
+    profiles = defaultdict(set)
+    for row in rows:
+        profiles[row["audio_file"]].add(row.get("profile") or "")
+        for stage in stages:
+            if row.get(stage) not in (None, ""):
+                samples[row["audio_file"], stage].append(float(row[stage]))
+    return samples, profiles
+
+
+def profile_mismatches(baseline, candidate):
+    """Audio files whose baseline and candidate runs used different decode
+    profiles, as (audio_file, baseline profiles, candidate profiles)."""
+    return [
+        (audio_file, baseline[audio_file], candidate[audio_file])
+        for audio_file in sorted(baseline.keys() & candidate.keys())
+        if baseline[audio_file] != candidate[audio_file]
+    ]
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# STATISTICS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+def relative_delta(baseline, candidate):
+    base = statistics.mean(baseline)
+    return statistics.mean(candidate) / base - 1 if base else 0.0
+
+
+def bootstrap_ci(baseline, candidate, confidence, resamples, rng):
+    """Percentile bootstrap interval of the relative delta, resampling each
+    side independently."""
+    deltas = sorted(
+        relative_delta(
+            rng.choices(baseline, k=len(baseline)),
+            rng.choices(candidate, k=len(candidate)),
+        )
+        for _ in range(resamples)
+    )
+    tail = (1 - confidence) / 2
+    low = deltas[int(tail * (resamples - 1))]
+    high = deltas[math.ceil((1 - tail) * (resamples - 1))]
+    return low, high
+
+
+@functools.cache
+def _u_counts(n, m):
+    """How many orderings of n candidate and m baseline samples give each U
+    (the number of pairs where the candidate is larger), ties aside."""
+    if n == 0 or m == 0:
+        return (1,) + (0,) * (n * m)
+    # The largest sample is either a candidate (beating all m) or a baseline
+    with_candidate = (0,) * m + _u_counts(n - 1, m)
+    with_baseline = _u_counts(n, m - 1) + (0,) * n
+    return tuple(a + b for a, b in zip(with_candidate, with_baseline, strict=True))
+
+
+def mann_whitney_p(baseline, candidate):
+    """One-sided p-value that candidate samples tend to be larger."""
+    n, m = len(candidate), len(baseline)
+    u = sum(
+        1.0 if c > b else 0.5 if c == b else 0.0 for c in candidate for b in baseline
+    )
+    if n * m <= EXACT_MAX_PAIRS:
+        counts = _u_counts(n, m)
+        return sum(counts[math.ceil(u) :]) / sum(counts)
+    mean = n * m / 2
+    sd = math.sqrt(n * m * (n + m + 1) / 12)
+    z = (u - 0.5 - mean) / sd
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def compare(baseline, candidate, stages, threshold, alpha, resamples, seed):
+    rng = random.Random(seed)
+    rows = []
+    for audio_file, stage in sorted(baseline.keys() & candidate.keys()):
+        if stage not in stages:
+            continue
+        base, cand = baseline[audio_file, stage], candidate[audio_file, stage]
+        delta = relative_delta(base, cand)
+        low, high = bootstrap_ci(base, cand, 1 - alpha, resamples, rng)
+        p_slower = mann_whitney_p(base, cand)
+        p_faster = mann_whitney_p(cand, base)
+        # Significant only if both tests agree
+        if delta > threshold and low > 0 and p_slower < alpha:
+            verdict = "regression"
+        elif delta < -threshold and high < 0 and p_faster < alpha:
+            verdict = "improvement"
+        else:
+            verdict = "no change"
+        rows.append(
+            {
+                "audio_file": audio_file,
+                "stage": stage,
+                "baseline_n": len(base),
+                "candidate_n": len(cand),
+                "baseline_mean": statistics.mean(base),
+                "candidate_mean": statistics.mean(cand),
+                "delta": delta,
+                "ci_low": low,
+                "ci_high": high,
+                "p_value": p_slower if delta >= 0 else p_faster,
+                "verdict": verdict,
+            }
+        )
+    return rows
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# MAIN
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--stages", nargs="+", default=STAGES, choices=STAGES)
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=THRESHOLD,
+        help="relative slowdown that fails the gate (0.1 = 10%%)",
+    )
+    parser.add_argument("--alpha", type=float, default=ALPHA)
+    parser.add_argument("--resamples", type=int, default=BOOTSTRAP_RESAMPLES)
+    parser.add_argument("--output", help="also write the comparison to this CSV")
+    args = parser.parse_args()
+
+    baseline, baseline_profiles = load_runs(args.baseline, args.stages)
+    candidate, candidate_profiles = load_runs(args.candidate, args.stages)
+    mismatches = profile_mismatches(baseline_profiles, candidate_profiles)
+    if mismatches:
+        for audio_file, base, cand in mismatches:
+            print(
+                f"  {audio_file}: {'+'.join(sorted(base)) or 'unknown'} → "
+                f"{'+'.join(sorted(cand)) or 'unknown'}"
+            )
+        raise SystemExit(
+            "❌ Baseline and candidate used different decode profiles; "
+            "rerun one against a server with the other's WHISPER_PROFILE"
+        )
+    rows = compare(
+        baseline,
+        candidate,
+        args.stages,
+        args.threshold,
+        args.alpha,
+        args.resamples,
+        SEED,
+    )
+    if not rows:
+        raise SystemExit("❌ No audio files and stages in common")
+
+    print(f"\n📊 {args.candidate} vs {args.baseline}")
+    icons = {"regression": "🔴", "improvement": "🟢", "no change": "⚪"}
+    for row in rows:
+        print(
+            f"  {icons[row['verdict']]} {row['audio_file']} {row['stage']}: "
+            f"{row['baseline_mean']:.2f}s → {row['candidate_mean']:.2f}s "
+            f"({row['delta']:+.1%}, CI {row['ci_low']:+.1%}..{row['ci_high']:+.1%}, "
+            f"p={row['p_value']:.3f}, n={row['baseline_n']}/{row['candidate_n']})"
+        )
+
+    # With few runs even a clear slowdown cannot reach alpha
+    orderings = min(
+        math.comb(row["baseline_n"] + row["candidate_n"], row["baseline_n"])
+        for row in rows
+    )
+    if 1 / orderings >= args.alpha:
+        print(f"\n⚠️ Too few runs for p < {args.alpha}; raise N_RUNS in benchmark.py")
+
+    if args.output:
+        with open(args.output, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=rows[0].keys())
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"\n📁 Comparison saved to: {args.output}")
+
+    regressions = [row for row in rows if row["verdict"] == "regression"]
+    if regressions:
+        print(
+            f"\n❌ {len(regressions)} significant regressions over {args.threshold:.0%}"
+        )
+        sys.exit(1)
+    print(f"\n✅ No significant regressions over {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""
+In-process benchmark matrix: drives TranscriptionService directly (no HTTP,
+no multipart) over every combination in MATRIX and writes one table with a
+row per setup and audio file. Each setup runs in a fresh process so its
+model load time and peak RSS are its own.
+
+Run from the backend directory: uv run python benchmark/benchmark.py --matrix
+"""
+
+import asyncio
+import csv
+import importlib.util
+import itertools
+import os
+import resource
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = BENCHMARK_DIR.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+
+def _load_runner():
+    # benchmark.py by its path: the name "benchmark" also matches this
+    # directory, and which one an import finds depends on sys.path order
+    name = "benchmark_runner"
+    if name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(
+            name, BENCHMARK_DIR / "benchmark.py"
+        )
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+    return sys.modules[name]
+
+
+_runner = _load_runner()
+AUDIO_DIR = _runner.AUDIO_DIR
+AUDIO_FILES = _runner.AUDIO_FILES
+N_RUNS = _runner.N_RUNS
+WARMUP_RUNS = _runner.WARMUP_RUNS
+percentile = _runner.percentile
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# CONFIG
+# ═══════════════════════════════════════════════════════════════════════════════
+# Every combination is benchmarked. llm_model None skips cleaning (STT only).
+MATRIX = {
+    "whisper_model": ["base.en", "small.en"],
+    "compute_type": ["int8", "float32"],
+    "beam_size": [1, 5],
+    "cpu_threads": [0],  # 0 = CTranslate2 default
+    "llm_model": [None, "phi3:mini"],
+}
+# .csv, or .parquet (needs pandas + pyarrow)
+MATRIX_OUTPUT = "benchmark/matrix_results.csv"
+STAGES = ("transcription_time", "llm_time", "total_time")
+
+
+def setups():
+    keys = list(MATRIX)
+    for values in itertools.product(*MATRIX.values()):
+        yield dict(zip(keys, values, strict=True))
+
+
+def setup_name(setup):
+    name = (
+        f"whisper:{setup['whisper_model']} ({setup['compute_type']}, "
+        f"beam {setup['beam_size']}, {setup['cpu_threads'] or 'auto'} threads)"
+    )
+    return f"{name} + llm:{setup['llm_model']}" if setup["llm_model"] else name
+
+
+def register_profile(setup) -> str:
+    """A benchmark-only decode profile for the setup's beam size. Its name is
+    one no built-in profile uses, and an existing profile is never replaced,
+    so the service's own profiles decode as configured."""
+    from profiles import DECODE_PROFILES
+
+    profile = f"matrix_beam_{setup['beam_size']}"
+    options = {"beam_size": setup["beam_size"]}
+    if DECODE_PROFILES.setdefault(profile, options) != options:
+        raise ValueError(f"Decode profile '{profile}' already exists")
+    return profile
+
+
+def peak_rss_mb():
+    # ru_maxrss is in KB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# ONE SETUP (runs in its own process)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+def run_setup(setup):
+    from dotenv import load_dotenv
+
+    from ingest import decode_upload
+    from transcription import TranscriptionService
+
+    load_dotenv(BACKEND_DIR / ".env")
+    profile = register_profile(setup)
+
+    start = time.perf_counter()
+    service = TranscriptionService(
+        whisper_model=setup["whisper_model"],
+        whisper_compute_type=setup["compute_type"],
+        whisper_cpu_threads=setup["cpu_threads"],
+        llm_base_url=os.getenv("LLM_BASE_URL"),
+        llm_api_key=os.getenv("LLM_API_KEY"),
+        llm_model=setup["llm_model"] or os.getenv("LLM_MODEL"),
+        # Every run must really decode and really call the LLM
+        transcript_cache_size=0,
+        llm_cache_size=0,
+        whisper_profile=profile,
+    )
+    load_time = time.perf_counter() - start
+    return asyncio.run(_run_corpus(service, setup, profile, load_time, decode_upload))
+
+
+async def _run_corpus(service, setup, profile, load_time, decode_upload):
+    start = time.perf_counter()
+    await service.warm_up_whisper()
+    if setup["llm_model"]:
+        await service.warm_up_llm()
+    warmup_time = time.perf_counter() - start
+
+    rows = []
+    for audio_file in AUDIO_FILES:
+        path = AUDIO_DIR / audio_file
+        start = time.perf_counter()
+        with open(path, "rb") as f:
+            audio = decode_upload(f, audio_file)
+        decode_time = time.perf_counter() - start
+
+        fallbacks_before = sum(service.llm_fallbacks.values())
+        runs = []
+        for i in range(N_RUNS):
+            result = await service.transcribe_file_async(
+                audio, use_llm=bool(setup["llm_model"]), profile=profile
+            )
+            if i >= WARMUP_RUNS:
+                runs.append(result)
+
+        row = {
+            **setup,
+            "setup_name": setup_name(setup),
+            "audio_file": audio_file,
+            "audio_duration": audio.duration,
+            "n_runs": len(runs),
+            "load_time": load_time,
+            "warmup_time": warmup_time,
+            "decode_time": decode_time,
+            "llm_fallbacks": sum(service.llm_fallbacks.values()) - fallbacks_before,
+        }
+        for stage in STAGES:
+            values = [run[stage] for run in runs]
+            row[f"{stage}_mean"] = statistics.mean(values) if values else None
+            for q in (50, 90, 99):
+                row[f"{stage}_p{q}"] = percentile(values, q)
+        row["real_time_factor"] = (
+            row["transcription_time_mean"] / audio.duration if runs else None
+        )
+        rows.append(row)
+
+    peak = peak_rss_mb()
+    for row in rows:
+        row["peak_rss_mb"] = peak
+    await service.shutdown()
+    return rows
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# MATRIX LOOP
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+def run_matrix():
+    results = []
+    grid = list(setups())
+    print(f"\n🧮 {len(grid)} setups × {len(AUDIO_FILES)} files × {N_RUNS} runs")
+
+    # A fresh process per setup: load time and peak RSS are not shared
+    with ProcessPoolExecutor(
+        max_workers=1, mp_context=get_context("spawn"), max_tasks_per_child=1
+    ) as pool:
+        for i, setup in enumerate(grid, start=1):
+            print(f"\n⚙️ [{i}/{len(grid)}] {setup_name(setup)}")
+            try:
+                rows = pool.submit(run_setup, setup).result()
+            except Exception as e:
+                print(f"    ❌ Error: {e}")
+                continue
+
+            results.extend(rows)
+            print(
+                f"    load {rows[0]['load_time']:.1f}s | "
+                f"peak RSS {rows[0]['peak_rss_mb']:.0f} MB"
+            )
+            for row in rows:
+                print(
+                    f"    {row['audio_file']}: RTF {row['real_time_factor'] or 0:.3f} | "
+                    f"STT p50 {row['transcription_time_p50'] or 0:.2f}s | "
+                    f"LLM p50 {row['llm_time_p50'] or 0:.2f}s"
+                )
+    return results
+
+
+def save_matrix(results, output=MATRIX_OUTPUT):
+    path = Path(output)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.suffix == ".parquet":
+        import pandas as pd
+
+        pd.DataFrame(results).to_parquet(path, index=False)
+    else:
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=results[0].keys())
+            writer.writeheader()
+            writer.writerows(results)
+    print(f"\n📁 Matrix results saved to: {path}")
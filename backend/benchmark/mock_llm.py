@@ -0,0 +1,265 @@
+"""
+Offline stand-in for the OpenAI-compatible LLM API (/v1/models and
+/v1/chat/completions, streamed or not). The "cleaned" text is the user
+message echoed back, and time to first token, tokens/s, jitter, queueing and
+error/timeout injection come from a latency profile. Benchmarks can then
+measure STT, queueing and pipeline overheads without a GPU, network or Ollama.
+
+Run from the backend directory:
+    uv run python benchmark/mock_llm.py --profile cpu --port 8001
+and start the backend with LLM_BASE_URL=http://localhost:8001/v1, or let
+benchmark.py launch it with --mock-llm PROFILE.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import random
+import re
+import subprocess
+import sys
+import time
+import urllib.request
+from dataclasses import asdict, dataclass, fields, replace
+from pathlib import Path
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# CONFIG
+# ═══════════════════════════════════════════════════════════════════════════════
+MOCK_LLM_PORT = 8001
+# On shutdown, requests still running get this long before they are dropped,
+# and the process this long again to exit before it is killed
+SHUTDOWN_GRACE_SECONDS = 2
+MODELS = ["phi3:mini", "gemma:2b", "mock"]  # any model name is accepted
+
+
+@dataclass(frozen=True)
+class LatencyProfile:
+    ttft: float = 0.0  # seconds before the first token
+    tokens_per_second: float = 0.0  # 0 = the whole reply at once
+    jitter: float = 0.0  # each delay is scaled by 1 ± up to this fraction
+    error_rate: float = 0.0  # share of requests answered with a 500
+    timeout_rate: float = 0.0  # share of requests that hang for hang_seconds
+    hang_seconds: float = 300.0
+    parallel: int = 0  # requests generated at once, the rest queue (0 = no limit)
+    seed: int = 0
+
+
+PROFILES = {
+    "instant": LatencyProfile(),
+    # Small models (phi3:mini, gemma:2b) on a laptop CPU; Ollama serves one
+    # request at a time by default
+    "cpu": LatencyProfile(ttft=0.8, tokens_per_second=15, jitter=0.2, parallel=1),
+    "gpu": LatencyProfile(ttft=0.1, tokens_per_second=80, jitter=0.1, parallel=4),
+    "flaky": LatencyProfile(
+        ttft=0.8,
+        tokens_per_second=15,
+        jitter=0.2,
+        parallel=1,
+        error_rate=0.1,
+        timeout_rate=0.05,
+    ),
+}
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# SERVER
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+def _tokens(text):
+    # Words with their leading whitespace, so joined tokens give back the text
+    return re.findall(r"\s*\S+", text)
+
+
+def create_app(profile: LatencyProfile) -> FastAPI:
+    app = FastAPI(title="Mock LLM")
+    rng = random.Random(profile.seed)
+    slots = asyncio.Semaphore(profile.parallel) if profile.parallel else None
+    stats = {"requests": 0, "errors": 0, "timeouts": 0, "in_flight": 0, "queued": 0}
+
+    def delay(seconds):
+        return seconds * max(0.0, 1 + rng.uniform(-profile.jitter, profile.jitter))
+
+    def token_delay():
+        return delay(1 / profile.tokens_per_second) if profile.tokens_per_second else 0
+
+    @contextlib.asynccontextmanager
+    async def slot():
+        stats["queued"] += 1
+        try:
+            if slots:
+                await slots.acquire()
+        finally:
+            stats["queued"] -= 1
+        stats["in_flight"] += 1
+        try:
+            yield
+        finally:
+            stats["in_flight"] -= 1
+            if slots:
+                slots.release()
+
+    @app.get("/v1/models")
+    async def models():
+        data = [
+            {"id": name, "object": "model", "created": 0, "owned_by": "mock"}
+            for name in MODELS
+        ]
+        return {"object": "list", "data": data}
+
+    @app.get("/mock/stats")
+    async def mock_stats():
+        return {"profile": asdict(profile), **stats}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        stats["requests"] += 1
+
+        draw = rng.random()
+        if draw < profile.error_rate:
+            stats["errors"] += 1
+            error = {"message": "Injected error", "type": "server_error"}
+            return JSONResponse({"error": error}, status_code=500)
+        hang = draw < profile.error_rate + profile.timeout_rate
+        if hang:
+            stats["timeouts"] += 1
+
+        user = [m["content"] for m in body["messages"] if m["role"] == "user"]
+        tokens = _tokens(user[-1] if user else "")
+        max_tokens = body.get("max_tokens") or body.get("max_completion_tokens")
+        finish_reason = "stop"
+        if max_tokens and len(tokens) > max_tokens:
+            tokens, finish_reason = tokens[:max_tokens], "length"
+        usage = {
+            "prompt_tokens": sum(len(_tokens(m["content"])) for m in body["messages"]),
+            "completion_tokens": len(tokens),
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        reply = {
+            "id": f"chatcmpl-mock-{stats['requests']}",
+            "created": int(time.time()),
+            "model": body.get("model", "mock"),
+        }
+
+        async def hang_up():
+            # A hung request never got a generation slot, so it does not block
+            # the requests queued behind it
+            if hang:
+                await asyncio.sleep(profile.hang_seconds)
+
+        if body.get("stream"):
+            include_usage = (body.get("stream_options") or {}).get("include_usage")
+
+            def chunk(delta, finish=None):
+                choice = {"index": 0, "delta": delta, "finish_reason": finish}
+                data = {**reply, "object": "chat.completion.chunk", "choices": [choice]}
+                return f"data: {json.dumps(data)}\n\n"
+
+            async def events():
+                await hang_up()
+                async with slot():
+                    await asyncio.sleep(delay(profile.ttft))
+                    yield chunk({"role": "assistant", "content": ""})
+                    for i, token in enumerate(tokens):
+                        if i:
+                            await asyncio.sleep(token_delay())
+                        yield chunk({"content": token})
+                    yield chunk({}, finish_reason)
+                    if include_usage:
+                        data = {
+                            **reply,
+                            "object": "chat.completion.chunk",
+                            "choices": [],
+                            "usage": usage,
+                        }
+                        yield f"data: {json.dumps(data)}\n\n"
+                    yield "data: [DONE]\n\n"
+
+            return StreamingResponse(events(), media_type="text/event-stream")
+
+        await hang_up()
+        async with slot():
+            await asyncio.sleep(delay(profile.ttft))
+            await asyncio.sleep(sum(token_delay() for _ in tokens[1:]))
+        message = {"role": "assistant", "content": "".join(tokens)}
+        choice = {"index": 0, "message": message, "finish_reason": finish_reason}
+        return {
+            **reply,
+            "object": "chat.completion",
+            "choices": [choice],
+            "usage": usage,
+        }
+
+    return app
+
+
+@contextlib.contextmanager
+def running(profile_name="instant", port=MOCK_LLM_PORT, startup_timeout=15):
+    """Run the mock in a subprocess for the duration of the block; yields its
+    base URL (what LLM_BASE_URL should be)."""
+    script = Path(__file__).resolve()
+    process = subprocess.Popen(
+        [sys.executable, str(script), "--profile", profile_name, "--port", str(port)]
+    )
+    base_url = f"http://localhost:{port}/v1"
+    try:
+        deadline = time.time() + startup_timeout
+        while True:
+            try:
+                urllib.request.urlopen(f"{base_url}/models", timeout=1)
+                break
+            except OSError:
+                if process.poll() is not None or time.time() > deadline:
+                    raise RuntimeError("Mock LLM server did not start") from None
+                time.sleep(0.2)
+        print(f"🧪 Mock LLM ({profile_name}) at {base_url}")
+        yield base_url
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=2 * SHUTDOWN_GRACE_SECONDS)
+        except subprocess.TimeoutExpired:
+            print("⚠️  Mock LLM did not stop, killing it")
+            process.kill()
+            process.wait()
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# MAIN
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--profile", choices=PROFILES, default="instant")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=MOCK_LLM_PORT)
+    # Any profile field can be overridden, e.g. --ttft 2 --error-rate 0.2
+    for field in fields(LatencyProfile):
+        parser.add_argument(f"--{field.name.replace('_', '-')}", type=field.type)
+    args = parser.parse_args()
+
+    overrides = {
+        field.name: getattr(args, field.name)
+        for field in fields(LatencyProfile)
+        if getattr(args, field.name) is not None
+    }
+    profile = replace(PROFILES[args.profile], **overrides)
+    uvicorn.run(
+        create_app(profile),
+        host=args.host,
+        port=args.port,
+        log_level="warning",
+        timeout_graceful_shutdown=SHUTDOWN_GRACE_SECONDS,
+    )
+
+
+if __name__ == "__main__":
+    main()
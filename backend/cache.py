@@ -0,0 +1,149 @@
+"""
+Small caches used by TranscriptionService.
+Transcripts are keyed on the audio content plus every decode setting that
+changes the output, so a hit is always safe to return as-is. LLM cleaning
+results are keyed the same way on text, prompt and sampling settings.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+# Read audio in 1 MB blocks when hashing so large files are never fully loaded
+HASH_BLOCK_SIZE = 1 << 20
+
+
+def audio_digest(audio_file) -> str:
+    """sha256 of the audio content. Accepts a path or raw bytes."""
+    digest = hashlib.sha256()
+    if isinstance(audio_file, bytes | bytearray | memoryview):
+        digest.update(audio_file)
+    else:
+        with open(audio_file, "rb") as f:
+            while block := f.read(HASH_BLOCK_SIZE):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def make_key(*parts) -> str:
+    """Stable digest of any JSON-serializable key parts."""
+    payload = json.dumps(parts, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class LRUCache:
+    """Thread-safe in-memory LRU with hit/miss counters. With a ttl (seconds),
+    entries older than ttl are treated as missing and dropped."""
+
+    def __init__(self, max_entries: int = 128, ttl: float | None = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self._data: OrderedDict[str, tuple[float, object]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._data.get(key)
+            expired = (
+                entry is not None
+                and self.ttl is not None
+                and time.monotonic() - entry[0] > self.ttl
+            )
+            if expired:
+                del self._data[key]
+                self.expired += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, value):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def stats(self) -> dict:
+        stats = {
+            "entries": len(self._data),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+        if self.ttl is not None:
+            stats.update({"ttl": self.ttl, "expired": self.expired})
+        return stats
+
+
+class TranscriptCache:
+    """In-memory LRU in front of an optional SQLite file that survives restarts."""
+
+    def __init__(self, max_entries: int = 128, disk_path: str | None = None):
+        self.memory = LRUCache(max_entries)
+        self.disk_path = disk_path
+        self.disk_hits = 0
+        self._db = None
+        self._db_lock = threading.Lock()
+
+        if disk_path:
+            Path(disk_path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(disk_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS transcripts "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+            )
+            self._db.commit()
+
+    def get(self, key: str) -> dict | None:
+        value = self.memory.get(key)
+        if value is not None or self._db is None:
+            return value
+
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT value FROM transcripts WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+
+        # Promote to memory so the next hit skips SQLite
+        value = json.loads(row[0])
+        self.memory.put(key, value)
+        self.disk_hits += 1
+        return value
+
+    def put(self, key: str, value: dict):
+        self.memory.put(key, value)
+        if self._db is None:
+            return
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO transcripts (key, value) VALUES (?, ?)",
+                (key, json.dumps(value)),
+            )
+            self._db.commit()
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def stats(self) -> dict:
+        return {
+            **self.memory.stats(),
+            "disk_path": self.disk_path,
+            "disk_hits": self.disk_hits,
+        }
@@ -0,0 +1,278 @@
+"""
+Upload ingestion: decode uploaded audio straight from the request's spooled
+buffer into a 16 kHz mono float32 array, without writing our own temp file.
+The upload is read in fixed-size blocks and decoded into one preallocated
+array, so apart from the samples themselves only a block is held at a time.
+PCM WAV and raw 16 kHz PCM skip the generic (FFmpeg) decoder entirely.
+"""
+
+import gc
+import hashlib
+import itertools
+import wave
+from pathlib import Path
+from typing import BinaryIO, NamedTuple
+
+import av
+import numpy as np
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from faster_whisper.audio import decode_audio
+
+from batching import SAMPLE_RATE
+
+# Read (and hash) the upload in 1 MB blocks
+READ_BLOCK_SIZE = 1 << 20
+# Most samples preallocated for a compressed upload from its header's
+# duration (10 minutes, 38 MB); longer audio grows the buffer as it decodes
+MAX_PREALLOCATED_SAMPLES = 600 * SAMPLE_RATE
+# Raw PCM uploads (no header) must be 16-bit little-endian, 16 kHz mono
+RAW_PCM_TYPES = ("audio/pcm", "audio/l16", "audio/x-raw")
+RAW_PCM_SUFFIXES = (".pcm", ".raw")
+# Declared types that can hold audio; browsers send webm recordings as video/
+AUDIO_TYPE_PREFIXES = ("audio/", "video/")
+AUDIO_TYPES = ("application/octet-stream", "application/ogg")
+
+
+class UnsupportedUploadError(ValueError):
+    """Raised when the upload's declared type cannot be audio."""
+
+
+class DecodedAudio(NamedTuple):
+    """An upload decoded for Whisper, with the sha256 of its original bytes
+    (what the transcript cache is keyed on)."""
+
+    samples: np.ndarray
+    digest: str
+    # Upload size, and the most bytes held at once while decoding it
+    size: int = 0
+    peak_bytes: int = 0
+
+    @property
+    def duration(self) -> float:
+        return len(self.samples) / SAMPLE_RATE
+
+    def upload_stats(self) -> dict:
+        return {"bytes": self.size, "peak_buffered_bytes": self.peak_bytes}
+
+
+class _SampleBuffer:
+    """float32 samples written in place as blocks are decoded. Sized up front
+    when the length is known, otherwise doubled as it fills. Callers cap the
+    initial capacity: headers can claim any length."""
+
+    def __init__(self, capacity: int):
+        self.samples = np.empty(max(capacity, 1), dtype=np.float32)
+        self.length = 0
+        self.peak_bytes = self.samples.nbytes
+
+    def append(self, block: np.ndarray):
+        end = self.length + len(block)
+        held = self.samples.nbytes + block.nbytes
+        if end > len(self.samples):
+            grown = np.empty(max(end, 2 * len(self.samples)), dtype=np.float32)
+            grown[: self.length] = self.samples[: self.length]
+            held += grown.nbytes
+            self.samples = grown
+        self.samples[self.length : end] = block
+        self.length = end
+        self.peak_bytes = max(self.peak_bytes, held)
+
+    def result(self) -> np.ndarray:
+        return self.samples[: self.length]
+
+
+def _digest(file: BinaryIO) -> tuple[str, int]:
+    digest = hashlib.sha256()
+    size = 0
+    file.seek(0)
+    while block := file.read(READ_BLOCK_SIZE):
+        digest.update(block)
+        size += len(block)
+    file.seek(0)
+    return digest.hexdigest(), size
+
+
+def pcm16_to_float(data: bytes) -> np.ndarray:
+    """16-bit little-endian PCM to float32 in [-1, 1)."""
+    usable = len(data) - len(data) % 2
+    return np.frombuffer(data[:usable], dtype="<i2").astype(np.float32) / 32768.0
+
+
+def _read_pcm(file: BinaryIO, size: int) -> _SampleBuffer:
+    buffer = _SampleBuffer(size // 2)
+    # READ_BLOCK_SIZE is even, so only the last block can end mid-sample
+    while block := file.read(READ_BLOCK_SIZE):
+        buffer.append(pcm16_to_float(block))
+    buffer.peak_bytes += min(READ_BLOCK_SIZE, size)
+    return buffer
+
+
+def _wav_block_to_float(frames: bytes, width: int, channels: int) -> np.ndarray:
+    if width == 1:
+        samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif width == 2:
+        samples = pcm16_to_float(frames)
+    else:
+        samples = np.frombuffer(frames, dtype="<i4").astype(np.float32) / 2**31
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return samples.astype(np.float32, copy=False)
+
+
+def _read_wav(file: BinaryIO, size: int) -> _SampleBuffer | None:
+    """Fast path for PCM WAV already at 16 kHz; None for anything that needs
+    resampling or a real decoder."""
+    try:
+        with wave.open(file, "rb") as wav:
+            width = wav.getsampwidth()
+            if wav.getframerate() != SAMPLE_RATE or width not in (1, 2, 4):
+                return None
+            channels = wav.getnchannels()
+            # The header's frame count, if the upload is big enough to hold it
+            buffer = _SampleBuffer(min(wav.getnframes(), size // width // channels))
+            frames_per_block = max(1, READ_BLOCK_SIZE // (width * channels))
+            while frames := wav.readframes(frames_per_block):
+                buffer.append(_wav_block_to_float(frames, width, channels))
+    except (wave.Error, EOFError):
+        return None
+    buffer.peak_bytes += min(READ_BLOCK_SIZE, size)
+    return buffer
+
+
+def _frames(container):
+    # Skip corrupt frames instead of failing the whole upload, like
+    # faster-whisper's decode_audio
+    frames = container.decode(audio=0)
+    while True:
+        try:
+            frame = next(frames)
+        except StopIteration:
+            return
+        except av.error.InvalidDataError:
+            continue
+        frame.pts = None
+        yield frame
+
+
+def _decode_stream(file: BinaryIO) -> _SampleBuffer:
+    """Any format FFmpeg knows, decoded frame by frame into the buffer."""
+    # s16 like faster-whisper: its downmix is normalized, the float one is not
+    resampler = av.AudioResampler(format="s16", layout="mono", rate=SAMPLE_RATE)
+    with av.open(file, mode="r", metadata_errors="ignore") as container:
+        # Size the buffer from the header when it has a duration (browser
+        # webm recordings do not); one extra second covers resampler slack
+        duration = container.duration / av.time_base if container.duration else 0
+        capacity = int((duration + 1) * SAMPLE_RATE)
+        buffer = _SampleBuffer(min(capacity, MAX_PREALLOCATED_SAMPLES))
+        # A trailing None flushes the resampler
+        for frame in itertools.chain(_frames(container), [None]):
+            for resampled in resampler.resample(frame):
+                samples = resampled.to_ndarray().reshape(-1)
+                buffer.append(samples.astype(np.float32) / 32768.0)
+    # faster-whisper does the same: resampler objects are otherwise not freed
+    del resampler
+    gc.collect()
+    return buffer
+
+
+def is_raw_pcm(filename: str | None, content_type: str | None) -> bool:
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    suffix = Path(filename or "").suffix.lower()
+    return media_type in RAW_PCM_TYPES or suffix in RAW_PCM_SUFFIXES
+
+
+def check_upload(filename: str | None, content_type: str | None):
+    """Reject from the declared type alone, before reading any bytes."""
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if (
+        not media_type
+        or media_type.startswith(AUDIO_TYPE_PREFIXES)
+        or media_type in AUDIO_TYPES
+        or is_raw_pcm(filename, content_type)
+    ):
+        return
+    raise UnsupportedUploadError(f"Unsupported upload type '{media_type}'")
+
+
+def decode_upload(
+    file: BinaryIO, filename: str | None = None, content_type: str | None = None
+) -> DecodedAudio:
+    """Decode an upload (any seekable binary file object, e.g.
+    UploadFile.file) to 16 kHz mono. Raises UnsupportedUploadError if its declared
+    type is not audio and ValueError if it does not decode."""
+    check_upload(filename, content_type)
+    digest, size = _digest(file)
+    try:
+        return _decode(file, filename, content_type, digest, size)
+    except MemoryError as e:
+        raise ValueError("Audio too long to decode in memory") from e
+
+
+def _decode(file, filename, content_type, digest: str, size: int) -> DecodedAudio:
+    if is_raw_pcm(filename, content_type):
+        buffer = _read_pcm(file, size)
+        return DecodedAudio(buffer.result(), digest, size, buffer.peak_bytes)
+
+    header = file.read(12)
+    file.seek(0)
+    if header[:4] == b"RIFF" and header[8:12] == b"WAVE":
+        buffer = _read_wav(file, size)
+        file.seek(0)
+        if buffer is not None:
+            return DecodedAudio(buffer.result(), digest, size, buffer.peak_bytes)
+
+    try:
+        buffer = _decode_stream(file)
+    except MemoryError:
+        raise
+    except Exception as e:
+        raise ValueError(f"Could not decode audio: {e}") from e
+    return DecodedAudio(buffer.result(), digest, size, buffer.peak_bytes)
+
+
+class UploadLimit:
+    """ASGI middleware capping request bodies at max_bytes (0 = no limit).
+    Oversized requests get a 413 from their Content-Length header before any
+    of the body is read; chunked ones as soon as the limit is crossed."""
+
+    def __init__(self, app, max_bytes: int):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.max_bytes:
+            await self.app(scope, receive, send)
+            return
+
+        detail = f"Upload larger than {self.max_bytes / 1024 / 1024:g} MB"
+        length = dict(scope["headers"]).get(b"content-length", b"")
+        if length.isdigit() and int(length) > self.max_bytes:
+            response = JSONResponse({"detail": detail}, status_code=413)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+def whisper_input(audio):
+    """What WhisperModel.transcribe should get: decoded samples, or a path."""
+    return audio.samples if isinstance(audio, DecodedAudio) else audio
+
+
+def load_samples(audio) -> np.ndarray:
+    """16 kHz mono samples, decoding from disk only if given a path."""
+    if isinstance(audio, DecodedAudio):
+        return audio.samples
+    return decode_audio(audio, sampling_rate=SAMPLE_RATE)
@@ -0,0 +1,231 @@
+"""
+Bounded in-process job queue for the full transcription pipeline.
+Jobs are submitted without waiting for the result, then polled by id.
+"""
+
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from fastapi.responses import JSONResponse
+
+from ingest import DecodedAudio
+from transcription import TranscriptionService
+
+# Job stages, in the order a successful job goes through them
+STAGES = ("queued", "transcribing", "cleaning", "done")
+
+
+class QueueFullError(Exception):
+    """Raised when the queue is at capacity. Carries a Retry-After hint."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Job queue is full, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+@dataclass
+class Job:
+    id: str
+    # Decoded upload, held only until the job has run
+    audio: DecodedAudio | None
+    use_llm: bool = True
+    pipeline: bool = False
+    long_audio: bool = False
+    profile: str | None = None
+    stage: str = "queued"
+    created_at: float = field(default_factory=time.time)
+    started_at: float | None = None
+    finished_at: float | None = None
+    timings: dict = field(default_factory=dict)
+    result: dict | None = None
+    error: str | None = None
+
+    @property
+    def finished(self) -> bool:
+        return self.stage in ("done", "failed")
+
+    def to_dict(self) -> dict:
+        data = {
+            "job_id": self.id,
+            "stage": self.stage,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "timings": self.timings,
+        }
+        if self.result is not None:
+            data["result"] = self.result
+        if self.error is not None:
+            data["error"] = self.error
+        return data
+
+
+class JobQueue:
+    """Runs TranscriptionService.transcribe_file_async on a fixed worker pool."""
+
+    def __init__(
+        self,
+        service: TranscriptionService,
+        max_queued: int = 16,
+        workers: int = 1,
+        keep_finished: int = 256,
+    ):
+        self.service = service
+        self.workers = workers
+        self.keep_finished = keep_finished
+        self.queue: asyncio.Queue[Job] = asyncio.Queue(maxsize=max_queued)
+        self.jobs: OrderedDict[str, Job] = OrderedDict()
+        self._tasks: list[asyncio.Task] = []
+        # Moving average of job run time, used for the Retry-After estimate
+        self._avg_run_time = 5.0
+
+    def start(self):
+        for i in range(self.workers):
+            self._tasks.append(
+                asyncio.create_task(self._worker(), name=f"job-worker-{i}")
+            )
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+        # Drop audio of jobs that never ran
+        while not self.queue.empty():
+            self._cleanup(self.queue.get_nowait())
+
+    def submit(
+        self,
+        audio: DecodedAudio,
+        use_llm: bool = True,
+        pipeline: bool = False,
+        long_audio: bool = False,
+        profile: str | None = None,
+    ) -> Job:
+        job = Job(
+            id=uuid.uuid4().hex,
+            audio=audio,
+            use_llm=use_llm,
+            pipeline=pipeline,
+            long_audio=long_audio,
+            profile=profile,
+        )
+
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise QueueFullError(self.retry_after()) from None
+
+        self.jobs[job.id] = job
+        self._evict_finished()
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        return self.jobs.get(job_id)
+
+    def retry_after(self) -> int:
+        # Time until a worker frees a slot if the queue drains at the average rate
+        waves = self.queue.qsize() / self.workers
+        return max(1, round(self._avg_run_time * waves))
+
+    def stats(self) -> dict:
+        running = sum(1 for job in self.jobs.values() if job.stage in STAGES[1:3])
+        return {
+            "queued": self.queue.qsize(),
+            "running": running,
+            "max_queued": self.queue.maxsize,
+            "workers": self.workers,
+        }
+
+    async def _worker(self):
+        while True:
+            job = await self.queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self.queue.task_done()
+
+    async def _run(self, job: Job):
+        job.started_at = time.time()
+        job.timings["queue_time"] = job.started_at - job.created_at
+
+        def on_stage(stage):
+            job.stage = stage
+
+        try:
+            result = await self.service.transcribe_file_async(
+                job.audio,
+                use_llm=job.use_llm,
+                on_stage=on_stage,
+                pipeline=job.pipeline,
+                long_audio=job.long_audio,
+                profile=job.profile,
+            )
+            job.result = {**result, "upload": job.audio.upload_stats()}
+            job.timings.update(
+                {
+                    "transcription_time": result["transcription_time"],
+                    "llm_time": result["llm_time"],
+                    "overlap_time": result.get("overlap_time", 0),
+                    "total_time": result["total_time"],
+                }
+            )
+            job.stage = "done"
+
+        except Exception as e:
+            print(f"❌ Job {job.id} failed: {e}")
+            job.error = str(e)
+            job.stage = "failed"
+
+        finally:
+            job.finished_at = time.time()
+            run_time = job.finished_at - job.started_at
+            self._avg_run_time = 0.8 * self._avg_run_time + 0.2 * run_time
+            self._cleanup(job)
+
+    def _cleanup(self, job: Job):
+        # Finished jobs are kept for polling; their audio is not
+        job.audio = None
+
+    def _evict_finished(self):
+        # Keep memory bounded: forget the oldest finished jobs first
+        excess = len(self.jobs) - self.keep_finished - self.queue.maxsize
+        for job_id in [jid for jid, job in self.jobs.items() if job.finished]:
+            if excess <= 0:
+                break
+            del self.jobs[job_id]
+            excess -= 1
+
+
+class JobAdmission:
+    """ASGI middleware answering POSTs to path with a 429 while the queue
+    from get_queue() is full, before any of the upload is read: FastAPI
+    parses (and spools) the whole multipart body before the endpoint runs."""
+
+    def __init__(self, app, path: str, get_queue):
+        self.app = app
+        self.path = path
+        self.get_queue = get_queue
+
+    async def __call__(self, scope, receive, send):
+        queue = self.get_queue()
+        if (
+            scope["type"] == "http"
+            and scope["method"] == "POST"
+            and scope["path"] == self.path
+            and queue is not None
+            and queue.queue.full()
+        ):
+            retry_after = str(queue.retry_after())
+            response = JSONResponse(
+                {"detail": "Job queue is full"},
+                status_code=429,
+                headers={"Retry-After": retry_after},
+            )
+            await response(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
@@ -0,0 +1,272 @@
+"""
+Live transcription of a microphone stream. PCM frames are appended to a
+rolling buffer that is re-decoded as it grows; words are committed once two
+consecutive decodes agree on them (local agreement), and the buffer is cut
+at the last committed sentence so only the unstable tail is decoded again.
+"""
+
+import asyncio
+import contextlib
+import re
+import time
+
+import numpy as np
+
+from batching import SAMPLE_RATE
+from ingest import pcm16_to_float
+from transcription import SENTENCE_ENDINGS, TranscriptionService, TranscriptWord
+
+# The buffer is cut at the last committed word past this, even mid-sentence;
+# Whisper only sees 30 s at a time
+MAX_BUFFER_SECONDS = 30
+# Committed text from before the buffer, passed to Whisper as its prompt
+PROMPT_CHARS = 200
+# Longest run of words a new decode may repeat from the committed tail
+MAX_OVERLAP_WORDS = 5
+
+
+def _normalize(word: str) -> str:
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+def _join(words: list[TranscriptWord]) -> str:
+    # Whisper words carry their own leading space
+    return "".join(word.word for word in words).strip()
+
+
+def agreed_prefix(previous: list, current: list) -> int:
+    """How many leading words two hypotheses agree on, ignoring case and
+    punctuation."""
+    count = 0
+    for a, b in zip(previous, current, strict=False):
+        if _normalize(a.word) != _normalize(b.word):
+            break
+        count += 1
+    return count
+
+
+class LiveSession:
+    """One live stream. feed() takes s16le 16 kHz mono PCM; decodes run in the
+    background once min_chunk_seconds of new audio has arrived, and send()
+    gets `partial`, `final` and (with use_llm) `cleaned` events. If a decode
+    fails, send() gets an `error` event, error is set and the session takes
+    no more audio."""
+
+    def __init__(
+        self,
+        service: TranscriptionService,
+        send,
+        profile: str | None = None,
+        use_llm: bool = False,
+        min_chunk_seconds: float = 1.0,
+        trim_seconds: float = 15.0,
+    ):
+        self.service = service
+        self.send = send
+        self.profile = profile
+        self.use_llm = use_llm
+        self.min_chunk = int(min_chunk_seconds * SAMPLE_RATE)
+        self.trim_seconds = trim_seconds
+
+        self.frames: list[np.ndarray] = []
+        self.buffer = np.zeros(0, dtype=np.float32)
+        # Seconds of stream audio cut from the front of the buffer
+        self.offset = 0.0
+        self.received = 0
+        self.decoded_upto = 0
+        self.committed: list[TranscriptWord] = []
+        self.hypothesis: list[TranscriptWord] = []
+        self.sentence: list[TranscriptWord] = []
+        self.cleaning: list[asyncio.Task] = []
+        self.decodes = 0
+        self.decode_time = 0.0
+        self.started_at = time.perf_counter()
+        self.first_final_time = None
+        self.error: Exception | None = None
+
+        self._audio = asyncio.Event()
+        self._closed = False
+        self._send_lock = asyncio.Lock()
+        self._decoder = asyncio.create_task(self._run())
+
+    def feed(self, data: bytes):
+        if self._closed:
+            return
+        samples = pcm16_to_float(data)
+        self.frames.append(samples)
+        self.received += len(samples)
+        self._audio.set()
+
+    async def finish(self) -> dict:
+        """Stream ended: decode what is left, commit everything, wait for the
+        cleaning calls and send `done`. Raises the decode error if the session
+        already failed."""
+        if self.error is not None:
+            raise self.error
+        self._closed = True
+        self._audio.set()
+        await self._decoder
+
+        if self.received > self.decoded_upto:
+            await self._step(final=True)
+        elif self.hypothesis:
+            await self._commit(self.hypothesis)
+            self.hypothesis = []
+        if self.sentence:
+            self._sentence_done()
+        cleaned = await asyncio.gather(*self.cleaning)
+
+        audio_duration = self.received / SAMPLE_RATE
+        done = {
+            "type": "done",
+            "text": _join(self.committed),
+            "audio_duration": audio_duration,
+            "decodes": self.decodes,
+            "decode_time": self.decode_time,
+            "real_time_factor": (
+                self.decode_time / audio_duration if audio_duration else None
+            ),
+            "time_to_first_final": self.first_final_time,
+        }
+        if self.use_llm:
+            done["cleaned_text"] = " ".join(text for text in cleaned if text)
+        await self._emit(done)
+        return done
+
+    def close(self):
+        """Client went away: stop decoding and cleaning."""
+        self._stop()
+        self._decoder.cancel()
+
+    def _stop(self):
+        self._closed = True
+        self.frames.clear()
+        for task in self.cleaning:
+            task.cancel()
+
+    async def _run(self):
+        try:
+            while True:
+                await self._audio.wait()
+                self._audio.clear()
+                if self._closed:
+                    return
+                if self.received - self.decoded_upto >= self.min_chunk:
+                    await self._step()
+        except Exception as e:
+            # Without a decoder, audio would pile up unread: end the session
+            print(f"❌ Live decode failed: {e}")
+            self.error = e
+            self._stop()
+            with contextlib.suppress(Exception):
+                await self._emit({"type": "error", "error": str(e)})
+
+    async def _emit(self, event: dict):
+        async with self._send_lock:
+            await self.send(event)
+
+    def _prompt(self) -> str:
+        before = [word for word in self.committed if word.end <= self.offset]
+        return _join(before)[-PROMPT_CHARS:]
+
+    async def _step(self, final: bool = False):
+        if self.frames:
+            self.buffer = np.concatenate([self.buffer, *self.frames])
+            self.frames.clear()
+        self.decoded_upto = self.received
+
+        start = time.perf_counter()
+        words = await self.service.transcribe_words_async(
+            self.buffer, prompt=self._prompt(), profile=self.profile
+        )
+        self.decodes += 1
+        self.decode_time += time.perf_counter() - start
+
+        current = self._new_words(words)
+        agreed = len(current) if final else agreed_prefix(self.hypothesis, current)
+        self.hypothesis = current[agreed:]
+        if agreed:
+            await self._commit(current[:agreed])
+        await self._emit({"type": "partial", "text": _join(self.hypothesis)})
+        self._trim()
+
+    def _new_words(self, words: list[TranscriptWord]) -> list[TranscriptWord]:
+        """Words of a decode past the committed ones, in stream time."""
+        words = [
+            TranscriptWord(word.word, word.start + self.offset, word.end + self.offset)
+            for word in words
+        ]
+        if not self.committed:
+            return words
+        committed_end = self.committed[-1].end
+        words = [word for word in words if word.end > committed_end - 0.1]
+
+        # A decode that restarts a little before the committed end repeats its
+        # last words; drop the longest such overlap
+        if not words or words[0].start - committed_end > 1:
+            return words
+        tail = [_normalize(word.word) for word in self.committed[-MAX_OVERLAP_WORDS:]]
+        for n in range(min(len(tail), len(words)), 0, -1):
+            if tail[-n:] == [_normalize(word.word) for word in words[:n]]:
+                return words[n:]
+        return words
+
+    async def _commit(self, words: list[TranscriptWord]):
+        self.committed.extend(words)
+        if self.first_final_time is None:
+            self.first_final_time = time.perf_counter() - self.started_at
+        await self._emit(
+            {
+                "type": "final",
+                "text": _join(words),
+                "start": words[0].start,
+                "end": words[-1].end,
+            }
+        )
+        for word in words:
+            self.sentence.append(word)
+            if word.word.rstrip().endswith(SENTENCE_ENDINGS):
+                self._sentence_done()
+
+    def _sentence_done(self):
+        text = _join(self.sentence)
+        self.sentence = []
+        if self.use_llm and text:
+            index = len(self.cleaning)
+            self.cleaning.append(asyncio.create_task(self._clean(index, text)))
+
+    async def _clean(self, index: int, text: str) -> str:
+        cleaned = await self.service.clean_with_llm_async(text)
+        await self._emit(
+            {"type": "cleaned", "index": index, "raw_text": text, "text": cleaned}
+        )
+        return cleaned
+
+    def _trim(self):
+        """Cut the buffer at the end of the last committed sentence, or past
+        MAX_BUFFER_SECONDS at the last committed word."""
+        duration = len(self.buffer) / SAMPLE_RATE
+        if duration <= self.trim_seconds:
+            return
+        in_buffer = [word for word in self.committed if word.end > self.offset]
+        sentence_ends = [
+            word.end
+            for word in in_buffer
+            if word.word.rstrip().endswith(SENTENCE_ENDINGS)
+        ]
+        if sentence_ends:
+            cut = sentence_ends[-1]
+        elif duration > MAX_BUFFER_SECONDS:
+            # Nothing committed (silence, or decodes that keep disagreeing):
+            # keep the newest trim_seconds
+            cut = in_buffer[-1].end if in_buffer else self.offset
+            cut = max(cut, self.offset + duration - self.trim_seconds)
+        else:
+            return
+
+        drop = int((cut - self.offset) * SAMPLE_RATE)
+        self.buffer = self.buffer[drop:]
+        self.offset += drop / SAMPLE_RATE
+        self.hypothesis = [
+            word for word in self.hypothesis if word.start >= self.offset
+        ]
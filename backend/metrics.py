@@ -0,0 +1,231 @@
+"""
+In-process metric primitives shared by the service and the API, and their
+Prometheus text exposition (served at /metrics).
+"""
+
+import bisect
+import itertools
+import os
+import resource
+import statistics
+import sys
+import threading
+import time
+from collections import deque
+
+# Histogram buckets for stage latencies (seconds) and real-time factors
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+RTF_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2)
+
+
+class Histogram:
+    """Bucketed histogram that also keeps a window of recent samples so the
+    status endpoint can report exact recent percentiles."""
+
+    def __init__(self, buckets: tuple[float, ...], recent: int = 1024):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self._recent = deque(maxlen=recent)
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.sum += value
+            self._recent.append(value)
+
+    def percentile(self, q: float) -> float | None:
+        with self._lock:
+            recent = list(self._recent)
+        if not recent:
+            return None
+        if len(recent) == 1:
+            return recent[0]
+        return statistics.quantiles(recent, n=100, method="inclusive")[int(q) - 1]
+
+    def cumulative(self) -> tuple[list[int], int, float]:
+        """Cumulative bucket counts (the last is +Inf), count and sum, read
+        together."""
+        with self._lock:
+            return list(itertools.accumulate(self.counts)), self.count, self.sum
+
+    def snapshot(self) -> dict:
+        cumulative, count, total = self.cumulative()
+        labels = [f"le_{b:g}" for b in self.buckets] + ["le_inf"]
+        return {
+            "count": count,
+            "mean": total / count if count else None,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "buckets": dict(zip(labels, cumulative, strict=True)),
+        }
+
+
+class Counter:
+    """Monotonic count per combination of label values."""
+
+    def __init__(self, labels: tuple[str, ...] = ()):
+        self.labels = labels
+        self.values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount: float = 1):
+        with self._lock:
+            self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def snapshot(self) -> dict[tuple, float]:
+        with self._lock:
+            return dict(self.values)
+
+
+def _number(value: float) -> str:
+    # Exact integers (counts can pass 1e6, where :g would round them)
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def _label_text(names, values) -> str:
+    if not names:
+        return ""
+    escaped = (
+        str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+        for value in values
+    )
+    pairs = ",".join(f'{n}="{v}"' for n, v in zip(names, escaped, strict=True))
+    return "{" + pairs + "}"
+
+
+class PrometheusText:
+    """Builds a Prometheus text exposition (format 0.0.4). Series are given
+    as {label values: value} with the label names alongside, or as a bare
+    number / Histogram for unlabelled metrics."""
+
+    CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self, prefix: str = ""):
+        self.prefix = prefix
+        self.lines: list[str] = []
+
+    def _header(self, name, kind, help_text):
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} {kind}")
+
+    def _samples(self, name, kind, help_text, series, labels):
+        name = self.prefix + name
+        if not isinstance(series, dict):
+            series = {(): series}
+        self._header(name, kind, help_text)
+        for values, value in series.items():
+            if value is not None:
+                self.lines.append(
+                    f"{name}{_label_text(labels, values)} {_number(value)}"
+                )
+
+    def counter(self, name, help_text, series, labels=()):
+        self._samples(name, "counter", help_text, series, labels)
+
+    def gauge(self, name, help_text, series, labels=()):
+        self._samples(name, "gauge", help_text, series, labels)
+
+    def histogram(self, name, help_text, series, labels=()):
+        name = self.prefix + name
+        if not isinstance(series, dict):
+            series = {(): series}
+        self._header(name, "histogram", help_text)
+        for values, histogram in series.items():
+            cumulative, count, total = histogram.cumulative()
+            bounds = [f"{b:g}" for b in histogram.buckets] + ["+Inf"]
+            for bound, bucket_count in zip(bounds, cumulative, strict=True):
+                bucket_labels = _label_text((*labels, "le"), (*values, bound))
+                self.lines.append(f"{name}_bucket{bucket_labels} {bucket_count}")
+            self.lines.append(
+                f"{name}_sum{_label_text(labels, values)} {_number(total)}"
+            )
+            self.lines.append(f"{name}_count{_label_text(labels, values)} {count}")
+
+    def render(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+
+class HttpMetrics:
+    """What RequestMetrics records, per route template (e.g. /api/jobs/{job_id})."""
+
+    def __init__(self):
+        self.request_seconds: dict[tuple, Histogram] = {}
+        self.upload_seconds = Histogram(LATENCY_BUCKETS)
+        self.responses = Counter(("route", "status"))
+        # Failed requests: 5xx responses, plus failures reported in a 200 body
+        # or event stream (counted by the endpoint itself)
+        self.errors = Counter(("route",))
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def observe(self, route: str, status: int, seconds: float):
+        with self._lock:
+            histogram = self.request_seconds.get((route,))
+            if histogram is None:
+                histogram = self.request_seconds[(route,)] = Histogram(LATENCY_BUCKETS)
+        histogram.observe(seconds)
+        self.responses.inc(route, status)
+        if status >= 500:
+            self.errors.inc(route)
+
+
+class RequestMetrics:
+    """ASGI middleware timing HTTP requests until their last response byte
+    (so streamed responses count in full), counting them by status, and
+    timing how long multipart upload bodies take to arrive."""
+
+    def __init__(self, app, metrics: HttpMetrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        content_type = dict(scope["headers"]).get(b"content-type", b"")
+        is_upload = content_type.startswith(b"multipart/form-data")
+        status = 500
+
+        async def timed_receive():
+            message = await receive()
+            if (
+                is_upload
+                and message["type"] == "http.request"
+                and not message.get("more_body", False)
+            ):
+                self.metrics.upload_seconds.observe(time.perf_counter() - start)
+            return message
+
+        async def timed_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        self.metrics.in_flight += 1
+        try:
+            await self.app(scope, timed_receive, timed_send)
+        finally:
+            self.metrics.in_flight -= 1
+            # Set by the router on this same scope once a route matched
+            route = getattr(scope.get("route"), "path", "unmatched")
+            self.metrics.observe(route, status, time.perf_counter() - start)
+
+
+def resident_memory() -> int:
+    """Current resident set size of this process in bytes (peak RSS where
+    /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # ru_maxrss is in KB on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
@@ -0,0 +1,154 @@
+"""
+Whisper models loaded on demand by name and compute type, kept in an LRU
+bounded by a memory budget. The default model is pinned and never evicted.
+"""
+
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import NamedTuple
+
+from faster_whisper import BatchedInferencePipeline, WhisperModel
+
+from metrics import resident_memory
+
+# CTranslate2 compute types a request may ask for
+COMPUTE_TYPES = (
+    "int8",
+    "int8_float32",
+    "int8_float16",
+    "int8_bfloat16",
+    "float16",
+    "bfloat16",
+    "float32",
+)
+
+
+class ModelSpec(NamedTuple):
+    name: str
+    compute_type: str
+
+
+@dataclass
+class LoadedModel:
+    spec: ModelSpec
+    model: WhisperModel
+    pipeline: BatchedInferencePipeline
+    # Growth in process RSS while loading; an estimate, not an exact size
+    memory_bytes: int
+    load_time: float
+    loaded_at: float = field(default_factory=time.time)
+    uses: int = 0
+
+
+class ModelRegistry:
+    """LRU of loaded models. load(spec) builds a WhisperModel; once the
+    models' combined memory exceeds memory_budget_mb (0 = no limit), the
+    least recently used unpinned models are evicted."""
+
+    def __init__(self, load, memory_budget_mb: float = 0, max_events: int = 64):
+        self.load = load
+        self.memory_budget = memory_budget_mb * 1024 * 1024
+        self.pinned: set[ModelSpec] = set()
+        self.loads = 0
+        self.evictions = 0
+        self.events = deque(maxlen=max_events)
+        self._models: OrderedDict[ModelSpec, LoadedModel] = OrderedDict()
+        self._lock = threading.Lock()
+        # Held while loading so two requests never load the same model twice
+        self._load_lock = threading.Lock()
+
+    def get(self, spec: ModelSpec, pin: bool = False) -> LoadedModel:
+        with self._lock:
+            entry = self._models.get(spec)
+            if entry is not None:
+                self._models.move_to_end(spec)
+                entry.uses += 1
+                return entry
+
+        with self._load_lock:
+            with self._lock:
+                entry = self._models.get(spec)
+            if entry is None:
+                entry = self._load(spec)
+            with self._lock:
+                if pin:
+                    self.pinned.add(spec)
+                self._models[spec] = entry
+                self._models.move_to_end(spec)
+                entry.uses += 1
+                self._evict(keep=spec)
+            return entry
+
+    def _load(self, spec: ModelSpec) -> LoadedModel:
+        print(f"🔄 Loading Whisper model '{spec.name}' ({spec.compute_type})...")
+        before = resident_memory()
+        start = time.perf_counter()
+        model = self.load(spec)
+        load_time = time.perf_counter() - start
+        memory = max(0, resident_memory() - before)
+        print(f"✅ Whisper model '{spec.name}' loaded in {load_time:.1f}s")
+
+        self.loads += 1
+        self._event("load", spec, memory, load_time=load_time)
+        return LoadedModel(
+            spec,
+            model,
+            BatchedInferencePipeline(model=model),
+            memory_bytes=memory,
+            load_time=load_time,
+        )
+
+    def _evict(self, keep: ModelSpec):
+        if self.memory_budget <= 0:
+            return
+        for spec in list(self._models):
+            if self._resident() <= self.memory_budget:
+                return
+            if spec == keep or spec in self.pinned:
+                continue
+            entry = self._models.pop(spec)
+            self.evictions += 1
+            self._event("evict", spec, entry.memory_bytes)
+            print(f"♻️  Evicted Whisper model '{spec.name}' ({spec.compute_type})")
+
+    def _resident(self) -> int:
+        return sum(entry.memory_bytes for entry in self._models.values())
+
+    def _event(self, kind: str, spec: ModelSpec, memory: int, **extra):
+        self.events.append(
+            {
+                "event": kind,
+                "model": spec.name,
+                "compute_type": spec.compute_type,
+                "memory_mb": memory / 1024 / 1024,
+                "at": time.time(),
+                **extra,
+            }
+        )
+
+    def stats(self) -> dict:
+        with self._lock:
+            models = [
+                {
+                    "model": entry.spec.name,
+                    "compute_type": entry.spec.compute_type,
+                    "memory_mb": entry.memory_bytes / 1024 / 1024,
+                    "load_time": entry.load_time,
+                    "loaded_at": entry.loaded_at,
+                    "uses": entry.uses,
+                    "pinned": entry.spec in self.pinned,
+                }
+                for entry in reversed(self._models.values())
+            ]
+            resident = self._resident()
+        return {
+            "memory_budget_mb": self.memory_budget / 1024 / 1024 or None,
+            "resident_mb": resident / 1024 / 1024,
+            "process_rss_mb": resident_memory() / 1024 / 1024,
+            "loads": self.loads,
+            "evictions": self.evictions,
+            "models": models,
+            "events": list(self.events),
+        }
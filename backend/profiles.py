@@ -0,0 +1,66 @@
+"""
+Named Whisper decode profiles, from cheapest to most accurate, and a policy
+that picks a cheaper one while the server is under load.
+"""
+
+import av
+
+# Per-profile decode settings, merged over WHISPER_OPTIONS (so also part of the
+# transcript cache key). "accurate" is faster-whisper's default: beam search
+# of 5 with temperature fallback 0.0-1.0 when a window fails its checks.
+DECODE_PROFILES = {
+    "fast": {"beam_size": 1, "temperature": 0.0},
+    "balanced": {"beam_size": 2, "temperature": (0.0, 0.4, 0.8)},
+    "accurate": {"beam_size": 5},
+}
+PROFILE_ORDER = tuple(DECODE_PROFILES)
+
+
+def probe_duration(audio_file) -> float | None:
+    """Duration in seconds from the container header, without decoding.
+    None if the file does not record one (e.g. browser webm recordings)."""
+    try:
+        with av.open(str(audio_file)) as container:
+            if container.duration:
+                return container.duration / av.time_base
+    except Exception:
+        pass
+    return None
+
+
+class AdaptiveProfilePolicy:
+    """Steps one profile cheaper each time a request sees backlog >=
+    high_water, and one back up each time it sees backlog <= low_water (the
+    gap keeps it from flapping). Audio longer than long_audio_seconds is
+    decoded one further step cheaper."""
+
+    def __init__(self, high_water: int, low_water: int, long_audio_seconds: float):
+        self.high_water = high_water
+        self.low_water = low_water
+        self.long_audio_seconds = long_audio_seconds
+        self.step_down = 0
+        self.choices = dict.fromkeys(PROFILE_ORDER, 0)
+
+    def choose(self, baseline: str, backlog: int, duration: float | None) -> str:
+        if backlog >= self.high_water:
+            self.step_down = min(self.step_down + 1, len(PROFILE_ORDER) - 1)
+        elif backlog <= self.low_water:
+            self.step_down = max(self.step_down - 1, 0)
+
+        steps = self.step_down
+        if duration and duration > self.long_audio_seconds:
+            steps += 1
+
+        index = max(0, PROFILE_ORDER.index(baseline) - steps)
+        profile = PROFILE_ORDER[index]
+        self.choices[profile] += 1
+        return profile
+
+    def stats(self) -> dict:
+        return {
+            "high_water": self.high_water,
+            "low_water": self.low_water,
+            "long_audio_seconds": self.long_audio_seconds,
+            "step_down": self.step_down,
+            "choices": dict(self.choices),
+        }
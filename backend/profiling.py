@@ -0,0 +1,372 @@
+"""
+Opt-in request profiling: a request sent with `X-Debug-Profile: 1` (or
+`?debug_profile=1`) runs under a sampling profiler and tracemalloc, and its
+flame graph (SVG plus folded stacks) and peak-allocation stats are stored
+under PROFILE_DIR, to fetch from /api/profiles/{id}.
+
+The profiler samples every thread (the event loop, the Whisper pool, ...),
+so concurrent requests show up too; only one request is profiled at a time.
+Time spent inside native code (CTranslate2, numpy) is attributed to the
+Python frame that called it.
+"""
+
+import asyncio
+import collections
+import html
+import json
+import re
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from pathlib import Path
+from urllib.parse import parse_qs
+
+from tracing import request_id
+
+PROFILE_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+# Leaf frames of threads that are waiting for work, not doing any
+IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+}
+TOP_FUNCTIONS = 15
+TOP_ALLOCATIONS = 10
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# SAMPLING PROFILER
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+def _label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Samples the Python stacks of all threads every interval seconds from
+    a background thread. stacks counts samples per folded stack
+    ("thread;outer;...;inner")."""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.stacks: collections.Counter[str] = collections.Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        names = {}
+        while not self._stop.wait(self.interval):
+            self.samples += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == self._thread.ident:
+                    continue
+                code = frame.f_code
+                if (Path(code.co_filename).name, code.co_name) in IDLE_FRAMES:
+                    continue
+                if thread_id not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                stack = []
+                while frame is not None:
+                    stack.append(_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def top_functions(self, limit: int = TOP_FUNCTIONS) -> list[dict]:
+        """Functions by self time (samples where they were the leaf frame)."""
+        leaves = collections.Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        return [
+            {"function": name, "samples": count, "seconds": count * self.interval}
+            for name, count in leaves.most_common(limit)
+        ]
+
+    def folded(self) -> str:
+        """Brendan Gregg's folded format, for flamegraph.pl / speedscope."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.items())
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# FLAME GRAPH
+# ═══════════════════════════════════════════════════════════════════════════════
+
+FLAME_WIDTH = 1200
+FLAME_ROW = 16
+FLAME_MIN_WIDTH = 0.5  # narrower frames are not drawn
+
+
+def _tree(stacks) -> dict:
+    root = {"count": 0, "children": {}}
+    for stack, count in stacks.items():
+        root["count"] += count
+        node = root
+        for name in stack.split(";"):
+            node = node["children"].setdefault(name, {"count": 0, "children": {}})
+            node["count"] += count
+    return root
+
+
+def _color(name: str) -> str:
+    # Stable warm colours, so a function keeps its colour across graphs
+    hue = sum(name.encode()) % 60
+    return f"hsl({hue}, 85%, 60%)"
+
+
+def flamegraph_svg(stacks, title: str, interval: float) -> str:
+    """A static flame graph (root at the bottom) with a tooltip per frame."""
+    root = _tree(stacks)
+    total = root["count"] or 1
+    scale = FLAME_WIDTH / total
+    rects = []
+    depth_max = 0
+
+    def draw(node, x, depth):
+        nonlocal depth_max
+        for name, child in sorted(node["children"].items()):
+            width = child["count"] * scale
+            if width >= FLAME_MIN_WIDTH:
+                depth_max = max(depth_max, depth)
+                rects.append((name, child["count"], x, depth, width))
+                draw(child, x, depth + 1)
+            x += width
+
+    draw(root, 0.0, 0)
+    height = (depth_max + 1) * FLAME_ROW + 40
+    header = (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{FLAME_WIDTH}" '
+        f'height="{height}" font-family="monospace" font-size="11">'
+    )
+    parts = [
+        header,
+        f'<text x="4" y="16" font-size="14">{html.escape(title)}</text>',
+    ]
+    for name, count, x, depth, width in rects:
+        y = height - (depth + 1) * FLAME_ROW
+        label = html.escape(name)
+        tooltip = f"{label}: {count} samples, {count * interval * 1000:.0f} ms"
+        # About 7 px per character at this font size
+        text = label[: int((width - 4) / 7)]
+        parts.append(
+            f'<g><title>{tooltip}</title><rect x="{x:.1f}" y="{y}" '
+            f'width="{width:.1f}" height="{FLAME_ROW - 1}" '
+            f'fill="{_color(name)}"/>'
+            + (f'<text x="{x + 2:.1f}" y="{y + 11}">{text}</text>' if text else "")
+            + "</g>"
+        )
+    parts.append("</svg>")
+    return "\n".join(parts)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# MEMORY
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+class AllocationTracker:
+    """tracemalloc over one request: peak traced memory and the lines that
+    still hold the most memory at the end. Leaves tracemalloc running if
+    something else started it."""
+
+    def __init__(self):
+        self._started = False
+        self._baseline = 0
+
+    def start(self):
+        self._started = not tracemalloc.is_tracing()
+        if self._started:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        self._baseline = tracemalloc.get_traced_memory()[0]
+
+    def stop(self) -> dict:
+        current, peak = tracemalloc.get_traced_memory()
+        # Leaving out the profiler's own samples
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, __file__)]
+        )
+        statistics = snapshot.statistics("lineno")
+        if self._started:
+            tracemalloc.stop()
+        return {
+            "peak_mb": (peak - self._baseline) / 1024 / 1024,
+            "retained_mb": (current - self._baseline) / 1024 / 1024,
+            "top_allocations": [
+                {
+                    "site": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                    "kb": stat.size / 1024,
+                    "blocks": stat.count,
+                }
+                for stat in statistics[:TOP_ALLOCATIONS]
+            ],
+        }
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# STORAGE
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+class ProfileStore:
+    """Profiles as {id}.json / .svg / .folded files, keeping the newest keep."""
+
+    FORMATS = {
+        "json": "application/json",
+        "svg": "image/svg+xml",
+        "folded": "text/plain",
+    }
+
+    def __init__(self, directory: str, keep: int = 50):
+        self.directory = Path(directory)
+        self.keep = keep
+
+    def save(self, profile_id: str, summary: dict, folded: str, svg: str):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        (self.directory / f"{profile_id}.folded").write_text(folded)
+        (self.directory / f"{profile_id}.svg").write_text(svg)
+        (self.directory / f"{profile_id}.json").write_text(
+            json.dumps(summary, indent=2)
+        )
+        self._prune()
+
+    def path(self, profile_id: str, fmt: str = "json") -> Path | None:
+        if not PROFILE_ID_PATTERN.match(profile_id) or fmt not in self.FORMATS:
+            return None
+        path = self.directory / f"{profile_id}.{fmt}"
+        return path if path.exists() else None
+
+    def _prune(self):
+        summaries = sorted(
+            self.directory.glob("*.json"), key=lambda path: path.stat().st_mtime
+        )
+        for summary in summaries[: max(0, len(summaries) - self.keep)]:
+            for fmt in self.FORMATS:
+                summary.with_suffix(f".{fmt}").unlink(missing_ok=True)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# MIDDLEWARE
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+def _stop(profiler: SamplingProfiler, allocations: AllocationTracker) -> dict:
+    profiler.stop()
+    return allocations.stop()
+
+
+def _wants_profile(scope) -> bool:
+    headers = dict(scope["headers"])
+    if headers.get(b"x-debug-profile", b"").lower() in (b"1", b"true"):
+        return True
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    return query.get("debug_profile", [""])[-1].lower() in ("1", "true")
+
+
+class RequestProfiling:
+    """ASGI middleware running opted-in requests under the profilers, until
+    the last response byte is sent. The response carries X-Profile: stored
+    and X-Profile-Id, or X-Profile: busy / disabled if it was not profiled."""
+
+    def __init__(self, app, store: ProfileStore, enabled: bool, interval: float):
+        self.app = app
+        self.store = store
+        self.enabled = enabled
+        self.interval = interval
+        self.profiled = 0
+        self._lock = threading.Lock()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _wants_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        if not self.enabled:
+            await self.app(scope, receive, self._tagged(send, b"disabled"))
+            return
+        if not self._lock.acquire(blocking=False):
+            await self.app(scope, receive, self._tagged(send, b"busy"))
+            return
+
+        profile_id = uuid.uuid4().hex
+        profiler = SamplingProfiler(self.interval)
+        allocations = AllocationTracker()
+        status = None
+
+        async def profiled_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await self._tagged(send, b"stored", profile_id)(message)
+
+        try:
+            allocations.start()
+            profiler.start()
+            start = time.perf_counter()
+            try:
+                await self.app(scope, receive, profiled_send)
+            finally:
+                elapsed = time.perf_counter() - start
+                # The snapshot, rendering and writing take a while: off the
+                # event loop, so other requests and streams keep going
+                memory = await asyncio.to_thread(_stop, profiler, allocations)
+            route = getattr(scope.get("route"), "path", scope["path"])
+            summary = {
+                "id": profile_id,
+                "request_id": request_id.get(),
+                "method": scope["method"],
+                "route": route,
+                "status": status,
+                "duration": elapsed,
+                "interval": self.interval,
+                "samples": profiler.samples,
+                "top_functions": profiler.top_functions(),
+                "memory": memory,
+            }
+            title = (
+                f"{scope['method']} {route} "
+                f"({elapsed:.2f}s, {profiler.samples} samples)"
+            )
+            try:
+                await asyncio.to_thread(
+                    self._save, profile_id, summary, profiler, title
+                )
+                self.profiled += 1
+                print(f"🔥 Profile {profile_id} saved ({route}, {elapsed:.2f}s)")
+            except OSError as e:
+                print(f"⚠️  Could not save profile: {e}")
+        finally:
+            self._lock.release()
+
+    def _save(self, profile_id, summary, profiler, title):
+        self.store.save(
+            profile_id,
+            summary,
+            profiler.folded(),
+            flamegraph_svg(profiler.stacks, title, self.interval),
+        )
+
+    @staticmethod
+    def _tagged(send, state: bytes, profile_id: str | None = None):
+        async def tagged_send(message):
+            if message["type"] == "http.response.start":
+                extra = [(b"x-profile", state)]
+                if profile_id:
+                    extra.append((b"x-profile-id", profile_id.encode()))
+                message = {**message, "headers": [*message.get("headers", []), *extra]}
+            await send(message)
+
+        return tagged_send
@@ -0,0 +1,91 @@
+"""
+Failure handling for calls to the LLM backend: a circuit breaker that skips
+calls while the backend is down, a retry budget that caps retries to a share
+of traffic, and jittered exponential backoff.
+"""
+
+import random
+import time
+
+
+def backoff_delay(attempt: int, base: float = 0.25, cap: float = 4.0) -> float:
+    """Full-jitter exponential backoff for the given retry attempt (1-based)."""
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+# What allow() hands calls made while the circuit is closed
+_CLOSED_PERMIT = object()
+
+
+class CircuitBreaker:
+    """Opens after failure_threshold consecutive failures. While open, calls
+    are refused; after reset_timeout one trial call is let through
+    (half-open) and its outcome closes or re-opens the circuit."""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        # The permit of the half-open trial call in flight, if any
+        self._trial: object | None = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> object | None:
+        """A permit for the call (pass it to release() when the call is
+        over), or None if the call must be skipped."""
+        state = self.state
+        if state == "closed":
+            return _CLOSED_PERMIT
+        if state == "half_open" and self._trial is None:
+            self._trial = object()
+            return self._trial
+        return None
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self._trial is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self._trial = None
+
+    def release(self, permit: object):
+        """Call once an allowed call is over, whatever happened. A trial
+        that ended without recording an outcome (an error that says nothing
+        about the backend's health, cancellation) then frees its slot, so
+        the next call can probe instead of the circuit staying half-open.
+        Only the trial's own permit frees it: a call let through while the
+        circuit was closed may end after it has gone half-open."""
+        if permit is self._trial:
+            self._trial = None
+
+
+class RetryBudget:
+    """Each call earns `ratio` retry tokens (up to max_tokens); each retry
+    spends one. Keeps retries to roughly ratio * traffic so a struggling
+    backend is not hit by a retry storm."""
+
+    def __init__(self, ratio: float = 0.2, max_tokens: float = 10.0):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+
+    def record_call(self):
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
@@ -0,0 +1,65 @@
+"""Shared fixtures: a TranscriptionService over a stub Whisper model and a
+scriptable LLM client, so service logic runs without models or a backend."""
+
+import types
+
+import pytest
+
+import models
+import transcription
+from transcription import TranscriptionService
+
+
+class StubWhisper:
+    def __init__(self, name, **kwargs):
+        self.name = name
+
+
+class StubCompletions:
+    """chat.completions stand-in: each call pops the next scripted outcome,
+    an exception to raise, a string to answer, or an awaitable to wait on."""
+
+    def __init__(self):
+        self.outcomes = []
+        self.calls = 0
+
+    async def create(self, stream=False, **request):
+        self.calls += 1
+        outcome = self.outcomes.pop(0) if self.outcomes else "cleaned"
+        if isinstance(outcome, BaseException):
+            raise outcome
+        if not isinstance(outcome, str):
+            outcome = await outcome
+        if stream:
+            return _stream(outcome)
+        message = types.SimpleNamespace(content=outcome)
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)])
+
+
+async def _stream(text):
+    for token in text.split(" "):
+        delta = types.SimpleNamespace(content=token + " ")
+        yield types.SimpleNamespace(
+            usage=None, choices=[types.SimpleNamespace(delta=delta)]
+        )
+
+
+@pytest.fixture
+def service(monkeypatch, tmp_path):
+    monkeypatch.setattr(transcription, "WhisperModel", StubWhisper)
+    monkeypatch.setattr(models, "BatchedInferencePipeline", lambda model: None)
+    service = TranscriptionService(
+        whisper_model="base.en",
+        llm_base_url="http://127.0.0.1:9/v1",
+        llm_api_key="test",
+        llm_model="test-model",
+        llm_circuit_threshold=2,
+        llm_circuit_reset=60,
+    )
+    completions = StubCompletions()
+    service.llm_client = types.SimpleNamespace(
+        chat=types.SimpleNamespace(completions=completions)
+    )
+    service.completions = completions
+    yield service
+    service.whisper_executor.shutdown()
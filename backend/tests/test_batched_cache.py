@@ -0,0 +1,128 @@
+"""Transcripts from the batched pipeline and from sequential decodes are not
+interchangeable, so they are cached under different keys."""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from batching import SAMPLE_RATE
+from ingest import DecodedAudio
+from transcription import BATCHED_MODE, decode_options
+
+SEQUENTIAL = {"text": "sequential", "segments": []}
+BATCHED = {"text": "batched", "segments": []}
+
+
+@pytest.fixture
+def audio():
+    return DecodedAudio(np.zeros(SAMPLE_RATE, dtype=np.float32), "digest")
+
+
+def _keys(service, audio):
+    options = decode_options(service.default_profile)
+    spec = service.default_model
+    sequential = service._transcript_key(audio, spec, options)
+    batched = service._transcript_key(audio, spec, options, *BATCHED_MODE)
+    return sequential, batched
+
+
+@pytest.fixture
+def batch_decodes(service, monkeypatch):
+    """Keys each _decode_batch call was asked to store its results under."""
+    calls = []
+
+    def decode_batch(audio_files, keys, batch_size):
+        calls.append(keys)
+        for key in keys:
+            service.transcript_cache.put(key, BATCHED)
+        return [{**BATCHED, "audio_duration": 1.0} for _ in audio_files]
+
+    monkeypatch.setattr(service, "_decode_batch", decode_batch)
+    return calls
+
+
+def test_batched_mode_changes_the_key(service, audio):
+    sequential, batched = _keys(service, audio)
+    assert sequential != batched
+
+
+def test_batch_does_not_serve_sequential_transcripts(service, audio, batch_decodes):
+    sequential, batched = _keys(service, audio)
+    service.transcript_cache.put(sequential, SEQUENTIAL)
+
+    [result] = service.transcribe_batch([audio])
+
+    assert result["text"] == "batched"
+    assert result["transcript_cache"] == "miss"
+    assert batch_decodes == [[batched]]
+    # The sequential entry is left as it was
+    assert service.transcript_cache.get(sequential) == SEQUENTIAL
+
+
+def test_batch_hits_its_own_entries(service, audio, batch_decodes):
+    service.transcribe_batch([audio])
+    [result] = service.transcribe_batch([audio])
+
+    assert result["transcript_cache"] == "hit"
+    assert len(batch_decodes) == 1
+
+
+def test_sequential_decode_does_not_serve_batch_transcripts(
+    service, audio, batch_decodes, monkeypatch
+):
+    monkeypatch.setattr(service, "_decode", lambda *args: SEQUENTIAL)
+    service.transcribe_batch([audio])
+
+    result = asyncio.run(service.transcribe_detailed_async(audio))
+
+    assert result["text"] == "sequential"
+    assert result["transcript_cache"] == "miss"
+
+
+class _Microbatcher:
+    """Stands in for MicroBatcher: records the cache key of each submit."""
+
+    def __init__(self, service):
+        self.service = service
+        self.keys = []
+
+    async def submit(self, item):
+        audio_file, key = item
+        self.keys.append(key)
+        self.service.transcript_cache.put(key, BATCHED)
+        return BATCHED
+
+
+def test_microbatched_request_uses_the_batched_key(service, audio):
+    sequential, batched = _keys(service, audio)
+    service.transcript_cache.put(sequential, SEQUENTIAL)
+    service.microbatcher = _Microbatcher(service)
+
+    result = asyncio.run(service.transcribe_detailed_async(audio))
+
+    assert result["text"] == "batched"
+    assert service.microbatcher.keys == [batched]
+
+
+def test_microbatched_transcript_is_not_a_sequential_hit(service, audio, monkeypatch):
+    service.microbatcher = _Microbatcher(service)
+    asyncio.run(service.transcribe_detailed_async(audio))
+
+    # Micro-batching turned off, or a request for another profile
+    service.microbatcher = None
+    monkeypatch.setattr(service, "_decode", lambda *args: SEQUENTIAL)
+    result = asyncio.run(service.transcribe_detailed_async(audio))
+
+    assert result["text"] == "sequential"
+    assert result["transcript_cache"] == "miss"
+
+
+def test_other_profiles_skip_the_microbatcher(service, audio, monkeypatch):
+    service.microbatcher = _Microbatcher(service)
+    monkeypatch.setattr(service, "_decode", lambda *args: SEQUENTIAL)
+
+    result = asyncio.run(service.transcribe_detailed_async(audio, profile="fast"))
+
+    assert result["text"] == "sequential"
+    assert service.microbatcher.keys == []
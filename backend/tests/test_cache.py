@@ -0,0 +1,126 @@
+import cache
+from cache import LRUCache, TranscriptCache, audio_digest, make_key
+from transcription import decode_options
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# KEYS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+def test_make_key_ignores_dict_order():
+    assert make_key("a", {"x": 1, "y": 2}) == make_key("a", {"y": 2, "x": 1})
+
+
+def test_make_key_changes_with_any_part():
+    base = make_key("digest", "base.en", "int8", {"beam_size": 5})
+    assert base != make_key("digest", "base.en", "int8", {"beam_size": 1})
+    assert base != make_key("digest", "small.en", "int8", {"beam_size": 5})
+    assert base != make_key("digest", "base.en", "float32", {"beam_size": 5})
+
+
+def test_audio_digest_of_a_path_matches_its_bytes(tmp_path, monkeypatch):
+    # Several hash blocks, the last one partial
+    monkeypatch.setattr(cache, "HASH_BLOCK_SIZE", 7)
+    data = bytes(range(50))
+    path = tmp_path / "audio.wav"
+    path.write_bytes(data)
+    assert audio_digest(str(path)) == audio_digest(data)
+
+
+def test_transcript_key_covers_model_and_decode_settings(service):
+    audio = b"\x00\x01" * 100
+    spec = service.default_model
+    fast = service._transcript_key(audio, spec, decode_options("fast"))
+    accurate = service._transcript_key(audio, spec, decode_options("accurate"))
+    assert fast != accurate
+    assert fast == service._transcript_key(audio, spec, decode_options("fast"))
+    assert fast != service._transcript_key(
+        audio, spec, decode_options("fast"), "long_audio", 60
+    )
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# LRU
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+def test_lru_evicts_the_least_recently_used():
+    lru = LRUCache(max_entries=2)
+    lru.put("a", 1)
+    lru.put("b", 2)
+    assert lru.get("a") == 1  # "b" is now the oldest
+    lru.put("c", 3)
+
+    assert lru.get("b") is None
+    assert lru.get("a") == 1
+    assert lru.get("c") == 3
+    assert lru.stats() == {
+        "entries": 2,
+        "max_entries": 2,
+        "hits": 3,
+        "misses": 1,
+    }
+
+
+def test_lru_with_no_entries_stores_nothing():
+    lru = LRUCache(max_entries=0)
+    lru.put("a", 1)
+    assert lru.get("a") is None
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# TRANSCRIPT CACHE ON DISK
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+def test_transcript_cache_survives_a_restart(tmp_path):
+    path = str(tmp_path / "cache" / "transcripts.db")
+    first = TranscriptCache(max_entries=4, disk_path=path)
+    first.put("key", {"text": "hello", "segments": []})
+    first.close()
+
+    second = TranscriptCache(max_entries=4, disk_path=path)
+    assert second.get("key") == {"text": "hello", "segments": []}
+    assert second.disk_hits == 1
+    # Promoted to memory: the second read does not touch SQLite
+    assert second.get("key") == {"text": "hello", "segments": []}
+    assert second.disk_hits == 1
+    second.close()
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# LLM CLEANING CACHE
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+def test_lru_entries_expire_after_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    lru = LRUCache(max_entries=4, ttl=10)
+    lru.put("a", 1)
+
+    now[0] = 110.0
+    assert lru.get("a") == 1
+    now[0] = 110.1
+    assert lru.get("a") is None
+    assert lru.stats()["expired"] == 1
+    # Dropped, not just hidden
+    assert lru.stats()["entries"] == 0
+
+
+def test_llm_key_ignores_whitespace_only_differences(service):
+    key = service._llm_cache_key("hello  world\n", "prompt")
+    assert key == service._llm_cache_key(" hello world", "prompt")
+    assert key != service._llm_cache_key("hello world", "other prompt")
+    assert key != service._llm_cache_key("hello, world", "prompt")
+
+
+def test_texts_sharing_an_llm_key_get_the_same_max_tokens(service):
+    # Long enough that max_tokens grows with the text
+    words = "word " * 400
+    padded = words.replace(" ", " \n\t ")
+    assert service._llm_cache_key(words, "p") == service._llm_cache_key(padded, "p")
+    assert (
+        service._llm_request(words, "p")["max_tokens"]
+        == service._llm_request(padded, "p")["max_tokens"]
+    )
@@ -0,0 +1,62 @@
+"""Long transcripts cleaned in concurrent chunks: cache accounting, and no
+chunk task outliving the request that started it."""
+
+import asyncio
+
+import pytest
+
+TEXT = "First one here. Second one here. Third one here."
+
+
+@pytest.fixture
+def chunked(service):
+    service.llm_chunk_chars = 20
+    return service
+
+
+def _hang():
+    return asyncio.Event().wait()
+
+
+def _chunk_tasks():
+    current = asyncio.current_task()
+    return [task for task in asyncio.all_tasks() if task is not current]
+
+
+def test_each_chunk_counts_one_miss(chunked):
+    cleaned = asyncio.run(chunked.clean_with_llm_async(TEXT))
+
+    assert cleaned == "cleaned cleaned cleaned"
+    assert chunked.llm_cache.misses == 3
+    # Served from the chunk entries the first run stored
+    asyncio.run(chunked.clean_with_llm_async(TEXT))
+    assert chunked.llm_cache.misses == 3
+    assert chunked.completions.calls == 3
+
+
+def test_cancelled_request_cancels_its_chunks(chunked):
+    chunked.completions.outcomes = [_hang(), _hang(), _hang()]
+
+    async def cancel_request():
+        request = asyncio.create_task(chunked.clean_with_llm_async(TEXT))
+        while chunked.completions.calls < 3:
+            await asyncio.sleep(0)
+        request.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await request
+        return _chunk_tasks()
+
+    assert asyncio.run(cancel_request()) == []
+
+
+def test_closed_stream_cancels_the_remaining_chunks(chunked):
+    chunked.completions.outcomes = ["first", _hang(), _hang()]
+
+    async def read_first_chunk():
+        stream = chunked.stream_clean_with_llm(TEXT)
+        assert await anext(stream) == "first"
+        # Client went away mid-stream
+        await stream.aclose()
+        return _chunk_tasks()
+
+    assert asyncio.run(read_first_chunk()) == []
@@ -0,0 +1,180 @@
+"""The benchmark regression gate (benchmark/compare.py)."""
+
+import csv
+import math
+import random
+
+import pytest
+
+from benchmark import compare
+
+
+def _runs_file(path, rows):
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=rows[0].keys())
+        writer.writeheader()
+        writer.writerows(rows)
+    return path
+
+
+def _runs(profile, seconds, audio_file="a.wav"):
+    rows = [
+        {"audio_file": audio_file, "run": i, "total_time": s}
+        for i, s in enumerate(seconds, start=1)
+    ]
+    if profile is not None:
+        for row in rows:
+            row["profile"] = profile
+    return rows
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# LOADING
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+def test_load_runs_groups_samples_and_profiles(tmp_path):
+    rows = _runs("fast", [1.0, 2.0]) + _runs("accurate", [3.0], "b.wav")
+    samples, profiles = compare.load_runs(
+        _runs_file(tmp_path / "runs.csv", rows), ["total_time"]
+    )
+
+    assert samples == {
+        ("a.wav", "total_time"): [1.0, 2.0],
+        ("b.wav", "total_time"): [3.0],
+    }
+    assert profiles == {"a.wav": {"fast"}, "b.wav": {"accurate"}}
+
+
+def test_runs_without_a_profile_column_are_unknown(tmp_path):
+    path = _runs_file(tmp_path / "runs.csv", _runs(None, [1.0]))
+    assert compare.load_runs(path, ["total_time"])[1] == {"a.wav": {""}}
+
+
+def test_summary_files_are_refused(tmp_path):
+    path = _runs_file(tmp_path / "summary.csv", [{"audio_file": "a.wav", "n_runs": 5}])
+    with pytest.raises(SystemExit):
+        compare.load_runs(path, ["total_time"])
+
+
+def test_profile_mismatches_per_audio_file():
+    baseline = {"a.wav": {"accurate"}, "b.wav": {"fast"}, "only_base.wav": {"fast"}}
+    candidate = {"a.wav": {"accurate"}, "b.wav": {"fast", "balanced"}}
+
+    assert compare.profile_mismatches(baseline, candidate) == [
+        ("b.wav", {"fast"}, {"fast", "balanced"})
+    ]
+
+
+def test_main_refuses_runs_with_different_profiles(tmp_path, monkeypatch):
+    baseline = _runs_file(tmp_path / "base.csv", _runs("accurate", [1.0] * 5))
+    candidate = _runs_file(tmp_path / "cand.csv", _runs("fast", [1.0] * 5))
+    monkeypatch.setattr("sys.argv", ["compare.py", str(baseline), str(candidate)])
+
+    with pytest.raises(SystemExit, match="different decode profiles"):
+        compare.main()
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# STATISTICS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+def test_u_distribution_covers_every_ordering():
+    for n, m in [(1, 1), (3, 4), (6, 6)]:
+        counts = compare._u_counts(n, m)
+        assert len(counts) == n * m + 1
+        assert sum(counts) == math.comb(n + m, n)
+        assert counts == counts[::-1]
+
+
+def test_exact_p_value():
+    # All 3 candidates slower: 1 of the C(6, 3) = 20 orderings
+    assert compare.mann_whitney_p([1, 2, 3], [4, 5, 6]) == pytest.approx(1 / 20)
+    assert compare.mann_whitney_p([4, 5, 6], [1, 2, 3]) == 1.0
+    # All tied: U is half the pairs, the middle of a symmetric distribution
+    assert compare.mann_whitney_p([1, 1, 1], [1, 1, 1]) == pytest.approx(0.5)
+
+
+def test_normal_approximation_tracks_the_exact_p_value(monkeypatch):
+    rng = random.Random(1)
+    baseline = [rng.gauss(1.0, 0.1) for _ in range(20)]
+    candidate = [rng.gauss(1.05, 0.1) for _ in range(20)]
+    exact = compare.mann_whitney_p(baseline, candidate)
+
+    monkeypatch.setattr(compare, "EXACT_MAX_PAIRS", 0)
+    approximate = compare.mann_whitney_p(baseline, candidate)
+
+    assert 0 < exact < 0.5
+    assert approximate == pytest.approx(exact, abs=0.01)
+
+
+def test_bootstrap_interval_brackets_the_delta():
+    rng = random.Random(2)
+    baseline = [rng.gauss(1.0, 0.05) for _ in range(10)]
+    candidate = [rng.gauss(1.2, 0.05) for _ in range(10)]
+    low, high = compare.bootstrap_ci(baseline, candidate, 0.95, 2000, random.Random(0))
+
+    assert 0.1 < low < compare.relative_delta(baseline, candidate) < high < 0.3
+
+
+def test_bootstrap_of_constant_samples_is_exact():
+    low, high = compare.bootstrap_ci([2.0] * 5, [3.0] * 5, 0.95, 100, random.Random(0))
+    assert low == pytest.approx(0.5)
+    assert high == pytest.approx(0.5)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# VERDICTS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+ONE_SECOND = [1.0, 1.01, 0.99, 1.02, 0.98]
+FIVE_PERCENT_SLOWER = [1.05, 1.06, 1.04, 1.07, 1.03]
+FIFTY_PERCENT_SLOWER = [1.5, 1.51, 1.49, 1.52, 1.48]
+
+
+def _verdict(baseline, candidate, threshold=0.1):
+    rows = compare.compare(
+        {("a.wav", "total_time"): baseline},
+        {("a.wav", "total_time"): candidate},
+        ["total_time"],
+        threshold,
+        alpha=0.05,
+        resamples=1000,
+        seed=0,
+    )
+    [row] = rows
+    return row["verdict"]
+
+
+def test_clear_slowdown_is_a_regression():
+    assert _verdict(ONE_SECOND, FIFTY_PERCENT_SLOWER) == "regression"
+
+
+def test_clear_speedup_is_an_improvement():
+    assert _verdict(FIFTY_PERCENT_SLOWER, ONE_SECOND) == "improvement"
+
+
+def test_slowdown_under_the_threshold_is_no_change():
+    assert _verdict(ONE_SECOND, FIVE_PERCENT_SLOWER) == "no change"
+    assert _verdict(ONE_SECOND, FIVE_PERCENT_SLOWER, threshold=0.01) == "regression"
+
+
+def test_too_few_runs_can_never_be_significant():
+    assert _verdict(ONE_SECOND[:2], FIFTY_PERCENT_SLOWER[:2]) == "no change"
+
+
+def test_only_common_files_and_selected_stages_are_compared():
+    rows = compare.compare(
+        {("a.wav", "llm_time"): [1.0], ("a.wav", "total_time"): [1.0]},
+        {("a.wav", "total_time"): [1.0], ("b.wav", "total_time"): [1.0]},
+        ["total_time"],
+        0.1,
+        0.05,
+        10,
+        0,
+    )
+    assert [(row["audio_file"], row["stage"]) for row in rows] == [
+        ("a.wav", "total_time")
+    ]
@@ -0,0 +1,188 @@
+"""Upload decoding: buffers sized from what the upload can hold rather than
+what its header claims, and the 413 / 415 / 400 responses around it."""
+
+import io
+import struct
+import wave
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+import app as app_module
+import ingest
+from ingest import UnsupportedUploadError, UploadLimit, decode_upload
+
+
+def _wav(frames: int, rate: int = 16000, channels: int = 1) -> bytes:
+    data = io.BytesIO()
+    with wave.open(data, "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(b"\x00\x40" * frames * channels)
+    return data.getvalue()
+
+
+def _lying_wav(frames: int, rate: int = 16000) -> bytes:
+    """A WAV whose data chunk claims about 2 GB."""
+    data = bytearray(_wav(frames, rate))
+    data[40:44] = struct.pack("<I", 0x7FFFFFF0)
+    return bytes(data)
+
+
+@pytest.fixture
+def capacities(monkeypatch):
+    """Initial capacity of every sample buffer created."""
+    created = []
+
+    class RecordingBuffer(ingest._SampleBuffer):
+        def __init__(self, capacity):
+            created.append(capacity)
+            super().__init__(capacity)
+
+    monkeypatch.setattr(ingest, "_SampleBuffer", RecordingBuffer)
+    return created
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# DECODING
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+def test_wav_decodes_on_the_fast_path(capacities):
+    decoded = decode_upload(io.BytesIO(_wav(16000, channels=2)), "a.wav")
+
+    assert decoded.duration == 1.0
+    assert decoded.samples[0] == pytest.approx(0.5)
+    assert capacities == [16000]
+
+
+def test_wav_header_cannot_inflate_the_buffer(capacities):
+    upload = _lying_wav(16000)
+    decoded = decode_upload(io.BytesIO(upload), "a.wav")
+
+    assert len(decoded.samples) == 16000
+    assert capacities == [len(upload) // 2]
+
+
+def test_peak_bytes_counts_the_block_actually_read():
+    upload = _wav(8000)
+    decoded = decode_upload(io.BytesIO(upload), "a.wav")
+
+    # The samples, the block converted to float32, and the 16 KB block read
+    # (not a whole 1 MB READ_BLOCK_SIZE)
+    assert decoded.size == len(upload)
+    assert decoded.peak_bytes == 2 * 8000 * 4 + len(upload)
+    assert decoded.upload_stats() == {
+        "bytes": len(upload),
+        "peak_buffered_bytes": decoded.peak_bytes,
+    }
+
+
+def test_raw_pcm_is_sized_from_the_upload(capacities):
+    decoded = decode_upload(io.BytesIO(b"\x00\x40" * 800 + b"\x00"), "a.pcm")
+
+    assert len(decoded.samples) == 800
+    assert capacities == [800]
+    assert decoded.peak_bytes == 2 * 800 * 4 + 1601
+
+
+def test_decoder_preallocation_is_capped_then_grows(monkeypatch, capacities):
+    monkeypatch.setattr(ingest, "MAX_PREALLOCATED_SAMPLES", 1000)
+    # Not 16 kHz, so it goes through FFmpeg and the resampler
+    decoded = decode_upload(io.BytesIO(_wav(8000, rate=8000)), "a.wav")
+
+    assert capacities == [1000]
+    assert len(decoded.samples) == pytest.approx(16000, abs=100)
+
+
+def test_allocation_failure_is_a_decode_error(monkeypatch):
+    def no_memory(capacity):
+        raise MemoryError
+
+    monkeypatch.setattr(ingest, "_SampleBuffer", no_memory)
+    with pytest.raises(ValueError, match="too long"):
+        decode_upload(io.BytesIO(_wav(100)), "a.wav")
+
+
+def test_non_audio_type_is_rejected_before_reading():
+    upload = io.BytesIO(b"not read")
+    with pytest.raises(UnsupportedUploadError):
+        decode_upload(upload, "notes.txt", "text/plain")
+    assert upload.tell() == 0
+
+
+def test_undecodable_upload_is_a_value_error():
+    with pytest.raises(ValueError, match="Could not decode"):
+        decode_upload(io.BytesIO(b"\x00" * 64), "a.mp3", "audio/mpeg")
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# HTTP
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+@pytest.fixture
+def limited_client():
+    upload_app = FastAPI()
+
+    @upload_app.post("/upload")
+    async def upload(request: Request):
+        return {"bytes": len(await request.body())}
+
+    return TestClient(UploadLimit(upload_app, max_bytes=1024))
+
+
+def test_upload_within_the_limit_passes(limited_client):
+    response = limited_client.post("/upload", content=b"x" * 100)
+    assert response.json() == {"bytes": 100}
+
+
+def test_declared_oversize_upload_gets_413(limited_client):
+    response = limited_client.post("/upload", content=b"x" * 2048)
+    assert response.status_code == 413
+
+
+def test_chunked_oversize_upload_gets_413(limited_client):
+    def body():
+        for _ in range(4):
+            yield b"x" * 512
+
+    # A generator body is sent chunked, without a Content-Length
+    response = limited_client.post("/upload", content=body())
+    assert response.status_code == 413
+
+
+@pytest.fixture
+def client(service, monkeypatch):
+    monkeypatch.setattr(app_module, "service", service)
+    return TestClient(app_module.app)
+
+
+def test_transcribe_rejects_non_audio_with_415(client):
+    response = client.post(
+        "/api/transcribe", files={"audio": ("notes.txt", b"hello", "text/plain")}
+    )
+    assert response.status_code == 415
+
+
+def test_transcribe_rejects_undecodable_audio_with_400(client):
+    response = client.post(
+        "/api/transcribe", files={"audio": ("a.mp3", b"\x00" * 64, "audio/mpeg")}
+    )
+    assert response.status_code == 400
+
+
+def test_full_pipeline_rejects_non_audio_with_415(client):
+    response = client.post(
+        "/api/full", files={"audio": ("notes.txt", b"hello", "text/plain")}
+    )
+    assert response.status_code == 415
+
+
+def test_full_pipeline_rejects_unknown_profile_with_400(client):
+    response = client.post(
+        "/api/full?profile=nope", files={"audio": ("a.wav", b"RIFF", "audio/wav")}
+    )
+    assert response.status_code == 400
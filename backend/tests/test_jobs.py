@@ -0,0 +1,76 @@
+"""Job submissions are turned away while the queue is full, before their
+upload is read."""
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app as app_module
+from jobs import JobAdmission, JobQueue
+
+
+@pytest.fixture
+def full_queue(service):
+    queue = JobQueue(service, max_queued=1)
+    queue.submit(object())
+    return queue
+
+
+def _call(middleware, method="POST", path="/api/jobs"):
+    reads = []
+    sent = []
+
+    async def receive():
+        reads.append(True)
+        return {"type": "http.request", "body": b"audio", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": method, "path": path, "headers": []}
+    asyncio.run(middleware(scope, receive, send))
+    return sent[0]["status"], dict(sent[0]["headers"]), reads
+
+
+async def _endpoint(scope, receive, send):
+    await receive()
+    await send({"type": "http.response.start", "status": 202, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+def test_full_queue_rejects_before_reading_the_upload(full_queue):
+    status, headers, reads = _call(
+        JobAdmission(_endpoint, "/api/jobs", lambda: full_queue)
+    )
+
+    assert status == 429
+    assert headers[b"retry-after"] == str(full_queue.retry_after()).encode()
+    assert reads == []
+
+
+@pytest.mark.parametrize(
+    "method, path", [("POST", "/api/transcribe"), ("GET", "/api/jobs")]
+)
+def test_other_requests_pass_a_full_queue(full_queue, method, path):
+    middleware = JobAdmission(_endpoint, "/api/jobs", lambda: full_queue)
+
+    assert _call(middleware, method, path)[0] == 202
+
+
+def test_queue_with_room_or_not_started_lets_submissions_through(service):
+    assert _call(JobAdmission(_endpoint, "/api/jobs", lambda: None))[0] == 202
+    queue = JobQueue(service, max_queued=1)
+    assert _call(JobAdmission(_endpoint, "/api/jobs", lambda: queue))[0] == 202
+
+
+def test_app_answers_429_while_the_job_queue_is_full(monkeypatch, full_queue):
+    monkeypatch.setattr(app_module, "job_queue", full_queue)
+
+    response = TestClient(app_module.app).post(
+        "/api/jobs", files={"audio": ("a.wav", b"RIFF" + bytes(1024), "audio/wav")}
+    )
+
+    assert response.status_code == 429
+    assert response.json() == {"detail": "Job queue is full"}
+    assert "retry-after" in response.headers
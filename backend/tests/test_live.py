@@ -0,0 +1,231 @@
+"""Live transcription: words are committed once two consecutive decodes agree
+on them, repeats of committed words are dropped and the buffer is cut at
+committed sentences."""
+
+import asyncio
+import types
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+import app as app_module
+from batching import SAMPLE_RATE
+from live import LiveSession, agreed_prefix
+from transcription import TranscriptWord
+
+
+def _words(text, start=0.0, step=0.5):
+    return [
+        TranscriptWord(f" {word}", start + i * step, start + (i + 1) * step)
+        for i, word in enumerate(text.split())
+    ]
+
+
+def _service(*decodes):
+    """A service whose successive decodes return the given word lists."""
+    pending = list(decodes)
+    prompts = []
+
+    async def transcribe_words_async(samples, prompt=None, profile=None):
+        prompts.append(prompt)
+        return pending.pop(0)
+
+    async def clean_with_llm_async(text):
+        return text.upper()
+
+    return types.SimpleNamespace(
+        transcribe_words_async=transcribe_words_async,
+        clean_with_llm_async=clean_with_llm_async,
+        prompts=prompts,
+    )
+
+
+async def _session(service, min_chunk_seconds=3600, **options):
+    events = []
+
+    async def send(event):
+        events.append(event)
+
+    # By default decodes are stepped by hand, never from the background task
+    session = LiveSession(service, send, min_chunk_seconds=min_chunk_seconds, **options)
+    return session, events
+
+
+async def _fail_decode(*args, **kwargs):
+    raise RuntimeError("decoder crashed")
+
+
+def _seconds(seconds):
+    return np.zeros(int(seconds * SAMPLE_RATE), dtype="<i2").tobytes()
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# LOCAL AGREEMENT
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+def test_agreement_ignores_case_and_punctuation():
+    previous = _words("hello world this is")
+    assert agreed_prefix(previous, _words("Hello, world! This was")) == 3
+    assert agreed_prefix(previous, _words("yellow world")) == 0
+    assert agreed_prefix([], _words("hello")) == 0
+
+
+def test_words_commit_once_two_decodes_agree():
+    service = _service(
+        _words("hello world this"),
+        _words("Hello, world. This is"),
+        _words("Hello, world. This is it"),
+    )
+
+    async def stream():
+        session, events = await _session(service)
+        session.feed(_seconds(1))
+        await session._step()
+        session.feed(_seconds(1))
+        await session._step()
+        # The stream ends with audio left: decoded once more, all committed
+        session.feed(_seconds(1))
+        done = await session.finish()
+        return events, done
+
+    events, done = asyncio.run(stream())
+
+    assert [(event["type"], event.get("text")) for event in events] == [
+        ("partial", "hello world this"),
+        ("final", "Hello, world. This"),
+        ("partial", "is"),
+        ("final", "is it"),
+        ("partial", ""),
+        ("done", "Hello, world. This is it"),
+    ]
+    assert done["decodes"] == 3
+    assert done["audio_duration"] == 3.0
+
+
+def test_end_of_stream_commits_the_last_hypothesis():
+    service = _service(_words("one two"))
+
+    async def stream():
+        session, events = await _session(service)
+        session.feed(_seconds(1))
+        await session._step()
+        return await session.finish()
+
+    assert asyncio.run(stream())["text"] == "one two"
+
+
+def test_repeated_committed_words_are_dropped():
+    async def new_words():
+        session, _ = await _session(_service())
+        session.committed = _words("so we went home.")
+        # The decode restarts two words before the committed end
+        return session._new_words(_words("went home. And then", start=1.0))
+
+    assert [word.word for word in asyncio.run(new_words())] == [" And", " then"]
+
+
+def test_committed_sentences_are_cleaned_in_order():
+    service = _service(_words("First one. Second"), _words("First one. Second one."))
+
+    async def stream():
+        session, events = await _session(service, use_llm=True)
+        session.feed(_seconds(1))
+        await session._step()
+        await session._step()
+        done = await session.finish()
+        return events, done
+
+    events, done = asyncio.run(stream())
+
+    cleaned = [event for event in events if event["type"] == "cleaned"]
+    assert [(event["index"], event["text"]) for event in cleaned] == [
+        (0, "FIRST ONE."),
+        (1, "SECOND ONE."),
+    ]
+    assert done["cleaned_text"] == "FIRST ONE. SECOND ONE."
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# BUFFER TRIMMING
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+def test_buffer_is_cut_at_the_last_committed_sentence():
+    service = _service(_words("a b c d."), _words("a b c d. e"), _words("e f"))
+
+    async def stream():
+        session, _ = await _session(service, trim_seconds=1)
+        session.feed(_seconds(3))
+        await session._step()
+        await session._step()
+        offset, buffered = session.offset, len(session.buffer) / SAMPLE_RATE
+        # Audio before the cut reaches Whisper as its prompt instead
+        await session._step()
+        return offset, buffered
+
+    offset, buffered = asyncio.run(stream())
+    assert offset == 2.0
+    assert buffered == 1.0
+    assert service.prompts == ["", "", "a b c d."]
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# FAILURES
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+def test_failed_decode_ends_the_session():
+    service = _service()
+    service.transcribe_words_async = _fail_decode
+
+    async def stream():
+        session, events = await _session(service, min_chunk_seconds=0.5)
+        session.feed(_seconds(1))
+        await session._decoder
+        # Later audio is dropped instead of piling up undecoded
+        session.feed(_seconds(1))
+        with pytest.raises(RuntimeError):
+            await session.finish()
+        return session, events
+
+    session, events = asyncio.run(stream())
+    assert events == [{"type": "error", "error": "decoder crashed"}]
+    assert session.received == SAMPLE_RATE
+    assert session.frames == []
+
+
+@pytest.fixture
+def client(service, monkeypatch):
+    monkeypatch.setattr(app_module, "service", service)
+    return TestClient(app_module.app)
+
+
+def test_websocket_ignores_frames_that_are_not_json_objects(client):
+    with client.websocket_connect("/ws/transcribe") as websocket:
+        for frame in ("not json", "[]", '"end"', "{}"):
+            websocket.send_text(frame)
+        websocket.send_json({"type": "end"})
+        done = websocket.receive_json()
+
+    assert done["type"] == "done"
+    assert done["text"] == ""
+
+
+def test_websocket_reports_a_failed_decode(client, service, monkeypatch):
+    monkeypatch.setattr(service, "transcribe_words_async", _fail_decode)
+    monkeypatch.setattr(app_module, "LIVE_MIN_CHUNK_SECONDS", 0.5)
+
+    with client.websocket_connect("/ws/transcribe") as websocket:
+        websocket.send_bytes(_seconds(1))
+        assert websocket.receive_json() == {
+            "type": "error",
+            "error": "decoder crashed",
+        }
+        websocket.send_bytes(_seconds(1))
+        with pytest.raises(WebSocketDisconnect) as closed:
+            websocket.receive_json()
+
+    assert closed.value.code == 1011
@@ -0,0 +1,71 @@
+"""Long-audio mode: where the speech chunks are decoded, and how their
+segments are placed on the file's timeline."""
+
+import asyncio
+import types
+
+import numpy as np
+import pytest
+
+import transcription
+from batching import SAMPLE_RATE
+from ingest import DecodedAudio
+
+# Two speech chunks, at 0 s and 10 s of a 20 s recording
+CHUNKS = [(0, 2 * SAMPLE_RATE), (10 * SAMPLE_RATE, 12 * SAMPLE_RATE)]
+
+
+@pytest.fixture
+def long_service(service, monkeypatch):
+    monkeypatch.setattr(transcription, "speech_chunks", lambda audio, seconds: CHUNKS)
+    return service
+
+
+def _decode(service, spec=None):
+    audio = DecodedAudio(np.zeros(20 * SAMPLE_RATE, dtype=np.float32), "digest")
+    spec = spec or service.default_model
+    result, _ = asyncio.run(service._decode_long(audio, spec, {}))
+    return result
+
+
+def test_chunks_go_to_the_worker_processes(long_service):
+    decoded = []
+
+    async def transcribe(audio, options):
+        decoded.append(len(audio))
+        segment = {"text": " hi", "start": 0.5, "end": 1.25}
+        return {"text": "hi", "segments": [segment]}
+
+    long_service.worker_pool = types.SimpleNamespace(
+        workers=[None, None], threads=1, transcribe=transcribe
+    )
+    result = _decode(long_service)
+
+    assert decoded == [2 * SAMPLE_RATE, 2 * SAMPLE_RATE]
+    assert [(s["start"], s["end"]) for s in result["segments"]] == [
+        (0.5, 1.25),
+        (10.5, 11.25),
+    ]
+    assert result["silence_ratio"] == pytest.approx(0.8)
+
+
+def test_other_models_stay_in_process(long_service, monkeypatch):
+    def decode_chunk(audio, offset, spec, options):
+        return [{"text": spec.name, "start": offset, "end": offset + 1}]
+
+    monkeypatch.setattr(long_service, "_decode_chunk", decode_chunk)
+    long_service.worker_pool = types.SimpleNamespace(workers=[None], threads=4)
+    spec = transcription.ModelSpec("small.en", "int8")
+    result = _decode(long_service, spec)
+
+    assert result["text"] == "small.en small.en"
+
+
+def test_sequential_chunk_decoding_is_logged(long_service, monkeypatch, capsys):
+    monkeypatch.setattr(long_service, "_decode_chunk", lambda *args: [])
+    _decode(long_service)
+    assert "one at a time" in capsys.readouterr().out
+
+    long_service.whisper_concurrency = 4
+    _decode(long_service)
+    assert "in parallel" in capsys.readouterr().out
@@ -0,0 +1,38 @@
+import pytest
+
+import profiles
+from benchmark import matrix
+
+
+@pytest.fixture(autouse=True)
+def decode_profiles():
+    before = dict(profiles.DECODE_PROFILES)
+    yield profiles.DECODE_PROFILES
+    profiles.DECODE_PROFILES.clear()
+    profiles.DECODE_PROFILES.update(before)
+
+
+def test_benchmark_profile_leaves_builtin_profiles_alone(decode_profiles):
+    before = dict(decode_profiles)
+
+    profile = matrix.register_profile({"beam_size": 5})
+
+    assert profile not in before
+    assert decode_profiles[profile] == {"beam_size": 5}
+    assert {name: decode_profiles[name] for name in before} == before
+
+
+def test_benchmark_profile_never_replaces_an_existing_one(decode_profiles):
+    decode_profiles["matrix_beam_2"] = {"beam_size": 2, "temperature": 0.0}
+
+    with pytest.raises(ValueError):
+        matrix.register_profile({"beam_size": 2})
+    assert matrix.register_profile({"beam_size": 1}) == "matrix_beam_1"
+
+
+def test_settings_come_from_the_benchmark_script():
+    runner = matrix._load_runner()
+
+    assert runner.__file__ == str(matrix.BENCHMARK_DIR / "benchmark.py")
+    assert matrix.AUDIO_FILES == runner.AUDIO_FILES
+    assert matrix.percentile([1, 2, 3, 4], 50) == runner.percentile([1, 2, 3, 4], 50)
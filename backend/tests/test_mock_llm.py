@@ -0,0 +1,88 @@
+"""The benchmark's mock LLM server (benchmark/mock_llm.py): injected hangs
+must not hold a generation slot, and stopping it must not wait on them."""
+
+import asyncio
+import subprocess
+
+import httpx
+import pytest
+
+from benchmark import mock_llm
+from benchmark.mock_llm import LatencyProfile, create_app
+
+REQUEST = {"model": "mock", "messages": [{"role": "user", "content": "hi there"}]}
+
+
+def _client(profile):
+    transport = httpx.ASGITransport(app=create_app(profile))
+    return httpx.AsyncClient(transport=transport, base_url="http://mock")
+
+
+def test_reply_echoes_the_user_message():
+    async def complete():
+        async with _client(LatencyProfile()) as client:
+            return (await client.post("/v1/chat/completions", json=REQUEST)).json()
+
+    reply = asyncio.run(complete())
+    assert reply["choices"][0]["message"]["content"] == "hi there"
+    assert reply["usage"]["completion_tokens"] == 2
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_hung_request_does_not_block_the_queue(stream):
+    # Seed 1 draws 0.13 then 0.85: the first request hangs, the second not
+    profile = LatencyProfile(parallel=1, timeout_rate=0.5, hang_seconds=300, seed=1)
+
+    async def hang_then_complete():
+        async with _client(profile) as client:
+            body = {**REQUEST, "stream": stream}
+            hung = asyncio.create_task(client.post("/v1/chat/completions", json=body))
+            while (await client.get("/mock/stats")).json()["timeouts"] == 0:
+                await asyncio.sleep(0)
+            response = await asyncio.wait_for(
+                client.post("/v1/chat/completions", json=body), timeout=5
+            )
+            stats = (await client.get("/mock/stats")).json()
+            hung.cancel()
+            return response, stats
+
+    response, stats = asyncio.run(hang_then_complete())
+    assert response.status_code == 200
+    assert "there" in response.text
+    assert stats["timeouts"] == 1
+
+
+class _StuckProcess:
+    """A mock server process that ignores SIGTERM."""
+
+    def __init__(self, *args, **kwargs):
+        self.signals = []
+
+    def poll(self):
+        return None
+
+    def terminate(self):
+        self.signals.append("terminate")
+
+    def kill(self):
+        self.signals.append("kill")
+
+    def wait(self, timeout=None):
+        if "kill" not in self.signals:
+            raise subprocess.TimeoutExpired("mock_llm", timeout)
+        return -9
+
+
+def test_stuck_server_is_killed_on_exit(monkeypatch):
+    processes = []
+
+    def popen(*args, **kwargs):
+        processes.append(_StuckProcess())
+        return processes[-1]
+
+    monkeypatch.setattr(mock_llm.subprocess, "Popen", popen)
+    monkeypatch.setattr(mock_llm.urllib.request, "urlopen", lambda *a, **k: None)
+
+    with mock_llm.running("instant", port=8999) as base_url:
+        assert base_url == "http://localhost:8999/v1"
+    assert processes[0].signals == ["terminate", "kill"]
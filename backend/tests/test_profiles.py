@@ -0,0 +1,74 @@
+"""The adaptive decode-profile policy: stepping down under backlog, back up
+once it drains, and one step further for long audio."""
+
+import numpy as np
+import pytest
+
+from batching import SAMPLE_RATE
+from ingest import DecodedAudio
+from profiles import PROFILE_ORDER, AdaptiveProfilePolicy
+
+
+@pytest.fixture
+def policy():
+    return AdaptiveProfilePolicy(high_water=4, low_water=2, long_audio_seconds=600)
+
+
+def test_profiles_run_from_cheapest_to_most_accurate():
+    assert PROFILE_ORDER == ("fast", "balanced", "accurate")
+
+
+def test_steps_down_one_profile_per_loaded_request(policy):
+    picks = [policy.choose("accurate", backlog=4, duration=None) for _ in range(3)]
+    # Never below the cheapest profile
+    assert picks == ["balanced", "fast", "fast"]
+    assert policy.step_down == 2
+
+
+def test_holds_between_the_water_marks(policy):
+    policy.choose("accurate", backlog=5, duration=None)
+    assert policy.choose("accurate", backlog=3, duration=None) == "balanced"
+    assert policy.step_down == 1
+
+
+def test_steps_back_up_once_the_backlog_drains(policy):
+    for _ in range(2):
+        policy.choose("accurate", backlog=4, duration=None)
+    picks = [policy.choose("accurate", backlog=2, duration=None) for _ in range(3)]
+    assert picks == ["balanced", "accurate", "accurate"]
+    assert policy.step_down == 0
+
+
+def test_long_audio_goes_one_step_further(policy):
+    assert policy.choose("accurate", backlog=0, duration=601) == "balanced"
+    assert policy.choose("accurate", backlog=0, duration=600) == "accurate"
+    # The extra step does not stick
+    assert policy.step_down == 0
+
+
+def test_steps_are_relative_to_the_baseline(policy):
+    assert policy.choose("balanced", backlog=4, duration=None) == "fast"
+    assert policy.choose("fast", backlog=0, duration=601) == "fast"
+
+
+def test_choices_are_counted(policy):
+    policy.choose("accurate", backlog=0, duration=None)
+    policy.choose("accurate", backlog=4, duration=None)
+    assert policy.stats()["choices"] == {"fast": 0, "balanced": 1, "accurate": 1}
+
+
+def test_service_honors_an_explicit_profile(service):
+    service.profile_policy = AdaptiveProfilePolicy(0, -1, 600)
+    assert service.resolve_profile("accurate") == "accurate"
+    assert service.resolve_profile() == "balanced"
+
+
+def test_service_feeds_backlog_and_duration_to_the_policy(service):
+    service.profile_policy = AdaptiveProfilePolicy(4, 2, long_audio_seconds=1)
+    audio = DecodedAudio(np.zeros(2 * SAMPLE_RATE, dtype=np.float32), "digest")
+    service.whisper_backlog = 4
+
+    assert service.resolve_profile(audio_file=audio) == "fast"
+    assert service.resolve_profile() == "fast"
+    with pytest.raises(ValueError):
+        service.resolve_profile("nope")
@@ -0,0 +1,89 @@
+"""Opt-in request profiling: what the middleware stores, and that the
+post-request work (snapshot, flame graph, files) stays off the event loop."""
+
+import threading
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import profiling
+from profiling import ProfileStore, RequestProfiling
+
+
+@pytest.fixture
+def threads(monkeypatch):
+    """Thread each step ran on: the request handler, the allocation snapshot
+    and the flame graph rendering."""
+    seen = {}
+
+    def on_thread(name, fn):
+        def wrapper(*args, **kwargs):
+            seen[name] = threading.get_ident()
+            return fn(*args, **kwargs)
+
+        return wrapper
+
+    tracker_stop = profiling.AllocationTracker.stop
+    monkeypatch.setattr(
+        profiling.AllocationTracker, "stop", on_thread("snapshot", tracker_stop)
+    )
+    monkeypatch.setattr(
+        profiling, "flamegraph_svg", on_thread("render", profiling.flamegraph_svg)
+    )
+    return seen
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ProfileStore(str(tmp_path), keep=2)
+
+
+def _client(store, threads, enabled=True):
+    app = FastAPI()
+
+    @app.get("/work")
+    async def work():
+        threads["handler"] = threading.get_ident()
+        return {"total": sum(range(10_000))}
+
+    return TestClient(RequestProfiling(app, store, enabled, interval=0.001))
+
+
+def test_profiled_request_is_stored(store, threads):
+    response = _client(store, threads).get("/work", headers={"X-Debug-Profile": "1"})
+
+    assert response.json() == {"total": 49995000}
+    assert response.headers["x-profile"] == "stored"
+    profile_id = response.headers["x-profile-id"]
+    for fmt in ProfileStore.FORMATS:
+        assert store.path(profile_id, fmt) is not None
+
+
+def test_snapshot_and_save_run_off_the_event_loop(store, threads):
+    _client(store, threads).get("/work?debug_profile=1")
+
+    assert threads["snapshot"] != threads["handler"]
+    assert threads["render"] != threads["handler"]
+
+
+def test_requests_without_the_header_are_not_profiled(store, threads):
+    response = _client(store, threads).get("/work")
+
+    assert "x-profile" not in response.headers
+    assert list(store.directory.glob("*")) == []
+
+
+def test_disabled_profiling_says_so(store, threads):
+    response = _client(store, threads, enabled=False).get(
+        "/work", headers={"X-Debug-Profile": "true"}
+    )
+    assert response.headers["x-profile"] == "disabled"
+
+
+def test_store_keeps_the_newest_profiles(store, threads):
+    client = _client(store, threads)
+    for _ in range(3):
+        client.get("/work?debug_profile=1")
+
+    assert len(list(store.directory.glob("*.json"))) == 2
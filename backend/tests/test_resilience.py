@@ -0,0 +1,214 @@
+import asyncio
+
+import httpx
+import openai
+import pytest
+
+from resilience import CircuitBreaker, RetryBudget, backoff_delay
+
+
+def _half_open(breaker):
+    breaker.opened_at -= breaker.reset_timeout
+
+
+def _bad_request():
+    request = httpx.Request("POST", "http://llm/v1/chat/completions")
+    response = httpx.Response(400, request=request)
+    return openai.BadRequestError("bad request", response=response, body=None)
+
+
+def _connection_error():
+    request = httpx.Request("POST", "http://llm/v1/chat/completions")
+    return openai.APIConnectionError(request=request)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# CIRCUIT BREAKER
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == "closed"
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+
+def test_breaker_success_resets_the_failure_count():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+
+
+def test_half_open_lets_one_trial_through():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    _half_open(breaker)
+
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()
+
+
+def test_trial_success_closes_the_circuit():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    _half_open(breaker)
+    breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow()
+
+
+def test_trial_failure_reopens_the_circuit():
+    breaker = CircuitBreaker(failure_threshold=5, reset_timeout=60)
+    for _ in range(5):
+        breaker.record_failure()
+    _half_open(breaker)
+    breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+
+def test_release_frees_a_trial_without_an_outcome():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    _half_open(breaker)
+    permit = breaker.allow()
+
+    breaker.release(permit)
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+
+
+def test_call_from_before_the_trial_keeps_it_in_flight():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    # Let through while closed, still running when the circuit opens
+    earlier = breaker.allow()
+    breaker.record_failure()
+    _half_open(breaker)
+    trial = breaker.allow()
+
+    breaker.release(earlier)
+    assert not breaker.allow()
+    breaker.release(trial)
+    assert breaker.allow()
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# RETRIES
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+def test_retry_budget_caps_retries():
+    budget = RetryBudget(ratio=0.5, max_tokens=2)
+    assert budget.try_spend()
+    assert budget.try_spend()
+    assert not budget.try_spend()
+
+    budget.record_call()
+    budget.record_call()
+    assert budget.try_spend()
+    assert not budget.try_spend()
+
+
+@pytest.mark.parametrize("attempt", [1, 2, 5, 10])
+def test_backoff_delay_stays_under_the_cap(attempt):
+    limit = min(1.0, 0.25 * 2 ** (attempt - 1))
+    for _ in range(100):
+        assert 0 <= backoff_delay(attempt, base=0.25, cap=1.0) <= limit
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# SERVICE: HALF-OPEN TRIALS ALWAYS END
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+def _open_circuit(service):
+    for _ in range(service.llm_breaker.failure_threshold):
+        service.llm_breaker.record_failure()
+    _half_open(service.llm_breaker)
+
+
+def test_non_transient_error_on_trial_frees_the_slot(service):
+    _open_circuit(service)
+    service.completions.outcomes = [_bad_request(), "fixed"]
+
+    assert asyncio.run(service.clean_with_llm_async("raw text")) == "raw text"
+    assert service.llm_breaker.state == "half_open"
+
+    # The next call probes again instead of being refused as circuit_open
+    assert asyncio.run(service.clean_with_llm_async("raw text")) == "fixed"
+    assert service.llm_breaker.state == "closed"
+    assert service.llm_fallbacks["circuit_open"] == 0
+
+
+def test_overlapping_call_does_not_free_the_trial(service):
+    async def overlap():
+        answer = asyncio.get_running_loop().create_future()
+        service.completions.outcomes = [answer]
+        # Starts while the circuit is closed and outlives it
+        earlier = asyncio.create_task(service.clean_with_llm_async("raw text"))
+        while service.completions.calls == 0:
+            await asyncio.sleep(0)
+        _open_circuit(service)
+        trial = service.llm_breaker.allow()
+
+        answer.set_exception(_bad_request())
+        assert await earlier == "raw text"
+        return trial
+
+    trial = asyncio.run(overlap())
+    # Still one probe at a time
+    assert not service.llm_breaker.allow()
+    service.llm_breaker.release(trial)
+    assert service.llm_breaker.allow()
+
+
+def test_transient_failure_on_trial_reopens(service):
+    _open_circuit(service)
+    service.llm_max_retries = 0
+    service.completions.outcomes = [_connection_error()]
+
+    assert asyncio.run(service.clean_with_llm_async("raw text")) == "raw text"
+    assert service.llm_breaker.state == "open"
+
+
+def test_cancelled_trial_frees_the_slot(service):
+    _open_circuit(service)
+
+    async def cancel_trial():
+        service.completions.outcomes = [asyncio.Event().wait()]
+        task = asyncio.create_task(service.clean_with_llm_async("raw text"))
+        while service.completions.calls == 0:
+            await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_trial())
+    assert service.llm_breaker.allow()
+
+
+def test_abandoned_stream_frees_the_slot(service):
+    _open_circuit(service)
+    service.completions.outcomes = ["one two three"]
+
+    async def read_one_token():
+        stream = service.stream_clean_with_llm("raw text")
+        await anext(stream)
+        # Client went away mid-stream
+        await stream.aclose()
+
+    asyncio.run(read_one_token())
+    assert service.llm_breaker.allow()
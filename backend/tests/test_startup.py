@@ -0,0 +1,92 @@
+"""Background startup: the LLM warm-up is retried while the LLM cannot be
+reached, but not when it rejects the configuration."""
+
+import asyncio
+import types
+
+import httpx
+import openai
+import pytest
+from fastapi.testclient import TestClient
+
+import app as app_module
+
+
+def _connection_error():
+    request = httpx.Request("GET", "http://llm/v1/models")
+    return openai.APIConnectionError(request=request)
+
+
+def _unauthorized():
+    request = httpx.Request("GET", "http://llm/v1/models")
+    response = httpx.Response(401, request=request)
+    return openai.AuthenticationError("bad api key", response=response, body=None)
+
+
+@pytest.fixture
+def start(service, monkeypatch):
+    """Runs _start_services over the stub service with the given outcomes
+    of the LLM's /models check; returns the startup dict."""
+    monkeypatch.setattr(app_module, "_load_service", lambda: service)
+    monkeypatch.setattr(app_module, "LLM_WARMUP_RETRY", 0)
+    monkeypatch.setattr(
+        app_module,
+        "startup",
+        {"state": "loading_whisper", "error": None, "timings": {}},
+    )
+    monkeypatch.setattr(app_module, "service", None)
+    monkeypatch.setattr(app_module, "job_queue", None)
+
+    async def warm_up_whisper():
+        pass
+
+    service.warm_up_whisper = warm_up_whisper
+    service.models_checks = 0
+
+    def run(*outcomes):
+        pending = list(outcomes)
+
+        async def list_models():
+            service.models_checks += 1
+            outcome = pending.pop(0) if pending else None
+            if isinstance(outcome, BaseException):
+                raise outcome
+
+        service.llm_client.models = types.SimpleNamespace(list=list_models)
+
+        async def start_and_stop():
+            await app_module._start_services()
+            await app_module.job_queue.stop()
+
+        asyncio.run(start_and_stop())
+        return app_module.startup
+
+    return run
+
+
+def test_unreachable_llm_is_retried_until_ready(start, service):
+    startup = start(_connection_error(), _connection_error())
+
+    assert startup["state"] == "ready"
+    assert service.models_checks == 3
+    assert app_module.service is service
+
+
+def test_rejected_configuration_is_not_retried(start, service):
+    startup = start(_unauthorized())
+
+    assert startup["state"] == "llm_misconfigured"
+    assert "bad api key" in startup["error"]
+    assert service.models_checks == 1
+    # Transcription is still served
+    assert app_module.service is service
+
+
+def test_ready_check_reports_the_cause(start):
+    start(_unauthorized())
+
+    response = TestClient(app_module.app).get("/api/ready")
+
+    assert response.status_code == 503
+    assert response.json()["detail"].startswith("llm_misconfigured: ")
+    assert "bad api key" in response.json()["detail"]
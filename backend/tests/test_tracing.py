@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+from tracing import RequestTracing, Tracer
+
+
+class _Exporter:
+    def __init__(self):
+        self.traces = []
+
+    def export(self, trace):
+        self.traces.append(trace)
+
+
+async def _read_body(scope, receive, send):
+    body = b""
+    more = True
+    while more:
+        message = await receive()
+        body += message.get("body", b"")
+        more = message.get("more_body", False)
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": str(len(body)).encode()})
+
+
+def _post(chunks, headers):
+    exporter = _Exporter()
+    app = RequestTracing(_read_body, Tracer(exporter))
+    messages = [
+        {"type": "http.request", "body": chunk, "more_body": i < len(chunks) - 1}
+        for i, chunk in enumerate(chunks)
+    ]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "POST", "path": "/upload", "headers": headers}
+    asyncio.run(app(scope, receive, send))
+    (trace,) = exporter.traces
+    (upload,) = [span for span in trace.spans if span.name == "upload"]
+    return sent[0]["status"], upload
+
+
+@pytest.mark.parametrize("length", [b"abc", b"-5", b""])
+def test_malformed_content_length_does_not_fail_the_request(length):
+    status, upload = _post([b"hello"], [(b"content-length", length)])
+
+    assert status == 200
+    assert upload.attributes["bytes"] == 5
+
+
+def test_chunked_upload_records_the_received_bytes():
+    status, upload = _post(
+        [b"one", b"two", b"three"], [(b"transfer-encoding", b"chunked")]
+    )
+
+    assert status == 200
+    assert upload.attributes["bytes"] == 11
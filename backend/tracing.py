@@ -0,0 +1,345 @@
+"""
+Per-request tracing: every HTTP request gets a request id, and sampled ones
+a tree of timed spans (upload, decode, Whisper feature extraction / encoder /
+beam search, LLM round trips, ...) written to a JSON Lines file in the
+OpenTelemetry OTLP/JSON format, which the OTel Collector's otlpjsonfile
+receiver and most trace viewers read.
+
+Spans follow the request through await points and into the Whisper pool via
+contextvars; code outside a traced request pays one context lookup per span.
+"""
+
+import contextlib
+import contextvars
+import json
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+
+SERVICE_NAME = "ai-transcript-app"
+# OTLP span kinds and status codes
+KIND_INTERNAL = 1
+KIND_SERVER = 2
+STATUS_ERROR = 2
+# Incoming ids are reused only if they look like ids
+REQUEST_ID_PATTERN = re.compile(r"^[\w.\-]{1,64}$")
+TRACEPARENT_PATTERN = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+_current_span: contextvars.ContextVar["Span | None"] = contextvars.ContextVar(
+    "current_span", default=None
+)
+request_id: contextvars.ContextVar[str | None] = contextvars.ContextVar(
+    "request_id", default=None
+)
+
+
+@dataclass
+class Span:
+    trace: "Trace"
+    name: str
+    span_id: str
+    parent_id: str | None
+    attributes: dict = field(default_factory=dict)
+    kind: int = KIND_INTERNAL
+    # Wall-clock start for the exporter; the duration comes from perf_counter
+    start_ns: int = field(default_factory=time.time_ns)
+    _start_perf: int = field(default_factory=time.perf_counter_ns)
+    end_ns: int | None = None
+    error: str | None = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def fail(self, error: BaseException):
+        self.error = f"{type(error).__name__}: {error}"
+
+    def end(self):
+        if self.end_ns is None:
+            self.end_ns = self.start_ns + time.perf_counter_ns() - self._start_perf
+            self.trace.finished(self)
+
+    def child(self, name: str, attributes: dict | None = None) -> "Span":
+        return Span(self.trace, name, _new_id(8), self.span_id, attributes or {})
+
+    def to_otlp(self) -> dict:
+        span = {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id or "",
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [
+                {"key": key, "value": _otlp_value(value)}
+                for key, value in self.attributes.items()
+                if value is not None
+            ],
+        }
+        if self.error:
+            span["status"] = {"code": STATUS_ERROR, "message": self.error}
+        return span
+
+
+class Trace:
+    """The spans of one request; exported together once the root ends."""
+
+    def __init__(self, tracer: "Tracer", trace_id: str):
+        self.tracer = tracer
+        self.trace_id = trace_id
+        self.spans: list[Span] = []
+        self.closed = False
+        self._lock = threading.Lock()
+
+    def finished(self, span: Span):
+        with self._lock:
+            # Work the request left behind (e.g. a cancelled decode) ends late
+            if self.closed:
+                return
+            self.spans.append(span)
+            self.closed = span.kind == KIND_SERVER
+        if self.closed:
+            self.tracer.export(self)
+
+
+def _new_id(size: int) -> str:
+    return os.urandom(size).hex()
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class FileSpanExporter:
+    """Appends each finished trace to a file as one OTLP/JSON
+    ExportTraceServiceRequest per line."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def export(self, trace: Trace):
+        request = {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            {"key": "service.name", "value": _otlp_value(SERVICE_NAME)}
+                        ]
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": "transcript"},
+                            "spans": [span.to_otlp() for span in trace.spans],
+                        }
+                    ],
+                }
+            ]
+        }
+        line = json.dumps(request, separators=(",", ":"))
+        with self._lock, open(self.path, "a") as f:
+            f.write(line + "\n")
+
+
+class Tracer:
+    """Starts root spans for a share (sample_rate) of requests and hands
+    finished traces to the exporter (None = record request ids only)."""
+
+    def __init__(self, exporter: FileSpanExporter | None, sample_rate: float = 1.0):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.exported = 0
+
+    def start_trace(self, name: str, traceparent: str | None = None) -> Span | None:
+        if self.exporter is None or random.random() >= self.sample_rate:
+            return None
+        # Continue the caller's trace if it sent a W3C traceparent
+        match = TRACEPARENT_PATTERN.match(traceparent or "")
+        trace_id, parent_id = match.groups() if match else (_new_id(16), None)
+        trace = Trace(self, trace_id)
+        return Span(trace, name, _new_id(8), parent_id, kind=KIND_SERVER)
+
+    def export(self, trace: Trace):
+        self.exported += 1
+        try:
+            self.exporter.export(trace)
+        except OSError as e:
+            print(f"⚠️  Could not write trace: {e}")
+
+
+@contextlib.contextmanager
+def span(name: str, **attributes):
+    """A child of the current span for the duration of the block, current
+    itself while it runs. Yields None (and records nothing) outside a traced
+    request. Not for blocks that yield inside async generators; see
+    start_span."""
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+    child = parent.child(name, attributes)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.fail(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        child.end()
+
+
+def start_span(name: str, **attributes) -> Span | None:
+    """A child of the current span that does not become current; the caller
+    ends it. For async generators, whose body runs in the consumer's context."""
+    parent = _current_span.get()
+    return parent.child(name, attributes) if parent else None
+
+
+def current_span() -> Span | None:
+    return _current_span.get()
+
+
+def _traced(fn, name: str):
+    def wrapper(*args, **kwargs):
+        if _current_span.get() is None:
+            return fn(*args, **kwargs)
+        with span(name):
+            return fn(*args, **kwargs)
+
+    return wrapper
+
+
+class _TracedCall:
+    """Callable object wrapper that still exposes the wrapped object's
+    attributes (faster-whisper reads its feature extractor's settings)."""
+
+    def __init__(self, target, name: str):
+        self._target = target
+        self._call = _traced(target, name)
+
+    def __call__(self, *args, **kwargs):
+        return self._call(*args, **kwargs)
+
+    def __getattr__(self, attribute):
+        return getattr(self._target, attribute)
+
+
+def instrument_whisper(model):
+    """Spans for the stages of a faster-whisper decode: mel features, the
+    encoder, beam search (with its temperature fallbacks) and word alignment.
+    Patches this model instance only."""
+    for method, name in (
+        ("encode", "whisper.encode"),
+        ("generate_with_fallback", "whisper.beam_search"),
+        ("add_word_timestamps", "whisper.word_timestamps"),
+    ):
+        if hasattr(model, method):
+            setattr(model, method, _traced(getattr(model, method), name))
+    if hasattr(model, "feature_extractor"):
+        model.feature_extractor = _TracedCall(
+            model.feature_extractor, "whisper.features"
+        )
+    return model
+
+
+def copy_context_call(fn, *args, **kwargs):
+    """fn bound to a copy of the current context, so executor threads see the
+    current span (run_in_executor does not carry contextvars over)."""
+    context = contextvars.copy_context()
+    return lambda: context.run(fn, *args, **kwargs)
+
+
+def under_span(parent: Span | None, fn, *args, **kwargs):
+    """Like copy_context_call, with parent as the current span."""
+    context = contextvars.copy_context()
+    if parent is not None:
+        context.run(_current_span.set, parent)
+    return lambda: context.run(fn, *args, **kwargs)
+
+
+class RequestTracing:
+    """ASGI middleware: a request id for every HTTP request (the client's
+    X-Request-ID if valid), echoed in the response headers, and a root span
+    for sampled ones. The root span also covers receiving the upload body,
+    as its own `upload` span."""
+
+    def __init__(self, app, tracer: Tracer):
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        incoming = headers.get(b"x-request-id", b"").decode("latin-1")
+        rid = incoming if REQUEST_ID_PATTERN.match(incoming) else uuid.uuid4().hex
+        root = self.tracer.start_trace(
+            f"{scope['method']} {scope['path']}",
+            headers.get(b"traceparent", b"").decode("latin-1"),
+        )
+        rid_token = request_id.set(rid)
+        span_token = _current_span.set(root)
+
+        upload = None
+        if root:
+            root.set(**{"http.method": scope["method"], "request.id": rid})
+            if b"content-length" in headers or b"transfer-encoding" in headers:
+                upload = root.child("upload")
+
+        received = 0
+
+        async def traced_receive():
+            nonlocal received
+            message = await receive()
+            if upload is not None and message["type"] == "http.request":
+                # What arrived, not what the (client-supplied) headers claim
+                received += len(message.get("body", b""))
+                if not message.get("more_body", False):
+                    upload.set(bytes=received)
+                    upload.end()
+            return message
+
+        async def traced_send(message):
+            if message["type"] == "http.response.start":
+                extra = [(b"x-request-id", rid.encode())]
+                if root:
+                    extra.append((b"x-trace-id", root.trace.trace_id.encode()))
+                    root.set(**{"http.status_code": message["status"]})
+                message = {**message, "headers": [*message.get("headers", []), *extra]}
+            await send(message)
+
+        try:
+            await self.app(scope, traced_receive, traced_send)
+        except BaseException as e:
+            if root:
+                root.fail(e)
+            raise
+        finally:
+            _current_span.reset(span_token)
+            request_id.reset(rid_token)
+            if root:
+                route = getattr(scope.get("route"), "path", None)
+                if route:
+                    root.name = f"{scope['method']} {route}"
+                    root.set(**{"http.route": route})
+                if upload is not None and upload.end_ns is None:
+                    # The body was never read (e.g. rejected on its size)
+                    upload.set(unread=True)
+                    upload.end()
+                root.end()
@@ -4,106 +4,1331 @@ Uses OpenAI API format, compatible with Ollama, OpenAI, LM Studio, and other pro
 Configuration is loaded from .env file.
 """
 
+import asyncio
+import contextlib
+import math
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import NamedTuple
 
+import httpx
+import numpy as np
 from faster_whisper import WhisperModel
-from openai import OpenAI
-import time
+from openai import (
+    APIConnectionError,
+    APITimeoutError,
+    AsyncOpenAI,
+    DefaultAsyncHttpxClient,
+    InternalServerError,
+    RateLimitError,
+)
+
+from batching import SAMPLE_RATE, MicroBatcher, speech_chunks, transcribe_batched
+from cache import LRUCache, TranscriptCache, audio_digest, make_key
+from ingest import DecodedAudio, load_samples, whisper_input
+from metrics import LATENCY_BUCKETS, RTF_BUCKETS, Histogram
+from models import COMPUTE_TYPES, ModelRegistry, ModelSpec
+from profiles import DECODE_PROFILES, AdaptiveProfilePolicy, probe_duration
+from resilience import CircuitBreaker, RetryBudget, backoff_delay
+from tracing import (
+    copy_context_call,
+    current_span,
+    instrument_whisper,
+    span,
+    start_span,
+    under_span,
+)
+from workers import WhisperWorkerPool
 
 # Edit system_prompt.txt to change how the LLM cleans transcriptions
 PROMPT_FILE = Path(__file__).parent / "system_prompt.txt"
 SYSTEM_PROMPT = PROMPT_FILE.read_text().strip()
 
+# Pipeline mode: minimum characters per cleaning window (windows end on a sentence)
+PIPELINE_WINDOW_CHARS = 300
+SENTENCE_ENDINGS = (".", "?", "!")
+
+# Decode settings passed to WhisperModel.transcribe under every profile; the
+# merged options (see decode_options) are part of the cache key
+WHISPER_OPTIONS = {
+    "language": "en",
+    "condition_on_previous_text": False,
+}
+WHISPER_COMPUTE_TYPE = "int8"
+
+
+def decode_options(profile: str) -> dict:
+    return {**WHISPER_OPTIONS, **DECODE_PROFILES[profile]}
+
+
+# Sampling settings for the cleaning completion (also part of the LLM cache key).
+# LLM_MAX_TOKENS is a floor: longer inputs get room for their full cleaned text.
+LLM_TEMPERATURE = 0.3
+LLM_MAX_TOKENS = 200
+
+# Long transcripts are cleaned in sentence-aligned chunks ("map-reduce").
+# Rough English average, used to size chunks and max_tokens without a tokenizer.
+CHARS_PER_TOKEN = 4
+# Each chunk's prompt carries the tail of the previous chunk so transitions
+# stay coherent
+LLM_CONTEXT_NOTE = (
+    "\n\nThe input continues a longer transcript. For context, it follows: "
+    '"{context}". Do not include that context in your output.'
+)
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+
+
+def normalize_whitespace(text: str) -> str:
+    return " ".join(text.split())
+
+
+def llm_max_tokens(text: str) -> int:
+    # Output is at most about as long as the input; leave 25% headroom.
+    # Whitespace is not counted, so texts that share an LLM cache entry
+    # (see _llm_cache_key) are also sampled with the same settings.
+    chars = len(normalize_whitespace(text))
+    return max(LLM_MAX_TOKENS, math.ceil(chars / CHARS_PER_TOKEN * 1.25))
+
+
+def chunk_sentences(text: str, max_chars: int) -> list[str]:
+    """Split text into chunks of whole sentences, each at most max_chars
+    (a single longer sentence becomes its own chunk)."""
+    chunks = []
+    current = ""
+    for sentence in SENTENCE_SPLIT.split(text.strip()):
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            chunks.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+async def _cancel_all(tasks: list[asyncio.Task]):
+    """Cancel whichever tasks are still running and wait for them to end."""
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+# Cache key mode of transcripts from the batched pipeline: it decodes with the
+# first temperature only and returns clip-level segments, so its results must
+# never be served for a sequential decode or the other way round
+BATCHED_MODE = ("batched",)
+
+
+# Failures that say the LLM backend is unavailable: retried, and counted by
+# the circuit breaker. Anything else (e.g. a 400) falls back immediately.
+LLM_TRANSIENT_ERRORS = (
+    APIConnectionError,  # includes APITimeoutError
+    InternalServerError,
+    RateLimitError,
+)
+
+
+class TranscriptSegment(NamedTuple):
+    """A decoded segment, as stored in the transcript cache."""
+
+    text: str
+    start: float
+    end: float
+
+
+class TranscriptWord(NamedTuple):
+    """A decoded word with its timestamps, for live transcription."""
+
+    word: str
+    start: float
+    end: float
+
 
 class TranscriptionService:
     """Uses OpenAI-compatible API, works with any provider (Ollama, OpenAI, LM Studio, etc.)."""
 
     def __init__(
-        self, whisper_model: str, llm_base_url: str, llm_api_key: str, llm_model: str
+        self,
+        whisper_model: str,
+        llm_base_url: str,
+        llm_api_key: str,
+        llm_model: str,
+        whisper_concurrency: int = 1,
+        llm_concurrency: int = 4,
+        transcript_cache_size: int = 128,
+        transcript_cache_path: str | None = None,
+        llm_cache_size: int = 256,
+        llm_cache_ttl: float | None = 3600,
+        whisper_batch_size: int = 8,
+        microbatch_window_ms: float = 0,
+        llm_timeout: float = 30.0,
+        llm_max_retries: int = 2,
+        llm_circuit_threshold: int = 5,
+        llm_circuit_reset: float = 30.0,
+        llm_context_tokens: int = 2048,
+        llm_chunk_concurrency: int = 4,
+        whisper_cpu_threads: int = 0,
+        long_audio_chunk_seconds: float = 60,
+        whisper_processes: int = 0,
+        whisper_process_threads: int = 1,
+        whisper_pin_cpus: bool = False,
+        whisper_models: list[str] | None = None,
+        whisper_memory_budget_mb: float = 0,
+        whisper_profile: str = "accurate",
+        adaptive_profile: bool = False,
+        adaptive_long_audio_seconds: float = 600,
+        whisper_compute_type: str = WHISPER_COMPUTE_TYPE,
     ):
-        print(f"🔄 Loading Whisper model '{whisper_model}'...")
-        self.whisper = WhisperModel(
-            whisper_model,
-            device="auto",  # Auto-detect: Metal (Mac), CUDA (NVIDIA), or CPU
-            compute_type="int8",
+        self.whisper_model_name = whisper_model
+        self.whisper_concurrency = whisper_concurrency
+        self.whisper_cpu_threads = whisper_cpu_threads
+        if whisper_compute_type not in COMPUTE_TYPES:
+            raise ValueError(f"Unknown compute type '{whisper_compute_type}'")
+        self.default_model = ModelSpec(whisper_model, whisper_compute_type)
+        # Models a request may ask for by name, besides the default
+        self.whisper_models = {whisper_model, *(whisper_models or [])}
+        self.models = ModelRegistry(
+            self._load_whisper, memory_budget_mb=whisper_memory_budget_mb
         )
-        print(f"✅ Whisper model '{whisper_model}' loaded!")
+        default = self.models.get(self.default_model, pin=True)
+        self.whisper = default.model
+
+        # Batched decoding for bulk uploads (shares weights with self.whisper)
+        self.batched_pipeline = default.pipeline
+        self.whisper_batch_size = whisper_batch_size
+        self.long_audio_chunk_seconds = long_audio_chunk_seconds
 
-        print(f"🔄 Connecting to LLM at {llm_base_url}...")
-        self.llm_client = OpenAI(base_url=llm_base_url, api_key=llm_api_key)
+        # Async client over one shared keep-alive pool sized to the LLM
+        # concurrency; retries are handled here, not by the SDK
+        self.llm_base_url = llm_base_url
+        self.llm_client = AsyncOpenAI(
+            base_url=llm_base_url,
+            api_key=llm_api_key,
+            max_retries=0,
+            timeout=httpx.Timeout(llm_timeout, connect=5.0),
+            http_client=DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=llm_concurrency,
+                    max_keepalive_connections=llm_concurrency,
+                    keepalive_expiry=60,
+                ),
+            ),
+        )
         self.llm_model = llm_model
+        self.llm_max_retries = llm_max_retries
+        self.llm_breaker = CircuitBreaker(llm_circuit_threshold, llm_circuit_reset)
+        self.llm_retry_budget = RetryBudget()
+        self.llm_retries = 0
+        self.llm_fallbacks = {"timeout": 0, "error": 0, "circuit_open": 0}
+        # Failed completion attempts, retried or not
+        self.llm_errors = {"timeout": 0, "error": 0}
+        self.llm_in_flight = 0
+        self.llm_waiting = 0
+
+        # Chunk size for long transcripts: the context window has to hold the
+        # system prompt, the chunk, its carried-over context and the output
+        # (~1.25x the chunk)
+        prompt_tokens = len(SYSTEM_PROMPT) // CHARS_PER_TOKEN + 100
+        chunk_tokens = max(100, int((llm_context_tokens - prompt_tokens) / 2.25))
+        self.llm_chunk_chars = chunk_tokens * CHARS_PER_TOKEN
+        self.llm_chunk_concurrency = llm_chunk_concurrency
+
+        # Whisper runs on a dedicated pool so blocking decodes never stall the
+        # event loop; LLM calls are async and bounded by a semaphore.
+        self.llm_concurrency = llm_concurrency
+        self.whisper_executor = ThreadPoolExecutor(
+            max_workers=whisper_concurrency, thread_name_prefix="whisper"
+        )
+        self.llm_semaphore = asyncio.Semaphore(llm_concurrency)
+
+        # Stage latencies for /metrics. Whisper only counts real decodes (not
+        # cache hits), from queueing to the last segment; LLM counts each
+        # completion from waiting for a slot to its last token, retries included.
+        self.whisper_seconds = Histogram(LATENCY_BUCKETS)
+        self.real_time_factor = Histogram(RTF_BUCKETS)
+        self.llm_seconds = Histogram(LATENCY_BUCKETS)
+
+        # Repeated audio (retries, re-runs with another prompt) skips Whisper
+        self.transcript_cache = TranscriptCache(
+            max_entries=transcript_cache_size, disk_path=transcript_cache_path
+        )
+        # Same text + prompt + sampling settings -> same cleaned text
+        self.llm_cache = LRUCache(max_entries=llm_cache_size, ttl=llm_cache_ttl)
 
+        # Optional: decode single files in worker processes, one model each,
+        # so decodes scale past what one process's threads can use
+        self.worker_pool = None
+        if whisper_processes > 0:
+            self.worker_pool = WhisperWorkerPool(
+                whisper_model,
+                whisper_compute_type,
+                processes=whisper_processes,
+                cpu_threads=whisper_cpu_threads,
+                threads=whisper_process_threads,
+                pin_cpus=whisper_pin_cpus,
+            )
+
+        # Decode profile for requests that don't name one. With the adaptive
+        # policy, those step down to cheaper profiles while decodes back up.
+        if whisper_profile not in DECODE_PROFILES:
+            raise ValueError(f"Unknown decode profile '{whisper_profile}'")
+        self.default_profile = whisper_profile
+        self.whisper_backlog = 0
+        self.profile_policy = None
+        if adaptive_profile:
+            capacity = whisper_concurrency + whisper_processes * whisper_process_threads
+            self.profile_policy = AdaptiveProfilePolicy(
+                high_water=2 * capacity,
+                low_water=capacity,
+                long_audio_seconds=adaptive_long_audio_seconds,
+            )
+
+        # Optional: coalesce concurrent single-file decodes into batched ones
+        self.microbatcher = None
+        if microbatch_window_ms > 0:
+            self.microbatcher = MicroBatcher(
+                self._decode_microbatch,
+                self.whisper_executor,
+                window_ms=microbatch_window_ms,
+                max_batch=whisper_batch_size,
+            )
+
+    async def check_llm(self) -> bool:
+        """False if the LLM cannot be reached for now; raises on errors that
+        retrying will not fix (bad API key, unknown endpoint)."""
+        print(f"🔄 Connecting to LLM at {self.llm_base_url}...")
         try:
-            self.llm_client.models.list()
+            await self.llm_client.models.list()
             print("✅ Connected to LLM API!")
-        except Exception as e:
+            return True
+        except LLM_TRANSIENT_ERRORS as e:
             print(f"⚠️  Warning: Could not connect to LLM: {e}")
-            print(f"   Make sure your LLM server is running at {llm_base_url}")
+            print(f"   Make sure your LLM server is running at {self.llm_base_url}")
+            return False
 
-    def transcribe(self, audio_file):
-        print("🔄 Transcribing...")
+    async def warm_up_whisper(self):
+        """Decode a second of synthetic audio so the first real request does
+        not pay for lazy initialization."""
+        print("🔥 Warming up Whisper...")
+        noise = np.random.default_rng(0).normal(0, 0.01, SAMPLE_RATE)
+        options = decode_options(self.default_profile)
+
+        def decode():
+            segments = self._whisper_segments(
+                noise.astype(np.float32), self.default_model, options
+            )
+            return list(segments)
 
-        segments, info = self.whisper.transcribe(
-            audio_file, beam_size=5, language="en", condition_on_previous_text=False
+        await self._run_in(self.whisper_executor, decode)
+
+    async def warm_up_llm(self) -> bool:
+        """Check the LLM is reachable and run a one-token completion so the
+        provider loads the model. Returns False if it is unreachable; raises
+        if it answers with an error retrying will not fix (bad API key,
+        unknown model)."""
+        if not await self.check_llm():
+            return False
+        print("🔥 Warming up LLM...")
+        try:
+            await self.llm_client.chat.completions.create(
+                model=self.llm_model,
+                messages=[{"role": "user", "content": "Hi"}],
+                max_tokens=1,
+            )
+            return True
+        except LLM_TRANSIENT_ERRORS as e:
+            print(f"⚠️  LLM warm-up failed: {e}")
+            return False
+
+    async def shutdown(self):
+        self.whisper_executor.shutdown(wait=False, cancel_futures=True)
+        if self.worker_pool:
+            await asyncio.to_thread(self.worker_pool.close)
+        await self.llm_client.close()
+        self.transcript_cache.close()
+
+    def llm_stats(self) -> dict:
+        return {
+            "circuit": self.llm_breaker.state,
+            "consecutive_failures": self.llm_breaker.failures,
+            "retries": self.llm_retries,
+            "fallbacks": dict(self.llm_fallbacks),
+        }
+
+    def _load_whisper(self, spec: ModelSpec) -> WhisperModel:
+        model = WhisperModel(
+            spec.name,
+            device="auto",  # Auto-detect: Metal (Mac), CUDA (NVIDIA), or CPU
+            compute_type=spec.compute_type,
+            # One CTranslate2 worker per pool thread so concurrent decodes
+            # actually run in parallel instead of serializing on the model
+            num_workers=self.whisper_concurrency,
+            # Threads per decode; 0 keeps the CTranslate2 default
+            cpu_threads=self.whisper_cpu_threads,
         )
+        # Feature extraction, encoder and beam search show up in request traces
+        return instrument_whisper(model)
+
+    def resolve_model(self, model=None, compute_type=None) -> ModelSpec:
+        """The model a request asked for, or the default. Raises ValueError
+        for models or compute types that are not allowed."""
+        spec = ModelSpec(
+            model or self.whisper_model_name,
+            compute_type or self.default_model.compute_type,
+        )
+        if spec.name not in self.whisper_models:
+            allowed = ", ".join(sorted(self.whisper_models))
+            raise ValueError(
+                f"Unknown Whisper model '{spec.name}' (allowed: {allowed})"
+            )
+        if spec.compute_type not in COMPUTE_TYPES:
+            raise ValueError(f"Unknown compute type '{spec.compute_type}'")
+        return spec
+
+    def validate_profile(self, profile=None):
+        """Raises ValueError if profile is given but unknown."""
+        if profile and profile not in DECODE_PROFILES:
+            allowed = ", ".join(DECODE_PROFILES)
+            raise ValueError(f"Unknown decode profile '{profile}' (allowed: {allowed})")
+
+    def resolve_profile(self, profile=None, audio_file=None) -> str:
+        """The decode profile a request asked for; otherwise the default, or
+        the adaptive policy's pick for the current backlog and audio length."""
+        if profile:
+            self.validate_profile(profile)
+            return profile
+        if self.profile_policy is None:
+            return self.default_profile
+
+        if isinstance(audio_file, DecodedAudio):
+            duration = audio_file.duration
+        else:
+            duration = probe_duration(audio_file) if audio_file else None
+        return self.profile_policy.choose(
+            self.default_profile, self.whisper_backlog, duration
+        )
+
+    @contextlib.contextmanager
+    def _in_backlog(self):
+        # Decodes queued or running, as seen by the adaptive profile policy
+        self.whisper_backlog += 1
+        try:
+            yield
+        finally:
+            self.whisper_backlog -= 1
+
+    def _observe_whisper(self, elapsed: float, audio_duration: float | None):
+        self.whisper_seconds.observe(elapsed)
+        if audio_duration:
+            self.real_time_factor.observe(elapsed / audio_duration)
+
+    @contextlib.asynccontextmanager
+    async def _llm_slot(self):
+        start = time.perf_counter()
+        self.llm_waiting += 1
+        try:
+            with span("llm.queue"):
+                await self.llm_semaphore.acquire()
+        finally:
+            self.llm_waiting -= 1
+        self.llm_in_flight += 1
+        try:
+            yield
+        finally:
+            self.llm_in_flight -= 1
+            self.llm_semaphore.release()
+            self.llm_seconds.observe(time.perf_counter() - start)
+
+    async def _run_in(self, executor, fn, *args, **kwargs):
+        # Carries the current span over to the executor thread
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            executor, copy_context_call(fn, *args, **kwargs)
+        )
+
+    def _span_attributes(self, spec: ModelSpec, profile: str) -> dict:
+        return {
+            "model": spec.name,
+            "compute_type": spec.compute_type,
+            "profile": profile,
+        }
+
+    def _whisper_segments(self, audio_file, spec: ModelSpec, options: dict):
+        # faster-whisper decodes lazily: nothing runs until segments is iterated
+        model = self.models.get(spec).model
+        segments, info = model.transcribe(whisper_input(audio_file), **options)
+        return segments
+
+    def _transcript_key(self, audio_file, spec: ModelSpec, options: dict, *mode) -> str:
+        return make_key(
+            (
+                audio_file.digest
+                if isinstance(audio_file, DecodedAudio)
+                else audio_digest(audio_file)
+            ),
+            spec.name,
+            spec.compute_type,
+            options,
+            *mode,
+        )
+
+    def _cached_transcript(
+        self, audio_file, spec: ModelSpec, options: dict, *mode
+    ) -> tuple[str, dict | None]:
+        key = self._transcript_key(audio_file, spec, options, *mode)
+        with span("transcript_cache.get") as lookup:
+            cached = self.transcript_cache.get(key)
+            if lookup:
+                lookup.set(hit=cached is not None)
+        if cached is not None:
+            print("⚡ Transcript cache hit")
+        return key, cached
+
+    def _decode(self, audio_file, spec: ModelSpec, options: dict) -> dict:
+        print("🔄 Transcribing...")
+
+        segments = [
+            TranscriptSegment(segment.text, segment.start, segment.end)
+            for segment in self._whisper_segments(audio_file, spec, options)
+        ]
 
         text = " ".join([segment.text for segment in segments]).strip()
         print(f"📝 Raw: {text}")
-        return text
+        return {"text": text, "segments": [s._asdict() for s in segments]}
+
+    async def transcribe_detailed_async(
+        self, audio_file, model=None, compute_type=None, profile=None
+    ) -> dict:
+        spec = self.resolve_model(model, compute_type)
+        profile = self.resolve_profile(profile, audio_file)
+        options = decode_options(profile)
+        mode = BATCHED_MODE if self._microbatched(spec, profile) else ()
+        with span("whisper", **self._span_attributes(spec, profile)) as whisper:
+            # Cache lookups stay off the Whisper pool so hits never queue
+            # behind decodes
+            key, cached = await asyncio.to_thread(
+                self._cached_transcript, audio_file, spec, options, *mode
+            )
+            if cached is not None:
+                return {**cached, "transcript_cache": "hit", "profile": profile}
+
+            start = time.perf_counter()
+            with self._in_backlog():
+                result = await self._decode_single(audio_file, key, spec, profile)
+            duration = (
+                audio_file.duration if isinstance(audio_file, DecodedAudio) else None
+            )
+            self._observe_whisper(time.perf_counter() - start, duration)
+            if whisper:
+                whisper.set(audio_duration=duration, segments=len(result["segments"]))
+        return {**result, "transcript_cache": "miss", "profile": profile}
+
+    def _microbatched(self, spec: ModelSpec, profile: str) -> bool:
+        # Micro-batches only decode the default model and profile, and only
+        # when worker processes are not serving it
+        return (
+            self.microbatcher is not None
+            and self.worker_pool is None
+            and spec == self.default_model
+            and profile == self.default_profile
+        )
+
+    async def _decode_single(self, audio_file, key, spec: ModelSpec, profile: str):
+        options = decode_options(profile)
+        # Worker processes only serve the default model, micro-batches also
+        # only the default profile
+        is_default = spec == self.default_model
+        active = current_span()
+        if self.worker_pool and is_default:
+            # Decoded in a worker process, so the trace stops here
+            if active:
+                active.set(backend="worker_process")
+            result = await self.worker_pool.transcribe(
+                whisper_input(audio_file), options
+            )
+            print(f"📝 Raw: {result['text']}")
+        elif self._microbatched(spec, profile):
+            # The batch decode caches its own results; it is shared with other
+            # requests, so it is not part of this trace
+            if active:
+                active.set(backend="microbatch")
+            return await self.microbatcher.submit((audio_file, key))
+        else:
+            result = await self._run_in(
+                self.whisper_executor, self._decode, audio_file, spec, options
+            )
+        await asyncio.to_thread(self.transcript_cache.put, key, result)
+        return result
+
+    def _decode_words(
+        self, samples, spec: ModelSpec, options: dict, prompt: str | None
+    ) -> list[TranscriptWord]:
+        model = self.models.get(spec).model
+        segments, _ = model.transcribe(
+            samples, word_timestamps=True, initial_prompt=prompt or None, **options
+        )
+        return [
+            TranscriptWord(word.word, word.start, word.end)
+            for segment in segments
+            for word in segment.words or []
+        ]
+
+    async def transcribe_words_async(
+        self, samples, prompt=None, model=None, compute_type=None, profile=None
+    ) -> list[TranscriptWord]:
+        """Word-timestamped decode of raw 16 kHz samples, for live
+        transcription. Never cached (the buffer changes with every call) and
+        always run in-process."""
+        spec = self.resolve_model(model, compute_type)
+        options = decode_options(profile or self.default_profile)
+        with self._in_backlog():
+            return await self._run_in(
+                self.whisper_executor,
+                self._decode_words,
+                samples,
+                spec,
+                options,
+                prompt,
+            )
+
+    def _decode_chunk(
+        self, audio, offset: float, spec: ModelSpec, options: dict
+    ) -> list[dict]:
+        model = self.models.get(spec).model
+        segments, _ = model.transcribe(audio, **options)
+        return [
+            {
+                "text": segment.text,
+                "start": round(segment.start + offset, 3),
+                "end": round(segment.end + offset, 3),
+            }
+            for segment in segments
+        ]
+
+    async def _decode_chunk_in_worker(
+        self, audio, offset: float, options: dict
+    ) -> list[dict]:
+        result = await self.worker_pool.transcribe(audio, options)
+        return [
+            {
+                "text": segment["text"],
+                "start": round(segment["start"] + offset, 3),
+                "end": round(segment["end"] + offset, 3),
+            }
+            for segment in result["segments"]
+        ]
+
+    async def transcribe_long_async(
+        self, audio_file, model=None, compute_type=None, profile=None
+    ) -> dict:
+        """Long-audio mode: VAD cuts the recording at its silences, silent
+        stretches are skipped, and the speech chunks are decoded in parallel
+        on the Whisper pool (or the worker processes). Segment timestamps are relative to the whole file.
+        Also reports audio/speech duration, silence_ratio and, when decoded,
+        real_time_factor (wall time / audio duration)."""
+        spec = self.resolve_model(model, compute_type)
+        profile = self.resolve_profile(profile, audio_file)
+        options = decode_options(profile)
+        mode = ("long_audio", self.long_audio_chunk_seconds)
+        key, cached = await asyncio.to_thread(
+            self._cached_transcript, audio_file, spec, options, *mode
+        )
+        if cached is not None:
+            return {
+                **cached,
+                "transcript_cache": "hit",
+                "real_time_factor": None,
+                "profile": profile,
+            }
+
+        with (
+            span("whisper.long", **self._span_attributes(spec, profile)) as whisper,
+            self._in_backlog(),
+        ):
+            result, elapsed = await self._decode_long(audio_file, spec, options)
+            if whisper:
+                whisper.set(
+                    audio_duration=result["audio_duration"], chunks=result["chunks"]
+                )
+        await asyncio.to_thread(self.transcript_cache.put, key, result)
+
+        audio_duration = result["audio_duration"]
+        self._observe_whisper(elapsed, audio_duration)
+        return {
+            **result,
+            "transcript_cache": "miss",
+            "real_time_factor": elapsed / audio_duration if audio_duration else None,
+            "profile": profile,
+        }
+
+    async def _decode_long(self, audio_file, spec: ModelSpec, options: dict):
+        start = time.perf_counter()
+        audio = await asyncio.to_thread(load_samples, audio_file)
+        with span("vad"):
+            chunks = await asyncio.to_thread(
+                speech_chunks, audio, self.long_audio_chunk_seconds
+            )
+        # Chunks of the default model spread over the worker processes when
+        # there are any; otherwise they share the in-process Whisper pool
+        in_workers = self.worker_pool is not None and spec == self.default_model
+        if in_workers:
+            parallel = len(self.worker_pool.workers) * self.worker_pool.threads
+        else:
+            parallel = self.whisper_concurrency
+        if len(chunks) > 1 and parallel == 1:
+            print(
+                f"⚠️  Transcribing {len(chunks)} speech chunks one at a time; "
+                "raise WHISPER_CONCURRENCY or WHISPER_PROCESSES to decode "
+                "them in parallel"
+            )
+        else:
+            print(f"🔄 Transcribing {len(chunks)} speech chunks in parallel...")
+
+        decoded = await asyncio.gather(
+            *(
+                (
+                    self._decode_chunk_in_worker(
+                        audio[chunk_start:chunk_end], chunk_start / SAMPLE_RATE, options
+                    )
+                    if in_workers
+                    else self._run_in(
+                        self.whisper_executor,
+                        self._decode_chunk,
+                        audio[chunk_start:chunk_end],
+                        chunk_start / SAMPLE_RATE,
+                        spec,
+                        options,
+                    )
+                )
+                for chunk_start, chunk_end in chunks
+            )
+        )
+        segments = [segment for chunk in decoded for segment in chunk]
+        text = " ".join([segment["text"] for segment in segments]).strip()
+        print(f"📝 Raw: {text}")
+
+        audio_duration = len(audio) / SAMPLE_RATE
+        speech_duration = sum(end - begin for begin, end in chunks) / SAMPLE_RATE
+        result = {
+            "text": text,
+            "segments": segments,
+            "audio_duration": audio_duration,
+            "speech_duration": speech_duration,
+            "silence_ratio": (
+                1 - speech_duration / audio_duration if audio_duration else 0
+            ),
+            "chunks": len(chunks),
+        }
+        return result, time.perf_counter() - start
+
+    def _decode_batch(self, audio_files: list, keys: list, batch_size: int):
+        print(f"🔄 Transcribing {len(audio_files)} files (batch of {batch_size})...")
+        audios = [load_samples(audio_file) for audio_file in audio_files]
+        decoded = transcribe_batched(
+            self.batched_pipeline,
+            audios,
+            batch_size,
+            **decode_options(self.default_profile),
+        )
+
+        results = []
+        for key, audio, segments in zip(keys, audios, decoded, strict=True):
+            text = " ".join([segment["text"] for segment in segments]).strip()
+            result = {"text": text, "segments": segments}
+            self.transcript_cache.put(key, result)
+            results.append({**result, "audio_duration": len(audio) / SAMPLE_RATE})
+        return results
+
+    def _decode_microbatch(self, items: list[tuple]) -> list[dict]:
+        audio_files = [audio_file for audio_file, _ in items]
+        keys = [key for _, key in items]
+        return self._decode_batch(audio_files, keys, self.whisper_batch_size)
+
+    def transcribe_batch(self, audio_files: list, batch_size: int | None = None):
+        """Transcribe many files through the batched pipeline, decoding all
+        cache misses together. Returns one result per file, in order."""
+        batch_size = batch_size or self.whisper_batch_size
+        results = [None] * len(audio_files)
+        misses = []
+        options = decode_options(self.default_profile)
+
+        for i, audio_file in enumerate(audio_files):
+            key, cached = self._cached_transcript(
+                audio_file, self.default_model, options, *BATCHED_MODE
+            )
+            if cached is not None:
+                results[i] = {
+                    **cached,
+                    "transcript_cache": "hit",
+                    "audio_duration": None,
+                }
+            else:
+                misses.append((i, key))
+
+        if not misses:
+            return results
+
+        decoded = self._decode_batch(
+            [audio_files[i] for i, _ in misses],
+            [key for _, key in misses],
+            batch_size,
+        )
+        for (i, _), result in zip(misses, decoded, strict=True):
+            results[i] = {**result, "transcript_cache": "miss"}
+        return results
+
+    async def transcribe_batch_async(
+        self, audio_files: list, batch_size: int | None = None
+    ):
+        return await self._run_in(
+            self.whisper_executor, self.transcribe_batch, audio_files, batch_size
+        )
+
+    async def stream_segments(
+        self,
+        audio_file,
+        stats: dict | None = None,
+        model=None,
+        compute_type=None,
+        profile=None,
+    ):
+        """Async generator yielding Whisper segments as soon as they are decoded.
+        Decoding runs on the Whisper executor; it stops early if the consumer
+        goes away. Cached transcripts are replayed without decoding. If given,
+        stats is filled with the transcript_cache outcome and profile used."""
+        stats = stats if stats is not None else {}
+        spec = self.resolve_model(model, compute_type)
+        profile = self.resolve_profile(profile, audio_file)
+        options = decode_options(profile)
+        stats["profile"] = profile
+        # Not made current: this generator's body runs in the consumer's context
+        whisper = start_span("whisper", **self._span_attributes(spec, profile))
+        key, cached = await asyncio.to_thread(
+            under_span(whisper, self._cached_transcript, audio_file, spec, options)
+        )
+        if cached is not None:
+            stats["transcript_cache"] = "hit"
+            if whisper:
+                whisper.end()
+            for segment in cached["segments"]:
+                yield TranscriptSegment(**segment)
+            return
+        stats["transcript_cache"] = "miss"
+
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        done = object()
+        cancelled = threading.Event()
+
+        def produce():
+            decoded = []
+            try:
+                for segment in self._whisper_segments(audio_file, spec, options):
+                    if cancelled.is_set():
+                        return
+                    decoded.append(
+                        TranscriptSegment(segment.text, segment.start, segment.end)
+                    )
+                    loop.call_soon_threadsafe(queue.put_nowait, decoded[-1])
+
+                # Only complete decodes are worth caching
+                text = " ".join([segment.text for segment in decoded]).strip()
+                self.transcript_cache.put(
+                    key, {"text": text, "segments": [s._asdict() for s in decoded]}
+                )
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, done)
+
+        print("🔄 Transcribing (streaming)...")
+        start = time.perf_counter()
+        future = loop.run_in_executor(
+            self.whisper_executor, under_span(whisper, produce)
+        )
+
+        with self._in_backlog():
+            try:
+                while (item := await queue.get()) is not done:
+                    if isinstance(item, Exception):
+                        if whisper:
+                            whisper.fail(item)
+                        raise item
+                    yield item
+            finally:
+                cancelled.set()
+                await future
+                if whisper:
+                    whisper.end()
+        duration = audio_file.duration if isinstance(audio_file, DecodedAudio) else None
+        self._observe_whisper(time.perf_counter() - start, duration)
 
     def get_default_system_prompt(self):
         return SYSTEM_PROMPT
 
-    def clean_with_llm(self, text, system_prompt=None):
-        if not text:
-            return ""
+    def _llm_cache_key(self, text, prompt_to_use) -> str:
+        # Whitespace-only differences should not miss the cache
+        normalized = normalize_whitespace(text)
+        return make_key(
+            normalized,
+            prompt_to_use,
+            self.llm_model,
+            LLM_TEMPERATURE,
+            llm_max_tokens(text),
+        )
 
+    def _cached_cleaning(self, text, system_prompt) -> tuple[str, str, str | None]:
         # Use custom prompt or fall back to default
         prompt_to_use = system_prompt if system_prompt else SYSTEM_PROMPT
 
-        print("🤖 Cleaning with LLM...")
+        key = self._llm_cache_key(text, prompt_to_use)
+        # Long transcripts are cached per chunk, so a whole-text lookup could
+        # only miss, and count that miss on top of the chunks' own lookups
+        if len(text) > self.llm_chunk_chars:
+            return prompt_to_use, key, None
+        cached = self.llm_cache.get(key)
+        if cached is not None:
+            print("⚡ LLM cache hit")
+        return prompt_to_use, key, cached
+
+    def _llm_error(self, error):
+        kind = "timeout" if isinstance(error, APITimeoutError) else "error"
+        self.llm_errors[kind] += 1
+
+    def _llm_fallback(self, error, transient: bool):
+        # Callers fall back to the raw text
+        kind = "timeout" if isinstance(error, APITimeoutError) else "error"
+        self.llm_fallbacks[kind] += 1
+        if transient:
+            self.llm_breaker.record_failure()
+        if active := current_span():
+            active.set(fallback=kind)
+        print(f"⚠️  LLM error: {error}")
+
+    def _llm_request(self, text, prompt_to_use) -> dict:
+        return {
+            "model": self.llm_model,
+            "messages": [
+                {"role": "system", "content": prompt_to_use},
+                {"role": "user", "content": text},
+            ],
+            "temperature": LLM_TEMPERATURE,
+            "max_tokens": llm_max_tokens(text),
+        }
+
+    async def _complete(self, text, prompt_to_use, key) -> str | None:
+        """Cleaned text, or None if the LLM is unavailable or failed."""
+        # Skip straight to the fallback while the backend is known to be down
+        permit = self.llm_breaker.allow()
+        if not permit:
+            self.llm_fallbacks["circuit_open"] += 1
+            print("⚠️  LLM circuit open, returning raw text")
+            return None
 
         try:
-            response = self.llm_client.chat.completions.create(
-                model=self.llm_model,
-                messages=[
-                    {"role": "system", "content": prompt_to_use},
-                    {"role": "user", "content": text},
-                ],
-                temperature=0.3,
-                max_tokens=200,
-            )
+            print("🤖 Cleaning with LLM...")
+            self.llm_retry_budget.record_call()
+
+            attempt = 0
+            async with self._llm_slot():
+                while True:
+                    try:
+                        with span("llm.request", model=self.llm_model, attempt=attempt):
+                            response = await self.llm_client.chat.completions.create(
+                                **self._llm_request(text, prompt_to_use)
+                            )
+                        cleaned = response.choices[0].message.content.strip()
+                        break
 
-            cleaned = response.choices[0].message.content.strip()
+                    except LLM_TRANSIENT_ERRORS as e:
+                        self._llm_error(e)
+                        can_retry = (
+                            attempt < self.llm_max_retries
+                            and self.llm_retry_budget.try_spend()
+                        )
+                        if not can_retry:
+                            self._llm_fallback(e, transient=True)
+                            return None
+                        attempt += 1
+                        self.llm_retries += 1
+                        await asyncio.sleep(backoff_delay(attempt))
+
+                    except Exception as e:
+                        self._llm_error(e)
+                        self._llm_fallback(e, transient=False)
+                        return None
+
+            self.llm_breaker.record_success()
             print(f"✨ Cleaned: {cleaned}")
+            # Only successful completions are cached, never the raw-text fallback
+            self.llm_cache.put(key, cleaned)
             return cleaned
+        finally:
+            # Frees the half-open trial slot if no outcome was recorded
+            # (non-transient error, cancellation, client gone)
+            self.llm_breaker.release(permit)
+
+    async def clean_with_llm_async(self, text, system_prompt=None):
+        if not text:
+            return ""
+
+        prompt_to_use, key, cached = self._cached_cleaning(text, system_prompt)
+        if cached is not None:
+            return cached
+
+        if len(text) > self.llm_chunk_chars:
+            tasks = self._clean_chunks(text, prompt_to_use)
+            try:
+                chunks = await asyncio.gather(*tasks)
+            finally:
+                await _cancel_all(tasks)
+            return " ".join(chunks)
+
+        cleaned = await self._complete(text, prompt_to_use, key)
+        return cleaned if cleaned is not None else text
+
+    def _clean_chunks(self, text, prompt_to_use) -> list[asyncio.Task]:
+        """Start cleaning sentence-aligned chunks of a long transcript
+        concurrently; returns one task per chunk, in transcript order. The
+        caller owns the tasks and must _cancel_all them when it is done."""
+        chunks = chunk_sentences(text, self.llm_chunk_chars)
+        print(f"🤖 Cleaning long transcript in {len(chunks)} chunks...")
+        limit = asyncio.Semaphore(self.llm_chunk_concurrency)
+
+        async def clean_chunk(chunk, previous):
+            prompt = prompt_to_use
+            if previous:
+                context = SENTENCE_SPLIT.split(previous)[-1]
+                prompt += LLM_CONTEXT_NOTE.format(context=context)
 
-        except Exception as e:
-            print(f"⚠️  LLM error: {e}")
-            return text  # Fallback to raw text
+            key = self._llm_cache_key(chunk, prompt)
+            cached = self.llm_cache.get(key)
+            if cached is not None:
+                return cached
+            async with limit:
+                cleaned = await self._complete(chunk, prompt, key)
+            return cleaned if cleaned is not None else chunk
+
+        return [
+            asyncio.create_task(clean_chunk(chunk, chunks[i - 1] if i else None))
+            for i, chunk in enumerate(chunks)
+        ]
+
+    async def stream_clean_with_llm(self, text, system_prompt=None, stats=None):
+        """Async generator of cleaned-text deltas as the LLM produces them.
+        When it ends, stats holds the final cleaned_text (the raw text if the
+        LLM failed, see "fallback"), llm_time, time_to_first_token, tokens and
+        tokens_per_second."""
+        stats = stats if stats is not None else {}
+        start = time.perf_counter()
+        stats.update(
+            {
+                "cleaned_text": text,
+                "llm_time": 0,
+                "time_to_first_token": None,
+                "tokens": 0,
+                "tokens_per_second": None,
+                "llm_cache": "miss",
+                "fallback": False,
+            }
+        )
+        if not text:
+            stats["cleaned_text"] = ""
+            return
+
+        prompt_to_use, key, cached = self._cached_cleaning(text, system_prompt)
+        if cached is not None:
+            stats.update(
+                {
+                    "cleaned_text": cached,
+                    "time_to_first_token": time.perf_counter() - start,
+                    "llm_cache": "hit",
+                }
+            )
+            yield cached
+            stats["llm_time"] = time.perf_counter() - start
+            return
 
-    def transcribe_file(self, audio_file_path: str, use_llm: bool = True) -> dict:
-        total_start = time.time()
+        if len(text) > self.llm_chunk_chars:
+            # Long transcripts: chunks are cleaned concurrently and each one is
+            # emitted as soon as it and every chunk before it are done
+            cleaned_chunks = []
+            tasks = self._clean_chunks(text, prompt_to_use)
+            try:
+                for task in tasks:
+                    cleaned_chunks.append(await task)
+                    if stats["time_to_first_token"] is None:
+                        stats["time_to_first_token"] = time.perf_counter() - start
+                    yield ("" if len(cleaned_chunks) == 1 else " ") + cleaned_chunks[-1]
+            finally:
+                # The client went away or a chunk failed: stop the others
+                await _cancel_all(tasks)
+            stats["cleaned_text"] = " ".join(cleaned_chunks)
+            stats["llm_time"] = time.perf_counter() - start
+            return
+
+        permit = self.llm_breaker.allow()
+        if not permit:
+            self.llm_fallbacks["circuit_open"] += 1
+            print("⚠️  LLM circuit open, returning raw text")
+            stats["fallback"] = True
+            return
+
+        try:
+            print("🤖 Cleaning with LLM (streaming)...")
+            self.llm_retry_budget.record_call()
+
+            parts = []
+            first_token_at = None
+            usage_tokens = None
+            attempt = 0
+            async with self._llm_slot():
+                while True:
+                    request = start_span(
+                        "llm.request", model=self.llm_model, attempt=attempt
+                    )
+                    try:
+                        stream = await self.llm_client.chat.completions.create(
+                            **self._llm_request(text, prompt_to_use),
+                            stream=True,
+                            stream_options={"include_usage": True},
+                        )
+                        async for chunk in stream:
+                            if chunk.usage:
+                                usage_tokens = chunk.usage.completion_tokens
+                            if not chunk.choices or not chunk.choices[0].delta.content:
+                                continue
+                            if first_token_at is None:
+                                first_token_at = time.perf_counter()
+                                stats["time_to_first_token"] = first_token_at - start
+                                if request:
+                                    request.set(
+                                        time_to_first_token=stats["time_to_first_token"]
+                                    )
+                            parts.append(chunk.choices[0].delta.content)
+                            yield parts[-1]
+                        break
+
+                    except LLM_TRANSIENT_ERRORS as e:
+                        self._llm_error(e)
+                        if request:
+                            request.fail(e)
+                        # Retrying after tokens went out would duplicate them
+                        can_retry = (
+                            not parts
+                            and attempt < self.llm_max_retries
+                            and self.llm_retry_budget.try_spend()
+                        )
+                        if not can_retry:
+                            self._llm_fallback(e, transient=True)
+                            stats["fallback"] = True
+                            stats["llm_time"] = time.perf_counter() - start
+                            return
+                        attempt += 1
+                        self.llm_retries += 1
+                        await asyncio.sleep(backoff_delay(attempt))
+
+                    except Exception as e:
+                        self._llm_error(e)
+                        if request:
+                            request.fail(e)
+                        self._llm_fallback(e, transient=False)
+                        stats["fallback"] = True
+                        stats["llm_time"] = time.perf_counter() - start
+                        return
+
+                    finally:
+                        if request:
+                            request.end()
+
+            end = time.perf_counter()
+            self.llm_breaker.record_success()
+            cleaned = "".join(parts).strip()
+            print(f"✨ Cleaned: {cleaned}")
+            self.llm_cache.put(key, cleaned)
+
+            tokens = usage_tokens or len(parts)
+            generation_time = end - first_token_at if first_token_at else 0
+            stats.update(
+                {
+                    "cleaned_text": cleaned,
+                    "llm_time": end - start,
+                    "tokens": tokens,
+                    "tokens_per_second": (
+                        tokens / generation_time if generation_time > 0 else None
+                    ),
+                }
+            )
+        finally:
+            # Frees the half-open trial slot if no outcome was recorded
+            # (non-transient error, cancellation, client gone)
+            self.llm_breaker.release(permit)
+
+    async def transcribe_file_async(
+        self,
+        audio_file_path: str | DecodedAudio,
+        use_llm: bool = True,
+        on_stage=None,
+        pipeline: bool = False,
+        long_audio: bool = False,
+        model=None,
+        compute_type=None,
+        profile=None,
+    ) -> dict:
+        """Full pipeline: Whisper, then LLM cleaning, with per-stage timings.
+        on_stage, if given, is called with "transcribing" / "cleaning".
+        long_audio decodes with transcribe_long_async (pipeline is ignored).
+        model / compute_type pick a Whisper model other than the default,
+        profile a decode profile."""
+        spec = self.resolve_model(model, compute_type)
+        if pipeline and use_llm and not long_audio:
+            return await self._transcribe_file_pipelined(
+                audio_file_path, on_stage, spec, profile
+            )
+
+        total_start = time.perf_counter()
 
         # Step 1: Whisper
-        t0 = time.time()
-        raw_text = self.transcribe(audio_file_path)
-        transcription_time = time.time() - t0
-        
+        if on_stage:
+            on_stage("transcribing")
+        t0 = time.perf_counter()
+        if long_audio:
+            transcript = await self.transcribe_long_async(
+                audio_file_path, spec.name, spec.compute_type, profile
+            )
+        else:
+            transcript = await self.transcribe_detailed_async(
+                audio_file_path, spec.name, spec.compute_type, profile
+            )
+        raw_text = transcript["text"]
+        transcription_time = time.perf_counter() - t0
+
         # Step 2: LLM
-        t1 = time.time()
+        t1 = time.perf_counter()
         if use_llm and raw_text:
-            cleaned_text = self.clean_with_llm(raw_text)
-            llm_time = time.time() - t1
+            if on_stage:
+                on_stage("cleaning")
+            cleaned_text = await self.clean_with_llm_async(raw_text)
+            llm_time = time.perf_counter() - t1
+        else:
+            cleaned_text = raw_text
+            llm_time = 0
+
+        total_time = time.perf_counter() - total_start
+
+        result = {
+            "raw_text": raw_text,
+            "cleaned_text": cleaned_text,
+            "transcription_time": transcription_time,
+            "llm_time": llm_time,
+            "total_time": total_time,
+            "transcript_cache": transcript["transcript_cache"],
+            "whisper_model": spec.name,
+            "compute_type": spec.compute_type,
+            "profile": transcript["profile"],
+        }
+        if long_audio:
+            result["long_audio"] = {
+                name: transcript[name]
+                for name in (
+                    "audio_duration",
+                    "speech_duration",
+                    "silence_ratio",
+                    "chunks",
+                    "real_time_factor",
+                )
+            }
+        return result
+
+    async def _transcribe_file_pipelined(
+        self,
+        audio_file_path: str | DecodedAudio,
+        on_stage,
+        spec: ModelSpec,
+        profile=None,
+    ):
+        """Clean sentence-bounded windows while Whisper keeps decoding, then
+        stitch the cleaned windows back in order."""
+        total_start = time.perf_counter()
+        raw_parts = []
+        pending = []
+        windows = []
+        stream_stats = {}
+
+        async def clean_window(text):
+            start = time.perf_counter()
+            cleaned = await self.clean_with_llm_async(text)
+            return cleaned, start, time.perf_counter()
+
+        def flush():
+            window_text = " ".join(pending).strip()
+            windows.append(asyncio.create_task(clean_window(window_text)))
+            pending.clear()
+
+        # Step 1: Whisper, dispatching a cleaning window at each sentence end
+        # once enough text has accumulated
+        if on_stage:
+            on_stage("transcribing")
+        try:
+            async for segment in self.stream_segments(
+                audio_file_path,
+                stream_stats,
+                spec.name,
+                spec.compute_type,
+                profile,
+            ):
+                raw_parts.append(segment.text)
+                pending.append(segment.text)
+                window_chars = sum(len(part) for part in pending)
+                if (
+                    segment.text.rstrip().endswith(SENTENCE_ENDINGS)
+                    and window_chars >= PIPELINE_WINDOW_CHARS
+                ):
+                    flush()
+        except BaseException:
+            for window in windows:
+                window.cancel()
+            raise
+        transcription_end = time.perf_counter()
+        transcription_time = transcription_end - total_start
+
+        raw_text = " ".join(raw_parts).strip()
+        print(f"📝 Raw: {raw_text}")
+
+        # Step 2: LLM, waiting for the windows still in flight
+        if on_stage and raw_text:
+            on_stage("cleaning")
+        if pending and raw_text:
+            flush()
+        results = await asyncio.gather(*windows)
+
+        if results:
+            cleaned_text = " ".join(cleaned for cleaned, _, _ in results if cleaned)
+            llm_start = min(start for _, start, _ in results)
+            llm_end = max(end for _, _, end in results)
+            llm_time = llm_end - llm_start
+            # Cleaning time hidden behind the Whisper decode
+            overlap_time = max(0.0, min(transcription_end, llm_end) - llm_start)
         else:
             cleaned_text = raw_text
             llm_time = 0
+            overlap_time = 0
 
-        total_time = time.time() - total_start
+        total_time = time.perf_counter() - total_start
 
         return {
             "raw_text": raw_text,
             "cleaned_text": cleaned_text,
             "transcription_time": transcription_time,
             "llm_time": llm_time,
-            "total_time": total_time}
+            "overlap_time": overlap_time,
+            "llm_windows": len(results),
+            "total_time": total_time,
+            "transcript_cache": stream_stats["transcript_cache"],
+            "whisper_model": spec.name,
+            "compute_type": spec.compute_type,
+            "profile": stream_stats["profile"],
+        }
@@ -0,0 +1,285 @@
+"""
+Whisper decodes in separate worker processes, each loading its own model with
+a share of the CPU cores (optionally pinned to them), so a single server can
+keep every core of a large machine busy. Audio is handed over as a file path
+or, once decoded, through shared memory; only the transcript is sent back.
+Requests go to the least-loaded worker.
+"""
+
+import asyncio
+import itertools
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+def _attach(audio):
+    """A path as-is, or a view of samples in the parent's shared memory."""
+    if isinstance(audio, str):
+        return audio, None
+    name, length = audio
+    # Spawned workers share the parent's resource tracker, which already
+    # tracks this block; the parent unlinks it once the result is back
+    shm = shared_memory.SharedMemory(name=name)
+    return np.ndarray((length,), dtype=np.float32, buffer=shm.buf), shm
+
+
+def _worker_main(
+    index, model_name, compute_type, cpu_threads, threads, cpus, tasks, results
+):
+    if cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+
+    # Imported here so the parent never pays for it on the worker's behalf
+    from faster_whisper import WhisperModel
+
+    model = WhisperModel(
+        model_name,
+        device="auto",
+        compute_type=compute_type,
+        cpu_threads=cpu_threads,
+        num_workers=threads,
+    )
+    # Warm up before reporting ready so the first real decode runs at speed
+    list(model.transcribe(np.zeros(16000, dtype=np.float32))[0])
+    results.put(("ready", index, None, None, 0.0))
+
+    def serve():
+        while (task := tasks.get()) is not None:
+            task_id, audio, options = task
+            start = time.perf_counter()
+            shm = None
+            try:
+                audio, shm = _attach(audio)
+                segments, _ = model.transcribe(audio, **options)
+                segments = [
+                    {"text": s.text, "start": s.start, "end": s.end} for s in segments
+                ]
+                text = " ".join([s["text"] for s in segments]).strip()
+                kind, payload = "ok", {"text": text, "segments": segments}
+            except Exception as e:
+                kind, payload = "error", f"{type(e).__name__}: {e}"
+            finally:
+                if shm is not None:
+                    # The array view must go before the block can be closed
+                    del audio
+                    shm.close()
+            results.put((kind, index, task_id, payload, time.perf_counter() - start))
+
+    serving = [threading.Thread(target=serve) for _ in range(threads)]
+    for thread in serving:
+        thread.start()
+    for thread in serving:
+        thread.join()
+
+
+@dataclass
+class _Worker:
+    index: int
+    process: mp.Process
+    tasks: object
+    cpus: set[int] | None
+    in_flight: int = 0
+    completed: int = 0
+    failed: int = 0
+    busy_time: float = 0.0
+    started_at: float = field(default_factory=time.perf_counter)
+
+
+class WhisperWorkerPool:
+    """N worker processes, each decoding up to `threads` files at once.
+    cpu_threads defaults to an even share of the cores; with pin_cpus each
+    worker is restricted to its own share."""
+
+    def __init__(
+        self,
+        model_name: str,
+        compute_type: str,
+        processes: int,
+        cpu_threads: int = 0,
+        threads: int = 1,
+        pin_cpus: bool = False,
+    ):
+        cores = os.cpu_count() or 1
+        share = max(1, cores // processes)
+        cpu_threads = cpu_threads or max(1, share // threads)
+        self.threads = threads
+        self.closed = False
+
+        # spawn, not fork: the parent already runs threads (event loop, pools)
+        context = mp.get_context("spawn")
+        self.results = context.Queue()
+        self.workers: list[_Worker] = []
+        print(f"🔄 Starting {processes} Whisper worker processes...")
+        for index in range(processes):
+            cpus = None
+            if pin_cpus:
+                first = index * share
+                cpus = {cpu % cores for cpu in range(first, first + share)}
+            tasks = context.Queue()
+            process = context.Process(
+                target=_worker_main,
+                args=(
+                    index,
+                    model_name,
+                    compute_type,
+                    cpu_threads,
+                    threads,
+                    cpus,
+                    tasks,
+                    self.results,
+                ),
+                name=f"whisper-worker-{index}",
+                daemon=True,
+            )
+            process.start()
+            self.workers.append(_Worker(index, process, tasks, cpus))
+
+        self._wait_ready()
+        print(f"✅ {processes} Whisper workers ready ({cpu_threads} threads each)")
+
+        self._pending: dict[int, tuple] = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._collector = threading.Thread(
+            target=self._collect, name="whisper-results", daemon=True
+        )
+        self._collector.start()
+
+    def _wait_ready(self):
+        waiting = {worker.index for worker in self.workers}
+        while waiting:
+            try:
+                kind, index, _, _, _ = self.results.get(timeout=1)
+            except queue.Empty:
+                for worker in self.workers:
+                    if worker.index in waiting and not worker.process.is_alive():
+                        self.close()
+                        raise RuntimeError(
+                            f"Whisper worker {worker.index} exited while loading"
+                        ) from None
+                continue
+            if kind == "ready":
+                waiting.discard(index)
+                self.workers[index].started_at = time.perf_counter()
+
+    async def transcribe(self, audio, options: dict) -> dict:
+        """Decode audio (a file path, or 16 kHz float32 samples) with the given
+        WhisperModel.transcribe options on the least-loaded live worker."""
+        if isinstance(audio, np.ndarray):
+            shm = shared_memory.SharedMemory(create=True, size=max(audio.nbytes, 1))
+            try:
+                shared = np.ndarray(audio.shape, dtype=np.float32, buffer=shm.buf)
+                shared[:] = audio
+                del shared
+                return await self._submit((shm.name, len(audio)), options)
+            finally:
+                shm.close()
+                shm.unlink()
+        return await self._submit(os.fspath(audio), options)
+
+    async def _submit(self, audio, options: dict) -> dict:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lock:
+            alive = [w for w in self.workers if w.process.is_alive()]
+            if self.closed or not alive:
+                raise RuntimeError("No Whisper worker processes available")
+            worker = min(alive, key=lambda w: w.in_flight)
+            worker.in_flight += 1
+            task_id = next(self._ids)
+            self._pending[task_id] = (loop, future, worker)
+        worker.tasks.put((task_id, audio, options))
+        return await future
+
+    def _collect(self):
+        while not self.closed:
+            try:
+                kind, index, task_id, payload, busy = self.results.get(timeout=1)
+            except queue.Empty:
+                self._fail_dead_workers()
+                continue
+            except (EOFError, OSError):
+                return
+
+            worker = self.workers[index]
+            with self._lock:
+                entry = self._pending.pop(task_id, None)
+                worker.in_flight -= 1
+                worker.busy_time += busy
+                if kind == "ok":
+                    worker.completed += 1
+                else:
+                    worker.failed += 1
+            if entry is not None:
+                loop, future, _ = entry
+                loop.call_soon_threadsafe(_resolve, future, kind, payload)
+
+    def _fail_dead_workers(self):
+        with self._lock:
+            lost = [
+                (task_id, entry)
+                for task_id, entry in self._pending.items()
+                if not entry[2].process.is_alive()
+            ]
+            for task_id, (_, _, worker) in lost:
+                del self._pending[task_id]
+                worker.in_flight -= 1
+                worker.failed += 1
+        for _, (loop, future, worker) in lost:
+            message = f"Whisper worker {worker.index} exited"
+            loop.call_soon_threadsafe(_resolve, future, "error", message)
+
+    def close(self):
+        self.closed = True
+        for worker in self.workers:
+            if worker.process.is_alive():
+                for _ in range(self.threads):
+                    worker.tasks.put(None)
+        for worker in self.workers:
+            worker.process.join(timeout=5)
+            if worker.process.is_alive():
+                worker.process.terminate()
+
+        pending = getattr(self, "_pending", {})
+        for loop, future, _ in pending.values():
+            loop.call_soon_threadsafe(
+                _resolve, future, "error", "Whisper worker pool shut down"
+            )
+        pending.clear()
+
+    def stats(self) -> list[dict]:
+        now = time.perf_counter()
+        with self._lock:
+            return [
+                {
+                    "worker": worker.index,
+                    "pid": worker.process.pid,
+                    "alive": worker.process.is_alive(),
+                    "cpus": sorted(worker.cpus) if worker.cpus else None,
+                    "in_flight": worker.in_flight,
+                    "completed": worker.completed,
+                    "failed": worker.failed,
+                    "busy_time": worker.busy_time,
+                    # Share of the worker's decode capacity used since it started
+                    "utilization": worker.busy_time
+                    / max(now - worker.started_at, 1e-9)
+                    / self.threads,
+                }
+                for worker in self.workers
+            ]
+
+
+def _resolve(future: asyncio.Future, kind: str, payload):
+    if future.done():
+        return
+    if kind == "ok":
+        future.set_result(payload)
+    else:
+        future.set_exception(RuntimeError(payload))